@@ -22,22 +22,14 @@ from utils import (
     load_insemination,
     load_pens,
     load_pen_allocations,
-    load_maternity,
-    load_litters,
-    load_piglets,
-    load_weaning,
-    load_nursery,
-    load_nursery_batches,
-    load_nursery_movements,
-    load_gilts,
-    load_gilts_selection,
-    load_gilts_discard,
-    calculate_statistics,
+    get_dashboard_statistics,
     authenticate_employee,
     register_employee,
     load_employees,
     check_developer_access,
-    check_permission
+    check_permission,
+    animal_labels,
+    pen_labels
 )
 
 # Função para criar um usuário administrador padrão se necessário
@@ -482,7 +474,7 @@ Este sistema ajuda a gerenciar sua granja de suínos, monitorando:
 if not os.path.exists("data"):
     os.makedirs("data")
 
-# Load data
+# Load only the tables shown on the dashboard (counts come from get_dashboard_statistics)
 animals_df = load_animals()
 breeding_df = load_breeding_cycles()
 gestation_df = load_gestation()
@@ -490,33 +482,16 @@ weight_df = load_weight_records()
 insemination_df = load_insemination()
 pens_df = load_pens()
 pen_allocations_df = load_pen_allocations()
-maternity_df = load_maternity()
-litters_df = load_litters()
-piglets_df = load_piglets()
-weaning_df = load_weaning()
-nursery_df = load_nursery()
-nursery_batches_df = load_nursery_batches()
-nursery_movements_df = load_nursery_movements()
-gilts_df = load_gilts()
-gilts_selection_df = load_gilts_selection()
-gilts_discard_df = load_gilts_discard()
 
 # Dashboard metrics
 col1, col2, col3, col4, col5 = st.columns(5)
 
 # Calculate key metrics
-total_animals = len(animals_df) if not animals_df.empty else 0
-pregnant_animals = len(gestation_df[gestation_df['data_parto'].isna()]) if not gestation_df.empty else 0
-in_heat_animals = 0
-if not breeding_df.empty:
-    today = datetime.now().date()
-    breeding_df['ultima_data'] = pd.to_datetime(breeding_df['ultima_data']).dt.date
-    # Animals expected to be in heat (assuming 21-day cycle)
-    breeding_df['proxima_data'] = breeding_df['ultima_data'] + pd.to_timedelta([21]*len(breeding_df), unit='d')
-    in_heat_animals = len(breeding_df[(breeding_df['proxima_data'] >= today) & 
-                                      (breeding_df['proxima_data'] <= today + timedelta(days=3))])
-
-avg_weight = weight_df['peso'].mean() if not weight_df.empty else 0
+dashboard_stats = get_dashboard_statistics()
+total_animals = dashboard_stats['total_animals']
+pregnant_animals = dashboard_stats['pregnant_animals']
+in_heat_animals = dashboard_stats['animals_in_heat']
+avg_weight = dashboard_stats['avg_weight']
 
 # Pen metrics
 total_pens = len(pens_df) if not pens_df.empty else 0
@@ -567,9 +542,11 @@ if not animals_df.empty and not weight_df.empty:
     
     with col2:
         st.subheader("Animais por Categoria")
-        if not animals_df.empty:
-            category_counts = animals_df['categoria'].value_counts().reset_index()
-            category_counts.columns = ['Categoria', 'Contagem']
+        if dashboard_stats['animals_by_category']:
+            category_counts = pd.DataFrame(
+                list(dashboard_stats['animals_by_category'].items()),
+                columns=['Categoria', 'Contagem']
+            ).sort_values('Contagem', ascending=False)
             fig = px.pie(category_counts, values='Contagem', names='Categoria', 
                         title='Distribuição de Animais por Categoria')
             st.plotly_chart(fig, use_container_width=True)
@@ -613,19 +590,13 @@ with tab5:
         
         # Add animal identification
         if not animals_df.empty:
-            recent_allocations['animal'] = recent_allocations['id_animal'].apply(
-                lambda x: animals_df[animals_df['id_animal'] == x]['identificacao'].iloc[0] 
-                if x in animals_df['id_animal'].values else "Desconhecido"
-            )
+            recent_allocations['animal'] = animal_labels(recent_allocations['id_animal'])
         else:
             recent_allocations['animal'] = "Desconhecido"
             
         # Add pen identification
         if not pens_df.empty:
-            recent_allocations['baia'] = recent_allocations['id_baia'].apply(
-                lambda x: pens_df[pens_df['id_baia'] == x]['identificacao'].iloc[0] 
-                if x in pens_df['id_baia'].values else "Desconhecida"
-            )
+            recent_allocations['baia'] = pen_labels(recent_allocations['id_baia'])
         else:
             recent_allocations['baia'] = "Desconhecida"
         
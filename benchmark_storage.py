@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark comparando os backends de armazenamento CSV e SQLite
+Gera granjas sintéticas (tabela de pesagens da recria) de vários tamanhos em um
+diretório temporário e mede gravação, leitura, inserção e consultas filtradas
+"""
+
+import os
+import sys
+import time
+import uuid
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import utils
+
+def generate_weighings(n_records, seed=42):
+    """
+    Gera uma tabela sintética de pesagens da recria
+    
+    Args:
+        n_records (int): Quantidade de pesagens
+        seed (int): Semente do gerador aleatório
+        
+    Returns:
+        DataFrame: Pesagens no formato de utils.load_recria_pesagens
+    """
+    rng = np.random.default_rng(seed)
+    n_animals = max(n_records // 20, 1)
+    n_batches = max(n_records // 500, 1)
+    
+    animal_ids = np.array([str(uuid.UUID(int=int(i) + 1)) for i in range(n_animals)])
+    batch_ids = np.array([str(uuid.UUID(int=int(i) + 10**9)) for i in range(n_batches)])
+    start = datetime(2020, 1, 1)
+    dates = pd.to_datetime(start) + pd.to_timedelta(rng.integers(0, 5 * 365, n_records), unit='D')
+    
+    return pd.DataFrame({
+        'id_pesagem': [str(uuid.UUID(int=int(i) + 10**12)) for i in range(n_records)],
+        'id_animal': animal_ids[rng.integers(0, n_animals, n_records)],
+        'id_lote': batch_ids[rng.integers(0, n_batches, n_records)],
+        'data_pesagem': dates.strftime('%Y-%m-%d'),
+        'peso': rng.normal(40, 12, n_records).round(2),
+        'tipo_pesagem': rng.choice(['Individual', 'Grupo'], n_records),
+        'fase_recria': rng.choice(['Fase 1', 'Fase 2', 'Fase 3'], n_records),
+        'idade_dias': rng.integers(60, 180, n_records),
+        'ganho_desde_ultima': rng.normal(5, 2, n_records).round(2),
+        'gpd_periodo': rng.normal(700, 150, n_records).round(1),
+        'responsavel': rng.choice(['Ana', 'Bruno', 'Carla'], n_records),
+        'observacao': None
+    })
+
+def timed(func):
+    """Executa a função e retorna o tempo decorrido em milissegundos"""
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+def benchmark_backend(backend, df):
+    """
+    Mede as operações principais em um backend
+    
+    Args:
+        backend (str): 'csv' ou 'sqlite'
+        df (DataFrame): Pesagens sintéticas
+        
+    Returns:
+        dict: Tempo (ms) de cada operação
+    """
+    utils.set_storage_backend(backend, utils.SQLITE_DB_FILE)
+    file_path = utils.RECRIA_PESAGENS_FILE
+    sample_animal = df['id_animal'].iloc[0]
+    sample_batch = df['id_lote'].iloc[0]
+    new_record = df.iloc[0].to_dict()
+    
+    results = {}
+    results['gravar tabela'] = timed(lambda: utils.save_recria_pesagens(df))
+    
+    utils.invalidate_table_cache()
+    results['leitura fria'] = timed(utils.load_recria_pesagens)
+    results['leitura em cache'] = timed(utils.load_recria_pesagens)
+    results['inserir 1 registro'] = timed(lambda: utils._append_table(new_record, file_path))
+    
+    utils.invalidate_table_cache()
+    results['consulta por animal'] = timed(
+        lambda: utils.query_recria_pesagens(id_animal=sample_animal))
+    results['consulta por lote'] = timed(
+        lambda: utils.query_recria_pesagens(id_lote=sample_batch))
+    results['consulta 30 dias'] = timed(
+        lambda: utils.query_recria_pesagens(start_date='2022-01-01', end_date='2022-01-30'))
+    
+    return results
+
+def run_benchmark(sizes):
+    """
+    Executa o benchmark para cada tamanho de granja
+    
+    Args:
+        sizes (list): Quantidades de registros a testar
+        
+    Returns:
+        DataFrame: Tempos por tamanho, operação e backend
+    """
+    rows = []
+    original_dir = os.getcwd()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        os.makedirs("data")
+        try:
+            for size in sizes:
+                df = generate_weighings(size)
+                for backend in ('csv', 'sqlite'):
+                    for operation, elapsed in benchmark_backend(backend, df).items():
+                        rows.append({
+                            'registros': size,
+                            'operacao': operation,
+                            'backend': backend,
+                            'ms': round(elapsed, 2)
+                        })
+        finally:
+            os.chdir(original_dir)
+            utils.set_storage_backend(utils.load_storage_config()['backend'])
+    
+    results = pd.DataFrame(rows)
+    return results.pivot_table(index=['registros', 'operacao'], columns='backend', values='ms')
+
+def main():
+    """Função principal"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Comparar os backends de armazenamento CSV e SQLite")
+    parser.add_argument("--sizes", "-s", nargs="+", type=int, default=[10_000, 100_000, 1_000_000],
+                        help="Quantidades de registros das granjas sintéticas")
+    
+    args = parser.parse_args()
+    
+    print("\n===== BENCHMARK DE ARMAZENAMENTO (ms) =====\n")
+    print(run_benchmark(args.sizes).to_string())
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,100 @@
 import os
 import sys
 import json
+import threading
 import streamlit as st
-import importlib.util
+
+PAGE_PERMISSIONS_FILE = ".streamlit/page_config/page_permissions.json"
+
+# Tabela página → cargos com acesso, montada a partir das permissões das páginas
+# e das permissões de cada cargo, e refeita só quando um dos dois arquivos muda
+_page_roles_cache = None
+_page_permissions_cache = None
+_cache_lock = threading.Lock()
+
+def _file_signature(path):
+    """Return the (mtime_ns, size) pair of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
 
 def load_page_permissions():
     """
     Carrega as permissões configuradas para cada página
     
+    O arquivo só é lido de novo quando muda.
+    
     Returns:
         dict: Dicionário com as permissões para cada página
     """
-    page_permissions_file = ".streamlit/page_config/page_permissions.json"
+    global _page_permissions_cache
+    signature = _file_signature(PAGE_PERMISSIONS_FILE)
+    if signature is None:
+        return {}
+    
+    with _cache_lock:
+        cached = _page_permissions_cache
     
-    if os.path.exists(page_permissions_file):
+    if cached is None or cached[0] != signature:
         try:
-            with open(page_permissions_file, "r") as f:
-                return json.load(f)
+            with open(PAGE_PERMISSIONS_FILE, "r") as f:
+                page_permissions = json.load(f)
         except:
-            return {}
-    else:
-        return {}
+            page_permissions = {}
+        cached = (signature, page_permissions)
+        with _cache_lock:
+            _page_permissions_cache = cached
+    
+    return dict(cached[1])
 
-def check_page_permission():
+def _page_roles():
+    """
+    Retorna a tabela página → cargos com acesso.
+    
+    Páginas sem permissões configuradas não entram na tabela: qualquer
+    usuário autenticado pode acessá-las. Retorna None se o utils não puder
+    ser importado.
+    """
+    global _page_roles_cache
+    sys_path = os.path.dirname(os.path.abspath(__file__))
+    if sys_path not in sys.path:
+        sys.path.append(sys_path)
+    
+    try:
+        from utils import get_role_permissions, PERMISSIONS_FILE
+    except ImportError:
+        # Se não conseguir importar a função, não pode verificar as permissões
+        return None
+    
+    signature = (_file_signature(PAGE_PERMISSIONS_FILE), _file_signature(PERMISSIONS_FILE))
+    with _cache_lock:
+        cached = _page_roles_cache
+    
+    if cached is None or cached[0] != signature:
+        role_permissions = get_role_permissions()
+        page_roles = {
+            page: frozenset(
+                cargo for cargo, permissions in role_permissions.items()
+                if permissions.intersection(required)
+            )
+            for page, required in load_page_permissions().items()
+            if required
+        }
+        cached = (signature, page_roles)
+        with _cache_lock:
+            _page_roles_cache = cached
+    
+    return cached[1]
+
+def check_page_permission(page_filename=None):
     """
     Verifica se o usuário autenticado tem permissão para acessar a página atual
     
+    Args:
+        page_filename: Nome do arquivo da página (padrão: o nome deste módulo)
+    
     Returns:
         bool: True se o usuário tem permissão, False caso contrário
     """
@@ -33,36 +102,21 @@ def check_page_permission():
     if 'authenticated' not in st.session_state or not st.session_state.authenticated:
         return False
     
-    # Importar a função de verificação de permissões
-    sys_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    if sys_path not in sys.path:
-        sys.path.append(sys_path)
-    
-    try:
-        from utils import check_permission
-    except ImportError:
-        # Se não conseguir importar a função, não pode verificar as permissões
+    page_roles = _page_roles()
+    if page_roles is None:
         return False
     
     # Obter o nome do arquivo da página atual
-    script_path = __file__
-    page_filename = os.path.basename(script_path)
-    
-    # Carregar as permissões das páginas
-    page_permissions = load_page_permissions()
-    
-    # Obter as permissões necessárias para esta página
-    required_permissions = page_permissions.get(page_filename, [])
+    if page_filename is None:
+        page_filename = os.path.basename(__file__)
     
     # Se não houver permissões necessárias, todos os usuários autenticados podem acessar
-    if not required_permissions:
+    allowed_roles = page_roles.get(page_filename)
+    if allowed_roles is None:
         return True
     
-    # Verificar se o usuário tem pelo menos uma das permissões necessárias
+    # Verificar se o cargo do usuário tem pelo menos uma das permissões necessárias
     user = st.session_state.current_user
-    for permission in required_permissions:
-        if check_permission(user, permission):
-            return True
-    
-    # Se chegou aqui, o usuário não tem nenhuma das permissões necessárias
-    return False
\ No newline at end of file
+    if not user or 'cargo' not in user:
+        return False
+    return user['cargo'] in allowed_roles
@@ -15,6 +15,53 @@ import datetime
 import subprocess
 import hashlib
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+# Endereço da API do GitHub; pode ser trocado (ex.: por um servidor local em testes)
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+
+# Número de envios simultâneos de arquivos
+UPLOAD_WORKERS = 8
+
+def _github_url(path):
+    """Return the full API URL for a path such as /repos/owner/name"""
+    return GITHUB_API_URL.rstrip("/") + path
+
+def create_github_session(token):
+    """
+    Cria uma sessão HTTP autenticada para a API do GitHub
+    
+    A sessão mantém as conexões abertas entre as requisições, com um pool
+    do tamanho do número de envios simultâneos.
+    
+    Args:
+        token (str): Token de acesso pessoal do GitHub
+    
+    Returns:
+        requests.Session: Sessão configurada
+    """
+    session = requests.Session()
+    session.headers.update({
+        "Authorization": f"token {token}",
+        "Accept": "application/vnd.github.v3+json"
+    })
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=UPLOAD_WORKERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def git_blob_sha(content):
+    """
+    Calcula o SHA do blob git de um conteúdo, o mesmo que o GitHub informa para cada arquivo
+    
+    Args:
+        content (bytes): Conteúdo do arquivo
+    
+    Returns:
+        str: SHA-1 em hexadecimal
+    """
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
 
 def load_github_credentials():
     """
@@ -69,7 +116,7 @@ def save_github_credentials(username, token, repo_name=None, repo_owner=None):
         print(f"Erro ao salvar as credenciais: {e}")
         return False
 
-def create_github_repository(token, repo_name, description):
+def create_github_repository(token, repo_name, description, session=None):
     """
     Cria um novo repositório no GitHub
     
@@ -77,15 +124,12 @@ def create_github_repository(token, repo_name, description):
         token (str): Token de acesso pessoal do GitHub
         repo_name (str): Nome do repositório
         description (str): Descrição do repositório
+        session (requests.Session, optional): Sessão a reutilizar
     
     Returns:
         dict, str: Dados do repositório e mensagem de status
     """
-    url = "https://api.github.com/user/repos"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
+    session = session or create_github_session(token)
     data = {
         "name": repo_name,
         "description": description,
@@ -94,7 +138,7 @@ def create_github_repository(token, repo_name, description):
     }
     
     try:
-        response = requests.post(url, headers=headers, json=data)
+        response = session.post(_github_url("/user/repos"), json=data)
         if response.status_code == 201:
             return response.json(), "Repositório criado com sucesso!"
         else:
@@ -102,9 +146,9 @@ def create_github_repository(token, repo_name, description):
     except Exception as e:
         return None, f"Erro na comunicação com o GitHub: {str(e)}"
 
-def upload_file_to_github(token, repo_owner, repo_name, file_path, file_content, commit_message):
+def upload_file_to_github(token, repo_owner, repo_name, file_path, file_content, commit_message, sha=None, session=None):
     """
-    Envia um arquivo para o repositório GitHub
+    Envia um arquivo para o repositório GitHub (um commit por arquivo)
     
     Args:
         token (str): Token de acesso pessoal do GitHub
@@ -113,15 +157,15 @@ def upload_file_to_github(token, repo_owner, repo_name, file_path, file_content,
         file_path (str): Caminho do arquivo no repositório
         file_content (bytes): Conteúdo do arquivo em bytes
         commit_message (str): Mensagem do commit
+        sha (str, optional): SHA do blob atual do arquivo no repositório, se já
+            for conhecido; se None, é consultado antes do envio
+        session (requests.Session, optional): Sessão a reutilizar
     
     Returns:
         bool, str: Sucesso e mensagem
     """
-    url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/contents/{file_path}"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
+    session = session or create_github_session(token)
+    url = _github_url(f"/repos/{repo_owner}/{repo_name}/contents/{file_path}")
     
     # Codificar conteúdo em base64
     content_encoded = base64.b64encode(file_content).decode("utf-8")
@@ -132,18 +176,20 @@ def upload_file_to_github(token, repo_owner, repo_name, file_path, file_content,
     }
     
     # Verificar se o arquivo já existe
-    try:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            # O arquivo existe, precisamos incluir o SHA para atualizá-lo
-            sha = response.json()["sha"]
-            data["sha"] = sha
-    except Exception as e:
-        # Ignorar erros, assumir que o arquivo não existe
-        pass
+    if sha is None:
+        try:
+            response = session.get(url)
+            if response.status_code == 200:
+                # O arquivo existe, precisamos incluir o SHA para atualizá-lo
+                sha = response.json()["sha"]
+        except Exception as e:
+            # Ignorar erros, assumir que o arquivo não existe
+            pass
+    if sha:
+        data["sha"] = sha
     
     try:
-        response = requests.put(url, headers=headers, json=data)
+        response = session.put(url, json=data)
         if response.status_code in [200, 201]:
             return True, f"Arquivo {file_path} enviado com sucesso"
         else:
@@ -151,38 +197,31 @@ def upload_file_to_github(token, repo_owner, repo_name, file_path, file_content,
     except Exception as e:
         return False, f"Erro na comunicação com o GitHub: {str(e)}"
 
-def verify_file_changed(token, repo_owner, repo_name, file_path, local_content):
+def verify_file_changed(token, repo_owner, repo_name, file_path, local_content, session=None):
     """
     Verifica se um arquivo foi modificado em relação à versão no GitHub
     
+    Compara o SHA do blob informado pelo GitHub com o calculado localmente,
+    sem baixar o conteúdo do arquivo.
+    
     Args:
         token (str): Token de acesso pessoal do GitHub
         repo_owner (str): Nome do usuário/organização proprietária do repositório
         repo_name (str): Nome do repositório
         file_path (str): Caminho do arquivo no repositório
         local_content (bytes): Conteúdo do arquivo local
+        session (requests.Session, optional): Sessão a reutilizar
     
     Returns:
         bool: True se o arquivo foi modificado ou não existe no GitHub, False caso contrário
     """
-    url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/contents/{file_path}"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
+    session = session or create_github_session(token)
+    url = _github_url(f"/repos/{repo_owner}/{repo_name}/contents/{file_path}")
     
     try:
-        response = requests.get(url, headers=headers)
+        response = session.get(url)
         if response.status_code == 200:
-            # Arquivo existe no GitHub, verificar conteúdo
-            github_content = base64.b64decode(response.json()["content"])
-            
-            # Calcular hashes para comparação
-            local_hash = hashlib.md5(local_content).hexdigest()
-            github_hash = hashlib.md5(github_content).hexdigest()
-            
-            # Se os hashes forem diferentes, o arquivo foi modificado
-            return local_hash != github_hash
+            return response.json()["sha"] != git_blob_sha(local_content)
         else:
             # Arquivo não existe no GitHub, considerar como modificado
             return True
@@ -191,16 +230,105 @@ def verify_file_changed(token, repo_owner, repo_name, file_path, local_content):
         print(f"Erro ao verificar arquivo {file_path}: {str(e)}")
         return True
 
-def extract_and_upload_to_github(zip_path, token, repo_owner, repo_name, only_modified=False):
+def get_remote_tree(session, repo_owner, repo_name, branch):
+    """
+    Lista os arquivos de um branch do repositório com uma única consulta à árvore
+    
+    Args:
+        session (requests.Session): Sessão autenticada
+        repo_owner (str): Nome do usuário/organização proprietária do repositório
+        repo_name (str): Nome do repositório
+        branch (str): Nome do branch
+    
+    Returns:
+        str, str, dict: SHA do último commit, SHA da sua árvore e um dicionário
+        caminho → SHA do blob. Para um repositório vazio, retorna None, None, {}
+    """
+    repo_url = f"/repos/{repo_owner}/{repo_name}"
+    response = session.get(_github_url(f"{repo_url}/git/ref/heads/{branch}"))
+    if response.status_code in (404, 409):
+        # Repositório vazio: ainda não há branch
+        return None, None, {}
+    response.raise_for_status()
+    commit_sha = response.json()["object"]["sha"]
+    
+    response = session.get(_github_url(f"{repo_url}/git/commits/{commit_sha}"))
+    response.raise_for_status()
+    tree_sha = response.json()["tree"]["sha"]
+    
+    response = session.get(_github_url(f"{repo_url}/git/trees/{tree_sha}"), params={"recursive": "1"})
+    response.raise_for_status()
+    # Se a listagem vier truncada, os arquivos que faltarem serão apenas enviados de novo
+    blobs = {
+        entry["path"]: entry["sha"]
+        for entry in response.json().get("tree", [])
+        if entry.get("type") == "blob"
+    }
+    return commit_sha, tree_sha, blobs
+
+def _read_package_files(zip_path):
+    """Read the files of a deploy package as a {repository path: bytes} dict"""
+    files = {}
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                continue
+            files[info.filename] = zip_ref.read(info)
+    return files
+
+def _create_blob(session, repo_url, repo_path, file_content):
+    """Upload one file as a git blob, returning (path, sha, error message)"""
+    try:
+        response = session.post(_github_url(f"{repo_url}/git/blobs"), json={
+            "content": base64.b64encode(file_content).decode("utf-8"),
+            "encoding": "base64"
+        })
+        if response.status_code == 201:
+            return repo_path, response.json()["sha"], None
+        return repo_path, None, f"Erro ao enviar {repo_path}: {response.json().get('message', 'Erro desconhecido')}"
+    except Exception as e:
+        return repo_path, None, f"Erro ao enviar {repo_path}: {str(e)}"
+
+def _commit_blobs(session, repo_url, branch, parent_sha, base_tree_sha, blobs, commit_message):
+    """Create one commit with the given {path: blob sha} on top of the branch and move the branch to it"""
+    response = session.post(_github_url(f"{repo_url}/git/trees"), json={
+        "base_tree": base_tree_sha,
+        "tree": [
+            {"path": path, "mode": "100644", "type": "blob", "sha": sha}
+            for path, sha in sorted(blobs.items())
+        ]
+    })
+    response.raise_for_status()
+    tree_sha = response.json()["sha"]
+    
+    response = session.post(_github_url(f"{repo_url}/git/commits"), json={
+        "message": commit_message,
+        "tree": tree_sha,
+        "parents": [parent_sha]
+    })
+    response.raise_for_status()
+    commit_sha = response.json()["sha"]
+    
+    response = session.patch(_github_url(f"{repo_url}/git/refs/heads/{branch}"), json={"sha": commit_sha})
+    response.raise_for_status()
+    return commit_sha
+
+def extract_and_upload_to_github(zip_path, token, repo_owner, repo_name, only_modified=False, session=None):
     """
     Extrai os arquivos do pacote ZIP e envia para o GitHub
     
+    A árvore do repositório é lida uma única vez e comparada com o SHA do blob
+    de cada arquivo local, de modo que os arquivos iguais não são baixados nem
+    enviados. Os arquivos são enviados em paralelo como blobs e gravados em um
+    único commit.
+    
     Args:
         zip_path (str): Caminho para o arquivo ZIP
         token (str): Token de acesso pessoal do GitHub
         repo_owner (str): Nome do usuário/organização proprietária do repositório
         repo_name (str): Nome do repositório
-        only_modified (bool, optional): Se True, verifica e envia apenas arquivos modificados
+        only_modified (bool, optional): Se True, envia apenas arquivos modificados
+        session (requests.Session, optional): Sessão a reutilizar
     
     Returns:
         bool, str: Sucesso e mensagem
@@ -208,46 +336,66 @@ def extract_and_upload_to_github(zip_path, token, repo_owner, repo_name, only_mo
     if not os.path.exists(zip_path):
         return False, f"Arquivo {zip_path} não encontrado"
     
-    success_count = 0
-    error_count = 0
-    skipped_count = 0
-    error_messages = []
+    session = session or create_github_session(token)
+    repo_url = f"/repos/{repo_owner}/{repo_name}"
+    files = _read_package_files(zip_path)
     
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Extrair ZIP para diretório temporário
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
-        
-        # Upload dos arquivos
-        for root, dirs, files in os.walk(temp_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                repo_path = os.path.relpath(file_path, temp_dir)
-                
-                with open(file_path, "rb") as f:
-                    file_content = f.read()
-                
-                # Verificar se o arquivo foi modificado, se a opção estiver ativada
-                if only_modified and check_repository_exists(token, repo_owner, repo_name):
-                    is_modified = verify_file_changed(
-                        token, repo_owner, repo_name, repo_path, file_content
-                    )
-                    
-                    if not is_modified:
-                        skipped_count += 1
-                        continue
-                
-                success, message = upload_file_to_github(
-                    token, repo_owner, repo_name, 
-                    repo_path, file_content, 
-                    f"Add {repo_path} for Streamlit Cloud deploy"
-                )
-                
-                if success:
-                    success_count += 1
+    try:
+        response = session.get(_github_url(repo_url))
+        response.raise_for_status()
+        branch = response.json().get("default_branch") or "main"
+        commit_sha, tree_sha, remote_blobs = get_remote_tree(session, repo_owner, repo_name, branch)
+    except Exception as e:
+        return False, f"Erro na comunicação com o GitHub: {str(e)}"
+    
+    # Verificar quais arquivos foram modificados, se a opção estiver ativada
+    if only_modified:
+        pending = {
+            repo_path: file_content for repo_path, file_content in files.items()
+            if remote_blobs.get(repo_path) != git_blob_sha(file_content)
+        }
+    else:
+        pending = files
+    skipped_count = len(files) - len(pending)
+    
+    error_messages = []
+    uploaded = {}
+    
+    if commit_sha is None:
+        # A API de dados do git não funciona em repositórios vazios: o primeiro
+        # envio é feito arquivo a arquivo, cada um com seu commit
+        for repo_path, file_content in sorted(pending.items()):
+            success, message = upload_file_to_github(
+                token, repo_owner, repo_name, repo_path, file_content,
+                f"Add {repo_path} for Streamlit Cloud deploy", sha="", session=session
+            )
+            if success:
+                uploaded[repo_path] = None
+            else:
+                error_messages.append(message)
+    elif pending:
+        with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+            results = executor.map(
+                lambda item: _create_blob(session, repo_url, item[0], item[1]),
+                pending.items()
+            )
+            for repo_path, sha, message in results:
+                if sha is not None:
+                    uploaded[repo_path] = sha
                 else:
-                    error_count += 1
                     error_messages.append(message)
+        
+        if uploaded:
+            try:
+                _commit_blobs(
+                    session, repo_url, branch, commit_sha, tree_sha, uploaded,
+                    f"Update {len(uploaded)} files for Streamlit Cloud deploy"
+                )
+            except Exception as e:
+                return False, f"Erro ao criar o commit no GitHub: {str(e)}"
+    
+    success_count = len(uploaded)
+    error_count = len(error_messages)
     
     if skipped_count > 0:
         skip_msg = f"{skipped_count} arquivos não modificados foram ignorados. "
@@ -289,14 +437,18 @@ def deploy_to_github(username=None, token=None, repo_name=None, repo_owner=None,
     repo_owner = repo_owner or username
     repo_name = repo_name or f"suinocultura-streamlit-{datetime.datetime.now().strftime('%Y%m%d')}"
     
+    # Uma única sessão (e as mesmas conexões) para todas as requisições
+    session = create_github_session(token)
+    
     # Verificar se o repositório já existe
-    repo_exists = check_repository_exists(token, repo_owner, repo_name)
+    repo_exists = check_repository_exists(token, repo_owner, repo_name, session=session)
     
     if not repo_exists:
         # Criar novo repositório
         repo_data, message = create_github_repository(
             token, repo_name, 
-            "Sistema de Gestão Suinocultura para deploy no Streamlit Cloud"
+            "Sistema de Gestão Suinocultura para deploy no Streamlit Cloud",
+            session=session
         )
         
         if not repo_data:
@@ -313,7 +465,7 @@ def deploy_to_github(username=None, token=None, repo_name=None, repo_owner=None,
     
     # Enviar arquivos para o GitHub
     success, message = extract_and_upload_to_github(
-        zip_path, token, repo_owner, repo_name, only_modified
+        zip_path, token, repo_owner, repo_name, only_modified, session=session
     )
     
     if success:
@@ -327,7 +479,7 @@ def deploy_to_github(username=None, token=None, repo_name=None, repo_owner=None,
     
     return success, message
 
-def check_repository_exists(token, owner, repo_name):
+def check_repository_exists(token, owner, repo_name, session=None):
     """
     Verifica se um repositório existe no GitHub
     
@@ -335,18 +487,15 @@ def check_repository_exists(token, owner, repo_name):
         token (str): Token de acesso pessoal do GitHub
         owner (str): Nome do usuário/organização proprietária do repositório
         repo_name (str): Nome do repositório
+        session (requests.Session, optional): Sessão a reutilizar
     
     Returns:
         bool: True se o repositório existe, False caso contrário
     """
-    url = f"https://api.github.com/repos/{owner}/{repo_name}"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
+    session = session or create_github_session(token)
     
     try:
-        response = requests.get(url, headers=headers)
+        response = session.get(_github_url(f"/repos/{owner}/{repo_name}"))
         return response.status_code == 200
     except:
         return False
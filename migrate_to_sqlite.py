@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Ferramenta para migrar os dados em CSV (pasta data/) para o backend SQLite
+Cada arquivo CSV vira uma tabela indexada no banco; os CSVs originais não são alterados
+"""
+
+import os
+import sys
+import json
+
+import pandas as pd
+
+import utils
+
+def migrate_csv_to_sqlite(sqlite_path=None, overwrite=False):
+    """
+    Copia todas as tabelas CSV existentes para o banco SQLite
+    
+    Args:
+        sqlite_path (str): Caminho do banco SQLite (padrão: utils.SQLITE_DB_FILE)
+        overwrite (bool): Substituir tabelas que já existem no banco
+        
+    Returns:
+        dict: Resultado por arquivo ('migrado', 'ignorado' ou mensagem de erro)
+    """
+    results = {}
+    
+    # Ler os CSVs diretamente, independente do backend configurado, com os
+    # tipos do registro de esquemas (identificadores continuam texto, sem
+    # perder zeros à esquerda)
+    csv_tables = {}
+    for file_path in utils.list_data_tables():
+        partitioned = os.path.exists(utils._manifest_path(file_path))
+        if partitioned and os.path.exists(file_path):
+            results[file_path] = "erro: a tabela existe como CSV e em partições; mantenha apenas uma das duas"
+            continue
+        if not partitioned and not os.path.exists(file_path):
+            continue
+        try:
+            if partitioned:
+                # Tabelas particionadas (inclusive as partições arquivadas) viram uma única tabela
+                df = utils._read_partitions(file_path, include_archived=True)
+            else:
+                df = utils._read_csv_typed(file_path, file_path)
+            csv_tables[file_path] = utils._expand_categories(df)
+        except pd.errors.EmptyDataError:
+            results[file_path] = "ignorado (arquivo vazio)"
+        except (pd.errors.ParserError, OSError, ValueError) as e:
+            results[file_path] = f"erro: {str(e)}"
+    
+    utils.set_storage_backend('sqlite', sqlite_path)
+    
+    for file_path, df in csv_tables.items():
+        if not overwrite and utils._table_exists(file_path):
+            results[file_path] = "ignorado (tabela já existe)"
+            continue
+        
+        utils._save_table(df, file_path)
+        results[file_path] = f"migrado ({len(df)} registros)"
+    
+    return results
+
+def write_storage_config(backend, sqlite_path=None):
+    """
+    Grava a configuração do backend de armazenamento
+    
+    Args:
+        backend (str): 'csv' ou 'sqlite'
+        sqlite_path (str): Caminho do banco SQLite
+    """
+    # Mantém as demais opções já configuradas (snapshots, partições etc.)
+    config = {}
+    if os.path.exists(utils.STORAGE_CONFIG_FILE):
+        try:
+            with open(utils.STORAGE_CONFIG_FILE, 'r') as f:
+                config = json.load(f)
+        except ValueError:
+            config = {}
+    
+    config['backend'] = backend
+    config['sqlite_path'] = sqlite_path or utils.SQLITE_DB_FILE
+    
+    # Grava em arquivo temporário e substitui, para nunca deixar a configuração pela metade
+    temp_path = utils.STORAGE_CONFIG_FILE + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(config, f, indent=4)
+    os.replace(temp_path, utils.STORAGE_CONFIG_FILE)
+
+def main():
+    """Função principal"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Migrar os dados CSV para o backend SQLite")
+    parser.add_argument("--db", default=utils.SQLITE_DB_FILE, help="Caminho do banco SQLite de destino")
+    parser.add_argument("--overwrite", "-o", action="store_true", help="Substituir tabelas já existentes no banco")
+    parser.add_argument("--activate", "-a", action="store_true", help="Configurar o SQLite como backend padrão após a migração")
+    
+    args = parser.parse_args()
+    
+    results = migrate_csv_to_sqlite(args.db, args.overwrite)
+    
+    print("\n===== MIGRAÇÃO CSV → SQLITE =====\n")
+    for file_path, status in sorted(results.items()):
+        print(f"  - {file_path}: {status}")
+    
+    errors = [status for status in results.values() if status.startswith("erro")]
+    
+    if args.activate and not errors:
+        write_storage_config('sqlite', args.db)
+        print(f"\nBackend SQLite ativado em {utils.STORAGE_CONFIG_FILE}")
+    
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,6 +22,10 @@ from utils import (
     load_vaccination_records,
     load_mortality_records,
     check_permission,
+    available_export_formats,
+    export_file_info,
+    export_stream,
+    iter_table_chunks,
     EMPLOYEES_FILE,
     ANIMALS_FILE,
     BREEDING_FILE,
@@ -380,49 +384,60 @@ with tab4:
     # Gerenciamento de dados
     st.write("### 🗄️ Gerenciamento de Dados")
     
+    # Tabelas exportadas direto do armazenamento, em blocos; os colaboradores
+    # vêm do carregador para incluir o último acesso
     data_options = {
-        "Colaboradores": "employees",
-        "Animais": "animals",
-        "Ciclos Reprodutivos": "breeding",
-        "Gestações": "gestation",
-        "Registros de Peso": "weight",
-        "Detecção de Cio": "heat",
-        "Vacinações": "vaccination",
-        "Mortalidade": "mortality"
+        "Colaboradores": ("employees", EMPLOYEES_FILE),
+        "Animais": ("animals", ANIMALS_FILE),
+        "Ciclos Reprodutivos": ("breeding", BREEDING_FILE),
+        "Gestações": ("gestation", GESTATION_FILE),
+        "Registros de Peso": ("weight", WEIGHT_FILE),
+        "Detecção de Cio": ("heat", HEAT_RECORDS_FILE),
+        "Vacinações": ("vaccination", VACCINATION_RECORDS_FILE),
+        "Mortalidade": ("mortality", MORTALITY_FILE)
     }
+    format_labels = {"csv": "CSV", "excel": "Excel (XLSX)", "json": "JSON"}
+    compression_options = {"Nenhuma": None, "GZIP": "gzip", "ZIP": "zip"}
     
     export_data = st.selectbox(
         "Selecione os dados para exportar",
         options=list(data_options.keys())
     )
     
-    if st.button("Exportar CSV"):
-        data_key = data_options[export_data]
+    col_format, col_compression = st.columns(2)
+    with col_format:
+        export_format = st.selectbox(
+            "Formato",
+            options=available_export_formats(),
+            format_func=lambda fmt: format_labels[fmt]
+        )
+    with col_compression:
+        export_compression = st.selectbox(
+            "Compressão",
+            options=list(compression_options.keys())
+        )
+    
+    if st.button("Exportar Dados"):
+        data_key, data_file = data_options[export_data]
         if data_key == "employees":
-            df = load_employees()
-        elif data_key == "animals":
-            df = load_animals()
-        elif data_key == "breeding":
-            df = load_breeding_cycles()
-        elif data_key == "gestation":
-            df = load_gestation()
-        elif data_key == "weight":
-            df = load_weight_records()
-        elif data_key == "heat":
-            df = load_heat_records()
-        elif data_key == "vaccination":
-            df = load_vaccination_records()
-        elif data_key == "mortality":
-            df = load_mortality_records()
+            source = load_employees()
+            has_data = not source.empty
+        else:
+            source = data_file
+            has_data = not next(iter_table_chunks(data_file, 1)).empty
         
-        if not df.empty:
-            csv = df.to_csv(index=False)
-            st.download_button(
-                "📥 Baixar CSV",
-                data=csv,
-                file_name=f"{data_key}_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv"
+        if has_data:
+            compression = compression_options[export_compression]
+            file_name, mime = export_file_info(
+                f"{data_key}_{datetime.now().strftime('%Y%m%d')}", export_format, compression
             )
+            with export_stream(source, export_format, compression, file_name=data_key) as exported:
+                st.download_button(
+                    "📥 Baixar Arquivo",
+                    data=exported.read(),
+                    file_name=file_name,
+                    mime=mime
+                )
         else:
             st.warning("Não há dados para exportar.")
     
@@ -13,7 +13,8 @@ from utils import (
     save_employees,
     register_employee,
     update_employee_status,
-    check_permission
+    check_permission,
+    export_stream
 )
 
 st.set_page_config(
@@ -206,13 +207,13 @@ with tab2:
             # Export functionality
             st.markdown("---")
             if st.button("📥 Exportar Dados"):
-                csv = filtered_df.to_csv(index=False)
-                st.download_button(
-                    "📥 Baixar CSV",
-                    data=csv,
-                    file_name="colaboradores.csv",
-                    mime="text/csv"
-                )
+                with export_stream(filtered_df, 'csv') as csv:
+                    st.download_button(
+                        "📥 Baixar CSV",
+                        data=csv.read(),
+                        file_name="colaboradores.csv",
+                        mime="text/csv"
+                    )
         else:
             st.info("Nenhum colaborador encontrado com os filtros selecionados.")
     else:
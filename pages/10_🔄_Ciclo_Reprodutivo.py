@@ -10,7 +10,7 @@ import plotly.express as px
 # Add the parent directory to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils import load_animals, load_breeding_cycles, save_breeding_cycles, predict_heat_date, check_permission
+from utils import load_animals, load_breeding_cycles, save_breeding_cycles, predict_heat_date, check_permission, animal_labels
 
 st.set_page_config(
     page_title="Ciclo Reprodutivo",
@@ -173,9 +173,7 @@ with tab2:
     if not filtered_df.empty:
         # Add animal identification to display
         display_df = filtered_df.copy()
-        display_df['identificacao'] = display_df['id_animal'].apply(
-            lambda x: animals_df[animals_df['id_animal'] == x]['identificacao'].iloc[0] if x in animals_df['id_animal'].values else "Desconhecido"
-        )
+        display_df['identificacao'] = animal_labels(display_df['id_animal'])
         display_df['proxima_data'] = pd.to_datetime(display_df['data_cio']) + pd.to_timedelta([21]*len(display_df), unit='d')
         
         st.dataframe(
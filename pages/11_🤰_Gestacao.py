@@ -11,7 +11,7 @@ import plotly.graph_objects as go
 # Add the parent directory to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils import load_animals, load_gestation, save_gestation, calculate_gestation_details, check_permission
+from utils import load_animals, load_gestation, save_gestation, calculate_gestation_details, check_permission, animal_labels
 
 st.set_page_config(
     page_title="Gestação",
@@ -127,12 +127,8 @@ with tab2:
         if not active_gestations.empty:
             # Add animal identification to display
             display_df = active_gestations.copy()
-            display_df['identificacao'] = display_df['id_animal'].apply(
-                lambda x: animals_df[animals_df['id_animal'] == x]['identificacao'].iloc[0] if x in animals_df['id_animal'].values else "Desconhecido"
-            )
-            display_df['nome'] = display_df['id_animal'].apply(
-                lambda x: animals_df[animals_df['id_animal'] == x]['nome'].iloc[0] if x in animals_df['id_animal'].values else ""
-            )
+            display_df['identificacao'] = animal_labels(display_df['id_animal'])
+            display_df['nome'] = animal_labels(display_df['id_animal'], 'nome', "")
             
             # Calculate days elapsed and remaining
             today = datetime.now().date()
@@ -315,9 +311,7 @@ with tab2:
         if not completed_gestations.empty:
             # Add animal identification to display
             display_completed_df = completed_gestations.copy()
-            display_completed_df['identificacao'] = display_completed_df['id_animal'].apply(
-                lambda x: animals_df[animals_df['id_animal'] == x]['identificacao'].iloc[0] if x in animals_df['id_animal'].values else "Desconhecido"
-            )
+            display_completed_df['identificacao'] = animal_labels(display_completed_df['id_animal'])
             
             # Sort by parto date
             display_completed_df = display_completed_df.sort_values('data_parto', ascending=False)
@@ -16,8 +16,8 @@ from utils import (
     load_breeding_cycles,
     save_breeding_cycles,
     load_insemination,
-    save_insemination
-,
+    save_insemination,
+    append_insemination,
     check_permission
 )
 
@@ -161,14 +161,8 @@ with tab1:
                     'observacao': observacoes
                 }
                 
-                # Add to DataFrame
-                if insemination_df.empty:
-                    insemination_df = pd.DataFrame([novo_registro])
-                else:
-                    insemination_df = pd.concat([insemination_df, pd.DataFrame([novo_registro])], ignore_index=True)
-                
-                # Save updated DataFrame
-                save_insemination(insemination_df)
+                # Append to CSV
+                append_insemination(novo_registro)
                 
                 # Update breeding cycle if exists
                 if not breeding_df.empty and selected_animal_id in breeding_df['id_animal'].values:
@@ -14,8 +14,8 @@ from utils import (
     load_animals,
     save_animals,
     load_breeding_cycles,
-    save_breeding_cycles
-,
+    save_breeding_cycles,
+    append_breeding_cycles,
     check_permission
 )
 
@@ -96,7 +96,7 @@ with tab1:
                     st.error("Selecione pelo menos duas fêmeas para formar um grupo de irmãs de cio.")
                 else:
                     grupo_id = str(uuid.uuid4())
-                    success_count = 0
+                    novos_ciclos = []
 
                     # Atualizar o ciclo reprodutivo de cada animal selecionado
                     for animal_id in selected_animals:
@@ -122,18 +122,12 @@ with tab1:
                             'observacao': f"Grupo de irmãs de cio: {nome_grupo if nome_grupo else grupo_id}. {observacoes}"
                         }
                         
-                        # Adicionar à DataFrame
-                        if breeding_df.empty:
-                            breeding_df = pd.DataFrame([novo_ciclo])
-                        else:
-                            breeding_df = pd.concat([breeding_df, pd.DataFrame([novo_ciclo])], ignore_index=True)
-                        
-                        success_count += 1
+                        novos_ciclos.append(novo_ciclo)
                     
-                    # Salvar DataFrame atualizado
-                    save_breeding_cycles(breeding_df)
+                    # Acrescentar os novos ciclos ao arquivo
+                    append_breeding_cycles(novos_ciclos)
                     
-                    st.success(f"Grupo de {success_count} irmãs de cio criado com sucesso!")
+                    st.success(f"Grupo de {len(novos_ciclos)} irmãs de cio criado com sucesso!")
                     st.rerun()
     else:
         st.warning("Não há fêmeas (matrizes ou leitoas) cadastradas no sistema. Cadastre matrizes primeiro.")
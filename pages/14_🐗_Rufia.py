@@ -17,9 +17,11 @@ from utils import (
     save_heat_records,
     calculate_heat_interval,
     predict_next_heat,
+    register_heat_record,
     generate_heat_report
 ,
-    check_permission
+    check_permission,
+    export_stream
 )
 
 st.set_page_config(
@@ -198,7 +200,7 @@ with tab2:
                             st.write(f"**Último cio:** {pd.to_datetime(last_heat['data_deteccao']).strftime('%d/%m/%Y')}")
                             
                             # Calcular próximo cio previsto
-                            prediction = predict_next_heat(selected_matriz, heat_records_df)
+                            prediction = predict_next_heat(selected_matriz)
                             if prediction:
                                 st.write(f"**Próximo cio previsto:** {prediction['predicted_next']} (Confiança: {prediction['confidence']})")
                         else:
@@ -278,14 +280,8 @@ with tab2:
                             'observacao': observacao
                         }
                         
-                        # Adicionar ao DataFrame
-                        if heat_records_df.empty:
-                            heat_records_df = pd.DataFrame([new_record])
-                        else:
-                            heat_records_df = pd.concat([heat_records_df, pd.DataFrame([new_record])], ignore_index=True)
-                        
-                        # Salvar dados
-                        save_heat_records(heat_records_df)
+                        # Salvar dados e atualizar as estatísticas de cio da matriz
+                        register_heat_record(new_record)
                         
                         st.success("Detecção de cio registrada com sucesso!")
                         st.rerun()
@@ -384,13 +380,13 @@ with tab3:
             
             # Exportar relatório
             if st.button("📥 Exportar Relatório"):
-                csv = display_df.to_csv(index=False)
-                st.download_button(
-                    "📥 Baixar CSV",
-                    data=csv,
-                    file_name=f"relatorio_rufia_{start_date}_{end_date}.csv",
-                    mime="text/csv"
-                )
+                with export_stream(display_df, 'csv') as csv:
+                    st.download_button(
+                        "📥 Baixar CSV",
+                        data=csv.read(),
+                        file_name=f"relatorio_rufia_{start_date}_{end_date}.csv",
+                        mime="text/csv"
+                    )
         else:
             st.info("Nenhum dado encontrado para o período selecionado.")
     else:
@@ -20,7 +20,8 @@ from utils import (
     save_caliber_scores,
     calculate_body_condition
 ,
-    check_permission
+    check_permission,
+    export_stream
 )
 
 st.set_page_config(
@@ -638,13 +639,13 @@ with tab3:
             # Exportar dados
             st.markdown("---")
             if st.button("📥 Exportar Dados"):
-                csv = filtered_df.to_csv(index=False)
-                st.download_button(
-                    "📥 Baixar CSV",
-                    data=csv,
-                    file_name="scores_calibre.csv",
-                    mime="text/csv"
-                )
+                with export_stream(filtered_df, 'csv') as csv:
+                    st.download_button(
+                        "📥 Baixar CSV",
+                        data=csv.read(),
+                        file_name="scores_calibre.csv",
+                        mime="text/csv"
+                    )
         else:
             st.info("Nenhum dado encontrado com os filtros selecionados.")
     else:
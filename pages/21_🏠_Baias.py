@@ -9,11 +9,16 @@ from utils import (
     save_pens, 
     load_pen_allocations, 
     save_pen_allocations,
-    get_pen_occupancy,
+    get_pen_occupancy_counts,
     get_available_pens,
+    alocar_animal_baia,
+    remover_animal_baia,
+    realocar_animal_baia,
     get_animal_details
 ,
-    check_permission
+    check_permission,
+    animal_labels,
+    pen_labels
 )
 
 # Page configuration
@@ -188,7 +193,7 @@ with tab2:
         with col2:
             # Filtrar baias disponíveis com base na categoria do animal, se possível
             animal_category = animal_details['categoria'] if animal_details is not None and 'categoria' in animal_details else None
-            available_pens = get_available_pens(pens_df, allocations_df, animal_category)
+            available_pens = get_available_pens(pens_df, animal_category=animal_category)
             
             if available_pens.empty:
                 st.error("Não há baias disponíveis para alocar este animal.")
@@ -208,29 +213,19 @@ with tab2:
                 
                 # Botão para alocar animal
                 if st.button("Alocar Animal") and not animal_allocated:
-                    # Criar novo registro de alocação
-                    nova_alocacao = {
-                        'id_alocacao': str(uuid.uuid4()),
-                        'id_baia': selected_pen,
-                        'id_animal': selected_animal,
-                        'data_entrada': data_entrada.strftime('%Y-%m-%d'),
-                        'data_saida': None,
-                        'motivo_saida': None,
-                        'status': 'Ativo',
-                        'observacao': observacao
-                    }
+                    # Registrar a nova alocação
+                    sucesso, mensagem = alocar_animal_baia(
+                        selected_animal,
+                        selected_pen,
+                        data_entrada.strftime('%Y-%m-%d'),
+                        observacao
+                    )
                     
-                    # Adicionar ao DataFrame
-                    if allocations_df.empty:
-                        allocations_df = pd.DataFrame([nova_alocacao])
+                    if sucesso:
+                        st.success(mensagem)
+                        st.rerun()
                     else:
-                        allocations_df = pd.concat([allocations_df, pd.DataFrame([nova_alocacao])], ignore_index=True)
-                    
-                    # Salvar DataFrame atualizado
-                    save_pen_allocations(allocations_df)
-                    
-                    st.success(f"Animal alocado com sucesso!")
-                    st.rerun()
+                        st.error(mensagem)
 
 with tab3:
     st.header("Realocar ou Remover Animal")
@@ -248,13 +243,9 @@ with tab3:
             display_allocations = active_allocations.copy()
             
             # Adicionar informações do animal e da baia
-            display_allocations['animal'] = display_allocations['id_animal'].apply(
-                lambda x: f"{animals_df[animals_df['id_animal'] == x]['identificacao'].iloc[0]}" if x in animals_df['id_animal'].values else "Desconhecido"
-            )
+            display_allocations['animal'] = animal_labels(display_allocations['id_animal'])
             
-            display_allocations['baia'] = display_allocations['id_baia'].apply(
-                lambda x: f"{pens_df[pens_df['id_baia'] == x]['identificacao'].iloc[0]}" if x in pens_df['id_baia'].values else "Desconhecida"
-            )
+            display_allocations['baia'] = pen_labels(display_allocations['id_baia'])
             
             # Selecionar alocação
             selected_allocation_id = st.selectbox(
@@ -283,17 +274,19 @@ with tab3:
                 observacao_saida = st.text_area("Observações sobre a Saída")
                 
                 if st.button("Remover Animal da Baia"):
-                    # Atualizar registro existente
-                    allocations_df.loc[allocations_df['id_alocacao'] == selected_allocation_id, 'data_saida'] = data_saida.strftime('%Y-%m-%d')
-                    allocations_df.loc[allocations_df['id_alocacao'] == selected_allocation_id, 'motivo_saida'] = motivo_saida
-                    allocations_df.loc[allocations_df['id_alocacao'] == selected_allocation_id, 'status'] = 'Inativo'
-                    allocations_df.loc[allocations_df['id_alocacao'] == selected_allocation_id, 'observacao'] = observacao_saida
-                    
-                    # Salvar DataFrame atualizado
-                    save_pen_allocations(allocations_df)
+                    # Encerrar a alocação
+                    sucesso, mensagem = remover_animal_baia(
+                        selected_allocation_id,
+                        data_saida.strftime('%Y-%m-%d'),
+                        motivo_saida,
+                        observacao_saida
+                    )
                     
-                    st.success(f"Animal removido da baia com sucesso!")
-                    st.rerun()
+                    if sucesso:
+                        st.success(mensagem)
+                        st.rerun()
+                    else:
+                        st.error(mensagem)
             
             with col2:
                 st.subheader("Realocar para Outra Baia")
@@ -303,7 +296,7 @@ with tab3:
                 animal_details = get_animal_details(animal_id, animals_df)
                 animal_category = animal_details['categoria'] if animal_details is not None and 'categoria' in animal_details else None
                 
-                available_pens = get_available_pens(pens_df, allocations_df, animal_category)
+                available_pens = get_available_pens(pens_df, animal_category=animal_category)
                 
                 if available_pens.empty:
                     st.error("Não há baias disponíveis para realocar este animal.")
@@ -322,32 +315,19 @@ with tab3:
                     observacao_realocacao = st.text_area("Observações sobre a Realocação")
                     
                     if st.button("Realocar Animal"):
-                        # 1. Marcar a alocação atual como encerrada
-                        allocations_df.loc[allocations_df['id_alocacao'] == selected_allocation_id, 'data_saida'] = data_realocacao.strftime('%Y-%m-%d')
-                        allocations_df.loc[allocations_df['id_alocacao'] == selected_allocation_id, 'motivo_saida'] = "Transferência"
-                        allocations_df.loc[allocations_df['id_alocacao'] == selected_allocation_id, 'status'] = 'Inativo'
-                        allocations_df.loc[allocations_df['id_alocacao'] == selected_allocation_id, 'observacao'] = f"Realocado para outra baia. {observacao_realocacao}"
-                        
-                        # 2. Criar nova alocação
-                        nova_alocacao = {
-                            'id_alocacao': str(uuid.uuid4()),
-                            'id_baia': new_pen,
-                            'id_animal': animal_id,
-                            'data_entrada': data_realocacao.strftime('%Y-%m-%d'),
-                            'data_saida': None,
-                            'motivo_saida': None,
-                            'status': 'Ativo',
-                            'observacao': f"Realocado de outra baia. {observacao_realocacao}"
-                        }
-                        
-                        # Adicionar ao DataFrame
-                        allocations_df = pd.concat([allocations_df, pd.DataFrame([nova_alocacao])], ignore_index=True)
-                        
-                        # Salvar DataFrame atualizado
-                        save_pen_allocations(allocations_df)
+                        # Encerrar a alocação atual e criar a nova
+                        sucesso, mensagem = realocar_animal_baia(
+                            selected_allocation_id,
+                            new_pen,
+                            data_realocacao.strftime('%Y-%m-%d'),
+                            observacao_realocacao
+                        )
                         
-                        st.success(f"Animal realocado com sucesso!")
-                        st.rerun()
+                        if sucesso:
+                            st.success(mensagem)
+                            st.rerun()
+                        else:
+                            st.error(mensagem)
 
 with tab4:
     st.header("Visualizar Ocupação das Baias")
@@ -357,9 +337,9 @@ with tab4:
     else:
         # Preparar dados de ocupação
         pens_occupancy = pens_df.copy()
-        pens_occupancy['ocupacao_atual'] = pens_occupancy['id_baia'].apply(
-            lambda x: get_pen_occupancy(x, allocations_df)
-        )
+        pens_occupancy['ocupacao_atual'] = pens_occupancy['id_baia'].map(
+            get_pen_occupancy_counts()
+        ).fillna(0).astype(int)
         pens_occupancy['vagas_disponiveis'] = pens_occupancy['capacidade'] - pens_occupancy['ocupacao_atual']
         pens_occupancy['percentual_ocupacao'] = (pens_occupancy['ocupacao_atual'] / pens_occupancy['capacidade'] * 100).round(1)
         
@@ -458,12 +438,8 @@ with tab4:
             if not pen_animals.empty:
                 # Adicionar informações do animal
                 pen_animals['animal_id'] = pen_animals['id_animal']
-                pen_animals['identificacao'] = pen_animals['animal_id'].apply(
-                    lambda x: animals_df[animals_df['id_animal'] == x]['identificacao'].iloc[0] if x in animals_df['id_animal'].values else "Desconhecido"
-                )
-                pen_animals['categoria'] = pen_animals['animal_id'].apply(
-                    lambda x: animals_df[animals_df['id_animal'] == x]['categoria'].iloc[0] if x in animals_df['id_animal'].values else "Desconhecida" 
-                )
+                pen_animals['identificacao'] = animal_labels(pen_animals['animal_id'])
+                pen_animals['categoria'] = animal_labels(pen_animals['animal_id'], 'categoria', "Desconhecida")
                 
                 st.dataframe(
                     pen_animals[[
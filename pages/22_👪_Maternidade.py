@@ -17,9 +17,13 @@ from utils import (
     load_pen_allocations,
     save_pen_allocations,
     check_litter_exists,
-    get_active_maternity_sows
+    get_litter_kpis,
+    get_active_maternity_sows,
+    is_sow_in_maternity,
+    registrar_entrada_maternidade
 ,
-    check_permission
+    check_permission,
+    animal_labels
 )
 
 # Configuração da página
@@ -85,13 +89,9 @@ with tab1:
             )
             
             # Verificar se a matriz já está na maternidade
-            matriz_na_maternidade = False
-            if not maternity_df.empty and selected_animal in maternity_df['id_animal'].values:
-                entradas_ativas = maternity_df[(maternity_df['id_animal'] == selected_animal) & 
-                                              (maternity_df['data_saida'].isna())]
-                if not entradas_ativas.empty:
-                    matriz_na_maternidade = True
-                    st.warning("Esta matriz já está na maternidade. Para registrar um parto, use a aba 'Registro de Parto'.")
+            matriz_na_maternidade = is_sow_in_maternity(selected_animal)
+            if matriz_na_maternidade:
+                st.warning("Esta matriz já está na maternidade. Para registrar um parto, use a aba 'Registro de Parto'.")
             
             # Data de entrada
             data_entrada = st.date_input(
@@ -125,25 +125,9 @@ with tab1:
                     # Botão para registrar entrada
                     if st.button("Registrar Entrada na Maternidade") and not matriz_na_maternidade:
                         # Criar registro de maternidade
-                        novo_registro = {
-                            'id_maternidade': str(uuid.uuid4()),
-                            'id_animal': selected_animal,
-                            'id_baia': selected_pen,
-                            'data_entrada': data_entrada.strftime('%Y-%m-%d'),
-                            'data_parto': None,
-                            'data_saida': None,
-                            'status': 'Ativa',
-                            'observacao': observacao
-                        }
-                        
-                        # Adicionar ao DataFrame
-                        if maternity_df.empty:
-                            maternity_df = pd.DataFrame([novo_registro])
-                        else:
-                            maternity_df = pd.concat([maternity_df, pd.DataFrame([novo_registro])], ignore_index=True)
-                        
-                        # Salvar DataFrame atualizado
-                        save_maternity(maternity_df)
+                        registrar_entrada_maternidade(
+                            selected_animal, selected_pen, data_entrada.strftime('%Y-%m-%d'), observacao
+                        )
                         
                         # Atualizar categoria da matriz para "Matriz Lactante"
                         animals_df.loc[animals_df['id_animal'] == selected_animal, 'categoria'] = 'Matriz Lactante'
@@ -181,7 +165,7 @@ with tab2:
     st.header("Registro de Parto")
     
     # Obter matrizes ativas na maternidade
-    active_sows = get_active_maternity_sows(maternity_df, animals_df)
+    active_sows = get_active_maternity_sows(animals_df=animals_df)
     
     if active_sows.empty:
         st.warning("Não há matrizes na maternidade. Registre uma entrada na aba 'Entrada na Maternidade'.")
@@ -311,10 +295,7 @@ with tab3:
         
         # Adicionar informação da matriz em cada leitegada para exibição
         if not animals_df.empty:
-            sorted_litters['matriz'] = sorted_litters['id_animal'].apply(
-                lambda x: animals_df[animals_df['id_animal'] == x]['identificacao'].iloc[0] 
-                if x in animals_df['id_animal'].values else "Desconhecida"
-            )
+            sorted_litters['matriz'] = animal_labels(sorted_litters['id_animal'], default="Desconhecida")
         
         with subtab1:
             st.subheader("Cadastro Individual de Leitão")
@@ -865,10 +846,7 @@ with tab4:
             
             # Adicionar identificação da matriz
             if not animals_df.empty and 'id_animal' in litters_df.columns:
-                litter_sizes['matriz'] = litters_df['id_animal'].apply(
-                    lambda x: animals_df[animals_df['id_animal'] == x]['identificacao'].iloc[0] 
-                    if x in animals_df['id_animal'].values else "Desconhecida"
-                )
+                litter_sizes['matriz'] = animal_labels(litters_df['id_animal'], default="Desconhecida")
                 
                 fig = px.bar(
                     litter_sizes,
@@ -915,10 +893,7 @@ with tab4:
             
             # Adicionar identificação da matriz
             if not animals_df.empty:
-                timeline_df['matriz'] = timeline_df['id_animal'].apply(
-                    lambda x: animals_df[animals_df['id_animal'] == x]['identificacao'].iloc[0] 
-                    if x in animals_df['id_animal'].values else "Desconhecida"
-                )
+                timeline_df['matriz'] = animal_labels(timeline_df['id_animal'], default="Desconhecida")
             else:
                 timeline_df['matriz'] = "Desconhecida"
             
@@ -958,16 +933,12 @@ with tab4:
             
             # Adicionar informações da matriz
             if not animals_df.empty:
-                display_litters['matriz'] = display_litters['id_animal'].apply(
-                    lambda x: animals_df[animals_df['id_animal'] == x]['identificacao'].iloc[0]
-                    if x in animals_df['id_animal'].values else "Desconhecida"
-                )
+                display_litters['matriz'] = animal_labels(display_litters['id_animal'], default="Desconhecida")
             
             # Adicionar contagem de leitões vivos atualmente
-            display_litters['leitoes_vivos_atuais'] = display_litters['id_leitegada'].apply(
-                lambda x: len(piglets_df[(piglets_df['id_leitegada'] == x) & (piglets_df['status_atual'] == 'Vivo')])
-                if not piglets_df.empty else 0
-            )
+            display_litters['leitoes_vivos_atuais'] = display_litters['id_leitegada'].map(
+                get_litter_kpis()['leitoes_vivos']
+            ).fillna(0).astype(int)
             
             # Calcular idade da leitegada em dias
             display_litters['data_parto_dt'] = pd.to_datetime(display_litters['data_parto'])
@@ -18,9 +18,13 @@ from utils import (
     load_pen_allocations,
     save_pen_allocations,
     calculate_weaning_metrics,
+    get_litter_kpis,
+    registrar_saida_maternidade,
     get_available_pens
 ,
-    check_permission
+    check_permission,
+    animal_labels,
+    export_stream
 )
 
 # Configuração da página
@@ -71,15 +75,17 @@ with tab1:
     # Obter leitegadas ativas (com leitões vivos e sem desmame registrado)
     leitegadas_ativas = []
     
+    # Leitões vivos por leitegada, do índice de indicadores das leitegadas
+    vivos_por_leitegada = get_litter_kpis()['leitoes_vivos']
+    
     if not litters_df.empty and not piglets_df.empty:
         # Verificar quais leitegadas têm leitões vivos
         for _, litter in litters_df.iterrows():
             litter_id = litter['id_leitegada']
             
             # Contar leitões vivos nesta leitegada
-            if litter_id in piglets_df['id_leitegada'].values:
-                vivos = len(piglets_df[(piglets_df['id_leitegada'] == litter_id) & 
-                                       (piglets_df['status_atual'] == 'Vivo')])
+            if litter_id in vivos_por_leitegada.index:
+                vivos = int(vivos_por_leitegada[litter_id])
                 
                 # Verificar se já existe desmame para esta leitegada
                 desmame_existente = False
@@ -103,8 +109,7 @@ with tab1:
                 matriz_info = animals_df[animals_df['id_animal'] == matriz_id]['identificacao'].iloc[0]
             
             # Contar leitões vivos
-            vivos = len(piglets_df[(piglets_df['id_leitegada'] == litter_id) & 
-                                  (piglets_df['status_atual'] == 'Vivo')])
+            vivos = int(vivos_por_leitegada.get(litter_id, 0))
             
             # Calcular idade da leitegada
             data_parto = pd.to_datetime(litter_data['data_parto']).date()
@@ -293,17 +298,12 @@ with tab1:
                 maternity_id = litter_data['id_maternidade'] if 'id_maternidade' in litter_data else None
                 
                 if maternity_id and maternity_id in maternity_df['id_maternidade'].values:
-                    # Marcar como finalizada
-                    maternity_df.loc[maternity_df['id_maternidade'] == maternity_id, 'data_saida'] = data_desmame.strftime('%Y-%m-%d')
-                    maternity_df.loc[maternity_df['id_maternidade'] == maternity_id, 'status'] = 'Finalizada'
-                    
-                    # Atualizar observação
-                    current_obs = maternity_df.loc[maternity_df['id_maternidade'] == maternity_id, 'observacao'].iloc[0]
-                    new_obs = f"{current_obs}\nSaída por desmame em {data_desmame.strftime('%d/%m/%Y')}" if current_obs else f"Saída por desmame em {data_desmame.strftime('%d/%m/%Y')}"
-                    maternity_df.loc[maternity_df['id_maternidade'] == maternity_id, 'observacao'] = new_obs
-                    
-                    # Salvar DataFrame atualizado
-                    save_maternity(maternity_df)
+                    # Marcar como finalizada, acrescentando a observação
+                    registrar_saida_maternidade(
+                        maternity_id,
+                        data_desmame.strftime('%Y-%m-%d'),
+                        f"Saída por desmame em {data_desmame.strftime('%d/%m/%Y')}"
+                    )
                     
                     # 4. Atualizar categoria da matriz
                     matriz_id = litter_data['id_animal']
@@ -368,10 +368,7 @@ with tab2:
         
         # Adicionar informação da matriz
         if not animals_df.empty:
-            display_weaning['matriz'] = display_weaning['id_animal_mae'].apply(
-                lambda x: animals_df[animals_df['id_animal'] == x]['identificacao'].iloc[0] 
-                if x in animals_df['id_animal'].values else "Desconhecida"
-            )
+            display_weaning['matriz'] = animal_labels(display_weaning['id_animal_mae'], default="Desconhecida")
         else:
             display_weaning['matriz'] = "Desconhecida"
         
@@ -470,10 +467,10 @@ with tab2:
         
         # Exportar dados
         if st.button("Exportar Dados de Desmame (CSV)"):
-            csv = display_weaning.to_csv(index=False)
-            st.download_button(
-                label="Baixar CSV",
-                data=csv,
-                file_name=f"desmames_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv"
-            )
\ No newline at end of file
+            with export_stream(display_weaning, 'csv') as csv:
+                st.download_button(
+                    label="Baixar CSV",
+                    data=csv.read(),
+                    file_name=f"desmames_{datetime.now().strftime('%Y%m%d')}.csv",
+                    mime="text/csv"
+                )
\ No newline at end of file
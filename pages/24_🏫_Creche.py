@@ -19,9 +19,12 @@ from utils import (
     get_active_nursery_batches,
     calculate_nursery_metrics,
     get_batch_details,
+    build_nursery_growth_curves,
+    get_nursery_batch_metrics,
     get_available_pens
 ,
-    check_permission
+    check_permission,
+    export_stream
 )
 
 # Configuração da página
@@ -103,16 +106,17 @@ with tab1:
         # Listar lotes com detalhes
         st.subheader("Lotes Ativos")
         
+        # Métricas de todos os lotes ativos e movimentações agrupadas por lote, calculadas uma vez
+        metricas_lotes = get_nursery_batch_metrics()
+        movimentacoes_por_lote = dict(tuple(nursery_movements_df.groupby('id_lote', sort=False))) if not nursery_movements_df.empty else {}
+        
         for _, lote in lotes_ativos.iterrows():
             lote_id = lote['id_lote']
+            lote_movimentacoes = movimentacoes_por_lote.get(lote_id, nursery_movements_df.iloc[:0])
             
             with st.expander(f"Lote: {lote['identificacao']} - {lote['quantidade_atual']} leitões"):
-                # Calcular dias na creche
-                if pd.notna(lote['data_entrada']):
-                    data_entrada = pd.to_datetime(lote['data_entrada']).date()
-                    dias_creche = (datetime.now().date() - data_entrada).days
-                else:
-                    dias_creche = 0
+                # Dias na creche
+                dias_creche = int(metricas_lotes['dias_na_creche'].get(lote_id, 0))
                 
                 col1, col2, col3 = st.columns(3)
                 
@@ -130,7 +134,7 @@ with tab1:
                 
                 # Exibir histórico de eventos
                 if not nursery_movements_df.empty:
-                    lote_events = nursery_movements_df[nursery_movements_df['id_lote'] == lote_id].sort_values('data', ascending=False)
+                    lote_events = lote_movimentacoes.sort_values('data', ascending=False)
                     
                     if not lote_events.empty:
                         st.subheader("Histórico de Eventos")
@@ -156,8 +160,7 @@ with tab1:
                         
                 # Visualização gráfica de evolução de peso
                 if not nursery_movements_df.empty:
-                    peso_events = nursery_movements_df[(nursery_movements_df['id_lote'] == lote_id) & 
-                                                      (nursery_movements_df['tipo'] == 'Pesagem')].sort_values('data')
+                    peso_events = lote_movimentacoes[lote_movimentacoes['tipo'] == 'Pesagem'].sort_values('data')
                     
                     if not peso_events.empty and len(peso_events) > 1:
                         st.subheader("Evolução de Peso")
@@ -1391,64 +1394,11 @@ with tab4:
                 if 'status' in filtered_df.columns and len(filtered_df[filtered_df['status'] == 'Finalizado']) > 0:
                     lotes_finalizados = filtered_df[filtered_df['status'] == 'Finalizado'].copy()
                     
-                    # Adicionar dados de pesagens e eventos importantes
-                    pesagens_data = []
+                    # Curvas de crescimento (entrada, pesagens e saída) de todos os lotes filtrados
+                    curvas_df = build_nursery_growth_curves(filtered_df, nursery_movements_df)
+                    pesagens_df = curvas_df[curvas_df['id_lote'].isin(lotes_finalizados['id_lote'])]
                     
-                    for _, lote in lotes_finalizados.iterrows():
-                        lote_id = lote['id_lote']
-                        
-                        # Obter movimentações de pesagem
-                        lote_pesagens = nursery_movements_df[(nursery_movements_df['id_lote'] == lote_id) & 
-                                                             (nursery_movements_df['tipo'] == 'Pesagem')].copy()
-                        
-                        # Adicionar pesagem inicial
-                        entrada_data = {
-                            'id_lote': lote_id,
-                            'identificacao': lote['identificacao'],
-                            'tipo': 'Entrada',
-                            'data': lote['data_entrada'],
-                            'peso_medio': lote['peso_medio_entrada'],
-                            'idade': lote['idade_media_entrada']
-                        }
-                        pesagens_data.append(entrada_data)
-                        
-                        # Adicionar pesagens intermediárias
-                        for _, pesagem in lote_pesagens.iterrows():
-                            dias_creche = (pd.to_datetime(pesagem['data']) - pd.to_datetime(lote['data_entrada'])).days
-                            idade = lote['idade_media_entrada'] + dias_creche
-                            
-                            pesagem_data = {
-                                'id_lote': lote_id,
-                                'identificacao': lote['identificacao'],
-                                'tipo': 'Pesagem',
-                                'data': pesagem['data'],
-                                'peso_medio': pesagem['peso_medio'],
-                                'idade': idade
-                            }
-                            pesagens_data.append(pesagem_data)
-                        
-                        # Adicionar pesagem de saída se houver
-                        if pd.notna(lote['data_saida']):
-                            saida_pesagens = nursery_movements_df[(nursery_movements_df['id_lote'] == lote_id) & 
-                                                                 (nursery_movements_df['tipo'].isin(['Saída', 'Transferência']))]
-                            
-                            if not saida_pesagens.empty:
-                                ultima_saida = saida_pesagens.iloc[0]
-                                dias_creche = (pd.to_datetime(ultima_saida['data']) - pd.to_datetime(lote['data_entrada'])).days
-                                idade = lote['idade_media_entrada'] + dias_creche
-                                
-                                saida_data = {
-                                    'id_lote': lote_id,
-                                    'identificacao': lote['identificacao'],
-                                    'tipo': 'Saída',
-                                    'data': ultima_saida['data'],
-                                    'peso_medio': ultima_saida['peso_medio'],
-                                    'idade': idade
-                                }
-                                pesagens_data.append(saida_data)
-                    
-                    if pesagens_data:
-                        pesagens_df = pd.DataFrame(pesagens_data)
+                    if not pesagens_df.empty:
                         
                         col1, col2 = st.columns(2)
                         
@@ -1496,28 +1446,9 @@ with tab4:
                         st.subheader("Análise de Ganho Médio Diário")
                         
                         # Obter dados de GMD
-                        ganhos_data = []
+                        ganhos_df = curvas_df[(curvas_df['tipo'] == 'Pesagem') & curvas_df['ganho_diario'].notna()]
                         
-                        for lote_id in filtered_df['id_lote']:
-                            ganho_pesagens = nursery_movements_df[(nursery_movements_df['id_lote'] == lote_id) & 
-                                                                (nursery_movements_df['tipo'] == 'Pesagem') &
-                                                                (~nursery_movements_df['ganho_diario'].isna())]
-                            
-                            if not ganho_pesagens.empty:
-                                lote_info = filtered_df[filtered_df['id_lote'] == lote_id].iloc[0]
-                                
-                                for _, pesagem in ganho_pesagens.iterrows():
-                                    ganho_data = {
-                                        'id_lote': lote_id,
-                                        'identificacao': lote_info['identificacao'],
-                                        'data': pesagem['data'],
-                                        'ganho_diario': pesagem['ganho_diario']
-                                    }
-                                    ganhos_data.append(ganho_data)
-                        
-                        if ganhos_data:
-                            ganhos_df = pd.DataFrame(ganhos_data)
-                            ganhos_df['data'] = pd.to_datetime(ganhos_df['data'])
+                        if not ganhos_df.empty:
                             
                             fig = px.box(
                                 ganhos_df,
@@ -1566,12 +1497,12 @@ with tab4:
             
             # Botão para exportar dados
             if st.button("Exportar Dados para CSV"):
-                csv = filtered_df.to_csv(index=False)
-                st.download_button(
-                    label="Baixar Relatório",
-                    data=csv,
-                    file_name=f"relatorio_creche_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv"
-                )
+                with export_stream(filtered_df, 'csv') as csv:
+                    st.download_button(
+                        label="Baixar Relatório",
+                        data=csv.read(),
+                        file_name=f"relatorio_creche_{datetime.now().strftime('%Y%m%d')}.csv",
+                        mime="text/csv"
+                    )
     else:
         st.info("Não há dados de lotes de creche disponíveis. Utilize a aba 'Novo Lote' para criar lotes.")
\ No newline at end of file
@@ -17,7 +17,8 @@ from utils import (
     get_discarded_gilts,
     calculate_gilts_statistics
 ,
-    check_permission
+    check_permission,
+    export_stream
 )
 
 # Configuração da página
@@ -1004,10 +1005,10 @@ with tab4:
             
             # Exportar dados
             if st.button("Exportar Dados de Descarte (CSV)"):
-                csv = display_discard.to_csv(index=False)
-                st.download_button(
-                    label="Baixar CSV",
-                    data=csv,
-                    file_name=f"descartes_leitoas_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv"
-                )
\ No newline at end of file
+                with export_stream(display_discard, 'csv') as csv:
+                    st.download_button(
+                        label="Baixar CSV",
+                        data=csv.read(),
+                        file_name=f"descartes_leitoas_{datetime.now().strftime('%Y%m%d')}.csv",
+                        mime="text/csv"
+                    )
\ No newline at end of file
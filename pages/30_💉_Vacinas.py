@@ -13,9 +13,11 @@ from utils import (
     load_animals,
     load_vaccination_records,
     save_vaccination_records,
-    calculate_age
+    calculate_age,
+    get_vaccinations_due
 ,
-    check_permission
+    check_permission,
+    export_stream
 )
 
 st.set_page_config(
@@ -271,13 +273,13 @@ with tab2:
             
             # Exportar dados
             if st.button("Exportar Dados"):
-                csv = filtered_df.to_csv(index=False)
-                st.download_button(
-                    "Baixar CSV",
-                    data=csv,
-                    file_name="historico_vacinacao.csv",
-                    mime="text/csv"
-                )
+                with export_stream(filtered_df, 'csv') as csv:
+                    st.download_button(
+                        "Baixar CSV",
+                        data=csv.read(),
+                        file_name="historico_vacinacao.csv",
+                        mime="text/csv"
+                    )
         else:
             st.info("Nenhum dado encontrado com os filtros selecionados.")
     else:
@@ -286,73 +288,59 @@ with tab2:
 with tab3:
     st.header("Próximas Vacinas")
     
-    if not vaccination_df.empty:
-        # Filtrar vacinas futuras
-        today = datetime.now().date()
-        merged_df = pd.merge(vaccination_df, animals_df, on='id_animal')
-        future_vaccines = merged_df[pd.to_datetime(merged_df['proxima_dose']).dt.date >= today].copy()
+    # Agenda de todo o rebanho: protocolos da categoria e próximas doses registradas
+    horizonte = st.radio(
+        "Horizonte",
+        options=[7, 30, 90],
+        index=1,
+        format_func=lambda x: f"Próximos {x} dias",
+        horizontal=True
+    )
+    agenda_df = get_vaccinations_due(horizonte)
+    
+    if not agenda_df.empty:
+        # Preparar dados para exibição
+        display_df = agenda_df[[
+            'identificacao', 'categoria', 'vacina',
+            'dose', 'data_prevista', 'dias_restantes', 'origem'
+        ]].copy()
         
-        if not future_vaccines.empty:
-            # Ordenar por data
-            future_vaccines = future_vaccines.sort_values('proxima_dose')
-            
-            # Calcular dias restantes
-            future_vaccines['dias_restantes'] = (pd.to_datetime(future_vaccines['proxima_dose']).dt.date - today).dt.days
-            
-            # Preparar dados para exibição
-            display_df = future_vaccines[[
-                'identificacao', 'categoria', 'nome_vacina',
-                'dose', 'proxima_dose', 'dias_restantes'
-            ]].copy()
-            
-            display_df['proxima_dose'] = pd.to_datetime(display_df['proxima_dose']).dt.strftime('%d/%m/%Y')
-            
-            display_df.columns = [
-                'Identificação', 'Categoria', 'Vacina',
-                'Próxima Dose', 'Data Prevista', 'Dias Restantes'
-            ]
-            
-            # Agrupar por período
-            st.subheader("Próximos 7 dias")
-            proxima_semana = display_df[display_df['Dias Restantes'] <= 7]
-            if not proxima_semana.empty:
-                st.dataframe(proxima_semana, hide_index=True, use_container_width=True)
-            else:
-                st.info("Não há vacinas previstas para os próximos 7 dias.")
-            
-            st.subheader("Próximos 30 dias")
-            proximo_mes = display_df[(display_df['Dias Restantes'] > 7) & (display_df['Dias Restantes'] <= 30)]
-            if not proximo_mes.empty:
-                st.dataframe(proximo_mes, hide_index=True, use_container_width=True)
-            else:
-                st.info("Não há vacinas previstas para os próximos 30 dias.")
-            
-            st.subheader("Após 30 dias")
-            futuro = display_df[display_df['Dias Restantes'] > 30]
-            if not futuro.empty:
-                st.dataframe(futuro, hide_index=True, use_container_width=True)
-            else:
-                st.info("Não há vacinas previstas para após 30 dias.")
-            
-            # Calendário visual
-            st.subheader("Calendário de Vacinação")
-            
-            # Agrupar por data
-            vaccines_by_date = future_vaccines.groupby('proxima_dose').size().reset_index(name='count')
-            vaccines_by_date['proxima_dose'] = pd.to_datetime(vaccines_by_date['proxima_dose'])
-            
+        display_df['data_prevista'] = display_df['data_prevista'].dt.strftime('%d/%m/%Y')
+        
+        display_df.columns = [
+            'Identificação', 'Categoria', 'Vacina',
+            'Dose', 'Data Prevista', 'Dias Restantes', 'Origem'
+        ]
+        
+        atrasadas = display_df[display_df['Dias Restantes'] < 0]
+        if not atrasadas.empty:
+            st.subheader("Atrasadas")
+            st.dataframe(atrasadas, hide_index=True, use_container_width=True)
+        
+        st.subheader(f"Próximos {horizonte} dias")
+        previstas = display_df[display_df['Dias Restantes'] >= 0]
+        if not previstas.empty:
+            st.dataframe(previstas, hide_index=True, use_container_width=True)
+        else:
+            st.info(f"Não há vacinas previstas para os próximos {horizonte} dias.")
+        
+        # Calendário visual
+        st.subheader("Calendário de Vacinação")
+        
+        # Agrupar por data
+        vaccines_by_date = agenda_df[agenda_df['dias_restantes'] >= 0].groupby('data_prevista').size().reset_index(name='count')
+        
+        if not vaccines_by_date.empty:
             fig = px.bar(
                 vaccines_by_date,
-                x='proxima_dose',
+                x='data_prevista',
                 y='count',
                 title='Distribuição de Vacinas Futuras',
                 labels={
-                    'proxima_dose': 'Data',
+                    'data_prevista': 'Data',
                     'count': 'Quantidade de Vacinas'
                 }
             )
             st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("Não há vacinas programadas para o futuro.")
     else:
-        st.info("Não há registros de vacinação no sistema.")
+        st.info(f"Não há vacinas previstas para os próximos {horizonte} dias.")
@@ -17,7 +17,8 @@ from utils import (
     generate_mortality_report,
     calculate_age
 ,
-    check_permission
+    check_permission,
+    export_stream
 )
 
 st.set_page_config(
@@ -409,13 +410,13 @@ with tab3:
             
             # Exportar relatório
             if st.button("📥 Exportar Relatório"):
-                csv = display_df.to_csv(index=False)
-                st.download_button(
-                    "📥 Baixar CSV",
-                    data=csv,
-                    file_name=f"relatorio_mortalidade_{report_start}_{report_end}.csv",
-                    mime="text/csv"
-                )
+                with export_stream(display_df, 'csv') as csv:
+                    st.download_button(
+                        "📥 Baixar CSV",
+                        data=csv.read(),
+                        file_name=f"relatorio_mortalidade_{report_start}_{report_end}.csv",
+                        mime="text/csv"
+                    )
         else:
             st.info("Nenhum dado encontrado para o período selecionado.")
     else:
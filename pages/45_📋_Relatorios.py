@@ -7,7 +7,6 @@ import sys
 import plotly.express as px
 import plotly.graph_objects as go
 import matplotlib.pyplot as plt
-import base64
 from io import BytesIO
 
 # Add the parent directory to sys.path
@@ -18,9 +17,13 @@ from utils import (
     load_breeding_cycles, 
     load_gestation, 
     load_weight_records,
-    export_data
+    export_stream,
+    export_file_info,
+    available_export_formats
 ,
-    check_permission
+    check_permission,
+    animal_labels,
+    analyze_cycle_regularity
 )
 
 st.set_page_config(
@@ -148,9 +151,7 @@ with tab1:
         if not weight_df.empty:
             # Add animal identification
             display_weight = weight_df.copy()
-            display_weight['identificacao'] = display_weight['id_animal'].apply(
-                lambda x: animals_df[animals_df['id_animal'] == x]['identificacao'].iloc[0] if x in animals_df['id_animal'].values else "Desconhecido"
-            )
+            display_weight['identificacao'] = animal_labels(display_weight['id_animal'])
             
             # Sort and display
             display_weight = display_weight.sort_values('data_registro', ascending=False).head(5)
@@ -173,9 +174,7 @@ with tab1:
         if not breeding_df.empty:
             # Add animal identification
             display_breeding = breeding_df.copy()
-            display_breeding['identificacao'] = display_breeding['id_animal'].apply(
-                lambda x: animals_df[animals_df['id_animal'] == x]['identificacao'].iloc[0] if x in animals_df['id_animal'].values else "Desconhecido"
-            )
+            display_breeding['identificacao'] = animal_labels(display_breeding['id_animal'])
             
             # Sort and display
             display_breeding = display_breeding.sort_values('ultima_data', ascending=False).head(5)
@@ -221,46 +220,10 @@ with tab2:
         # Heat cycle regularity analysis
         st.subheader("Análise de Regularidade de Cios")
         
-        # Group by animal
-        animal_cycles = {}
-        
-        for _, row in breeding_df.iterrows():
-            animal_id = row['id_animal']
-            date = pd.to_datetime(row['ultima_data'])
-            
-            if animal_id not in animal_cycles:
-                animal_cycles[animal_id] = []
-            
-            animal_cycles[animal_id].append(date)
-        
-        # Calculate intervals for animals with multiple cycles
-        intervals_data = []
-        
-        for animal_id, dates in animal_cycles.items():
-            if len(dates) >= 2:
-                # Sort dates
-                dates.sort()
-                
-                # Calculate intervals
-                intervals = [(dates[i+1] - dates[i]).days for i in range(len(dates)-1)]
-                
-                # Get animal info
-                animal_info = animals_df[animals_df['id_animal'] == animal_id].iloc[0]
-                
-                intervals_data.append({
-                    'id_animal': animal_id,
-                    'identificacao': animal_info['identificacao'],
-                    'nome': animal_info.get('nome', ''),
-                    'num_ciclos': len(dates),
-                    'intervalo_medio': sum(intervals) / len(intervals),
-                    'intervalo_min': min(intervals),
-                    'intervalo_max': max(intervals),
-                    'regularidade': np.std(intervals) if len(intervals) > 1 else 0
-                })
+        # Intervalos entre ciclos por animal
+        intervals_df = analyze_cycle_regularity(breeding_df, animals_df, date_column='ultima_data')
         
-        if intervals_data:
-            intervals_df = pd.DataFrame(intervals_data)
-            
+        if not intervals_df.empty:
             # Display intervals data
             st.dataframe(
                 intervals_df[[
@@ -935,9 +898,11 @@ with tab6:
         options=["Animais", "Ciclos Reprodutivos", "Gestações", "Registros de Peso"]
     )
     
+    format_labels = {"csv": "CSV", "excel": "Excel", "json": "JSON"}
     export_format = st.selectbox(
         "Formato de Exportação",
-        options=["CSV", "Excel", "JSON"]
+        options=available_export_formats(),
+        format_func=lambda fmt: format_labels[fmt]
     )
     
     # Get data to export
@@ -964,17 +929,14 @@ with tab6:
         
         # Export button
         if st.button("Exportar Dados"):
-            format_map = {"CSV": "csv", "Excel": "excel", "JSON": "json"}
-            format_type = format_map[export_format].lower()
-            
-            exported_data = export_data(data_to_export, format_type)
-            
-            file_extension = "csv" if format_type in ["csv", "excel"] else "json"
-            
-            # Create download link
-            b64 = base64.b64encode(exported_data.encode()).decode()
-            href = f'<a href="data:file/{file_extension};base64,{b64}" download="{filename}.{file_extension}">Clique aqui para baixar o arquivo</a>'
-            st.markdown(href, unsafe_allow_html=True)
+            file_name, mime = export_file_info(filename, export_format)
+            with export_stream(data_to_export, export_format) as exported:
+                st.download_button(
+                    "📥 Baixar Arquivo",
+                    data=exported.read(),
+                    file_name=file_name,
+                    mime=mime
+                )
             
             st.success(f"Dados exportados com sucesso!")
     else:
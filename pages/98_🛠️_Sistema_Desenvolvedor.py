@@ -15,7 +15,7 @@ import shutil
 
 # Adicionar diretório raiz ao path para importar utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils import check_developer_access, check_permission, load_employees, save_employees, load_permissions_map, save_permissions_map
+from utils import check_developer_access, check_permission, load_employees, save_employees, load_permissions_map, save_permissions_map, create_backup, list_backups, restore_backup, export_backup, invalidate_table_cache
 
 # Configuração da página
 st.set_page_config(
@@ -353,51 +353,74 @@ with tab3:
         
         # Seção de backup
         with st.expander("Criar Backup", expanded=True):
-            st.write("Crie um backup completo dos dados do sistema:")
+            st.write("Crie um backup dos dados do sistema. Só as partes dos arquivos que mudaram desde o último backup são armazenadas.")
+            
+            backup_description = st.text_input("Descrição (opcional)", key="backup_description")
             
             if st.button("Iniciar Backup", key="btn_backup"):
-                # Criar diretório de backup se não existir
-                backup_dir = "backups"
-                if not os.path.exists(backup_dir):
-                    os.makedirs(backup_dir)
-                
-                # Nome do arquivo de backup com data e hora atual
-                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                backup_file = f"{backup_dir}/backup_{timestamp}.zip"
-                
-                # Criar backup
-                import zipfile
-                
                 try:
-                    with zipfile.ZipFile(backup_file, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                        # Adicionar diretório de dados
-                        if os.path.exists("data"):
-                            for root, _, files in os.walk("data"):
-                                for file in files:
-                                    file_path = os.path.join(root, file)
-                                    zipf.write(file_path, os.path.relpath(file_path, ""))
-                    
-                    # Sucesso!
-                    st.success(f"Backup criado com sucesso em {backup_file}")
-                    
-                    # Opção para download
-                    with open(backup_file, "rb") as f:
-                        data = f.read()
-                    
-                    b64 = base64.b64encode(data).decode()
-                    href = f'<a href="data:application/zip;base64,{b64}" download="{os.path.basename(backup_file)}" style="text-decoration:none;">'\
-                          f'<div style="background-color:#4CAF50; color:white; padding:10px; border-radius:5px; '\
-                          f'cursor:pointer; text-align:center; margin:10px 0px;">Baixar Arquivo de Backup</div></a>'
-                    
-                    st.markdown(href, unsafe_allow_html=True)
-                    
+                    manifest = create_backup(backup_description)
+                    st.success(
+                        f"Backup {manifest['id']} criado com sucesso: {manifest['total_arquivos']} arquivos, "
+                        f"{manifest['bytes_novos'] / 1024:.1f} KB novos armazenados"
+                    )
                 except Exception as e:
                     st.error(f"Erro ao criar backup: {str(e)}")
+            
+            backups = list_backups()
+            if backups:
+                st.dataframe(pd.DataFrame([{
+                    'Backup': backup['id'],
+                    'Data': backup['criado_em'],
+                    'Descrição': backup['descricao'],
+                    'Arquivos': backup['total_arquivos'],
+                    'Tamanho (KB)': round(backup['total_bytes'] / 1024, 1),
+                    'Novos (KB)': round(backup['bytes_novos'] / 1024, 1)
+                } for backup in backups]), hide_index=True)
+                
+                download_id = st.selectbox(
+                    "Backup para download",
+                    [backup['id'] for backup in backups],
+                    key="backup_download_id"
+                )
+                if st.button("Preparar Download", key="btn_backup_download"):
+                    with export_backup(download_id) as backup_zip:
+                        st.download_button(
+                            label="Baixar Arquivo de Backup",
+                            data=backup_zip.read(),
+                            file_name=f"backup_{download_id}.zip",
+                            mime="application/zip"
+                        )
+            else:
+                st.info("Nenhum backup criado ainda.")
         
         # Seção de restauração
         with st.expander("Restaurar Backup"):
-            st.write("Restaure um backup de dados do sistema:")
+            st.write("Restaure os dados do sistema para o estado de um backup:")
+            
+            backups = list_backups()
+            if backups:
+                restore_id = st.selectbox(
+                    "Backup a restaurar",
+                    [backup['id'] for backup in backups],
+                    format_func=lambda backup_id: next(
+                        f"{backup['criado_em']} {backup['descricao']}".strip()
+                        for backup in backups if backup['id'] == backup_id
+                    ),
+                    key="backup_restore_id"
+                )
+                restore_snapshot_confirm = st.checkbox(
+                    "Esta operação substituirá os dados existentes. Confirmo que desejo continuar.",
+                    key="backup_restore_confirm"
+                )
+                if st.button("Restaurar Backup Selecionado", key="btn_restore_snapshot", disabled=not restore_snapshot_confirm):
+                    try:
+                        changed = restore_backup(restore_id)
+                        st.success(f"Dados restaurados com sucesso! {changed} arquivos alterados.")
+                    except Exception as e:
+                        st.error(f"Erro ao restaurar backup: {str(e)}")
             
+            st.write("Ou restaure a partir de um arquivo de backup:")
             uploaded_file = st.file_uploader("Selecione o arquivo de backup (.zip)", type="zip")
             
             if uploaded_file is not None:
@@ -405,6 +428,7 @@ with tab3:
                     # Criar diretório temporário
                     import tempfile
                     import shutil
+                    import zipfile
                     
                     with tempfile.TemporaryDirectory() as temp_dir:
                         # Salvar o arquivo de backup no diretório temporário
@@ -433,6 +457,7 @@ with tab3:
                                     # Extrair os arquivos
                                     for file in data_files:
                                         zipf.extract(file, "")
+                                    invalidate_table_cache()
                                     
                                     st.success("Dados restaurados com sucesso!")
                                     st.warning("Recarregue a página para ver os dados restaurados.")
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos do sistema ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+
+
+@pytest.fixture
+def farm(tmp_path, monkeypatch):
+    """Run the test against an empty data/ directory with the default storage configuration"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('SUINOCULTURA_STORAGE_BACKEND', raising=False)
+    os.makedirs('data')
+    monkeypatch.setattr(utils, '_storage_config', None)
+    utils._clear_all_caches()
+    yield tmp_path
+    utils._clear_all_caches()
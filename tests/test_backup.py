@@ -0,0 +1,35 @@
+import io
+import zipfile
+
+import pandas as pd
+
+import utils
+
+
+def _save_pens(*ids):
+    utils.save_pens(pd.DataFrame({'id_baia': list(ids), 'identificacao': [f'Baia {i}' for i in ids]}))
+
+
+def test_restore_backup_brings_back_the_data_and_drops_derived_caches(farm):
+    _save_pens('B1')
+    snapshot = utils.create_backup('antes')['id']
+    _save_pens('B1', 'B2')
+    assert utils.pen_labels(pd.Series(['B2'])).tolist() == ['Baia B2']
+
+    utils.restore_backup(snapshot)
+
+    assert utils.load_pens()['id_baia'].tolist() == ['B1']
+    assert utils.pen_labels(pd.Series(['B2'])).tolist() == ['Desconhecida']
+
+
+def test_export_backup_contains_the_snapshot_files(farm):
+    _save_pens('B1')
+    snapshot = utils.create_backup()['id']
+
+    with utils.export_backup(snapshot) as exported:
+        data = exported.read()
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        pens = pd.read_csv(archive.open('data/baias.csv'))
+    assert pens['id_baia'].tolist() == ['B1']
@@ -0,0 +1,119 @@
+import pandas as pd
+
+import utils
+
+
+def _add_animals(*ids, id_lote='L1', fase='Inicial'):
+    for id_animal in ids:
+        ok, _ = utils.adicionar_animal_recria(
+            id_animal, f'R-{id_animal}', '2024-01-01', 25.0, 'Creche', id_lote, fase
+        )
+        assert ok
+
+
+def _weighings():
+    return utils.load_recria_pesagens().sort_values(['id_animal', 'data_pesagem']).reset_index(drop=True)
+
+
+def test_transferir_animais_recria(farm):
+    _add_animals('A1', 'A2', 'A3')
+    utils.registrar_pesagem_recria('A1', '2024-01-01', 25.0, 'Individual', 'Inicial')
+
+    ok, _ = utils.transferir_animais_recria(
+        pd.DataFrame({'id_animal': ['A1', 'A2'], 'peso': [27.0, 26.0]}),
+        'L2', 'B2', '2024-01-11', 'Ajuste', 'Final', 'Ana'
+    )
+
+    assert ok
+    recria = utils.load_recria().set_index('id_animal')
+    assert recria['id_lote'].to_dict() == {'A1': 'L2', 'A2': 'L2', 'A3': 'L1'}
+    assert recria['fase_recria'].to_dict() == {'A1': 'Final', 'A2': 'Final', 'A3': 'Inicial'}
+    transferencias = utils.load_recria_transferencias().set_index('id_animal')
+    assert transferencias['id_lote_origem'].to_dict() == {'A1': 'L1', 'A2': 'L1'}
+    pesagens = _weighings()
+    assert pesagens['gpd_periodo'].tolist()[1] == 200.0
+    assert pesagens['id_lote'].tolist()[1:] == ['L2', 'L2']
+
+
+def test_transferir_animais_recria_rejects_inactive_animals(farm):
+    _add_animals('A1')
+
+    ok, _ = utils.transferir_animais_recria(
+        pd.DataFrame({'id_animal': ['A1', 'X9'], 'peso': [27.0, 26.0]}),
+        'L2', 'B2', '2024-01-11', 'Ajuste', 'Final', 'Ana'
+    )
+
+    assert not ok
+    assert utils.load_recria()['id_lote'].tolist() == ['L1']
+    assert not utils._table_exists(utils.RECRIA_TRANSFERENCIAS_FILE)
+
+
+def test_registrar_pesagens_recria(farm):
+    _add_animals('A1', 'A2')
+    utils.registrar_pesagem_recria('A1', '2024-01-01', 25.0, 'Individual', 'Inicial')
+
+    ok, _ = utils.registrar_pesagens_recria(pd.DataFrame({
+        'id_animal': ['A1', 'A1', 'A2'],
+        'peso': [31.0, 29.0, 28.0],
+        'data_pesagem': ['2024-01-21', '2024-01-11', '2024-01-11'],
+    }))
+
+    assert ok
+    pesagens = _weighings()
+    a1 = pesagens[pesagens['id_animal'] == 'A1']
+    assert a1['ganho_desde_ultima'].tolist()[1:] == [4.0, 2.0]
+    assert a1['gpd_periodo'].tolist()[1:] == [400.0, 200.0]
+    assert pesagens[pesagens['id_animal'] == 'A2']['id_lote'].tolist() == ['L1']
+
+
+def _nursery_batch(id_lote='N1', data_entrada='2024-01-01', peso_medio_entrada=6.0):
+    utils.save_nursery_batches(pd.DataFrame([{
+        'id_lote': id_lote,
+        'identificacao': id_lote,
+        'data_entrada': data_entrada,
+        'quantidade_inicial': 10,
+        'quantidade_atual': 10,
+        'peso_medio_entrada': peso_medio_entrada,
+        'peso_medio_atual': peso_medio_entrada,
+        'status': 'Ativo',
+    }]))
+
+
+def test_registrar_pesagens_creche(farm):
+    _nursery_batch()
+
+    ok, _ = utils.registrar_pesagens_creche(pd.DataFrame({
+        'id_lote': ['N1', 'N1'],
+        'peso_medio': [10.0, 8.0],
+        'data': ['2024-01-21', '2024-01-11'],
+    }))
+
+    assert ok
+    movimentos = utils.load_nursery_movements().sort_values('data')
+    assert movimentos['ganho_diario'].tolist() == [200.0, 200.0]
+    assert movimentos['peso_total'].tolist() == [80.0, 100.0]
+    assert utils.load_nursery_batches()['peso_medio_atual'].tolist() == [10.0]
+
+
+def test_registrar_pesagens_creche_keeps_current_weight_on_back_dated_weighing(farm):
+    _nursery_batch()
+    utils.registrar_pesagens_creche(pd.DataFrame({'id_lote': ['N1'], 'peso_medio': [10.0], 'data': ['2024-01-21']}))
+
+    utils.registrar_pesagens_creche(pd.DataFrame({'id_lote': ['N1'], 'peso_medio': [8.0], 'data': ['2024-01-11']}))
+
+    assert utils.load_nursery_batches()['peso_medio_atual'].tolist() == [10.0]
+
+
+def test_registrar_pesagens_recria_computes_age_from_birth_date(farm):
+    utils.save_animals(pd.DataFrame([{'id_animal': 'A1', 'identificacao': 'R-A1',
+                                      'data_nascimento': '2023-11-01'}]))
+    _add_animals('A1', 'A2')
+
+    utils.registrar_pesagens_recria(pd.DataFrame({
+        'id_animal': ['A1', 'A2'], 'peso': [30.0, 28.0], 'data_pesagem': ['2024-01-10', '2024-01-10'],
+    }))
+
+    idades = _weighings().set_index('id_animal')['idade_dias']
+    assert idades['A1'] == 70
+    assert pd.isna(idades['A2'])
+
@@ -0,0 +1,30 @@
+import json
+
+import utils
+
+
+def test_record_employee_access_writes_directly_without_write_batching(farm, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(utils.time, 'sleep', sleeps.append)
+
+    utils.record_employee_access({'id_colaborador': 'C1', 'matricula': '0042'}, '2024-03-01 07:00:00')
+    utils.record_employee_access({'id_colaborador': 'C1', 'matricula': '0042'}, '2024-03-02 07:00:00')
+
+    assert sleeps == []
+    assert str(utils.get_last_access()['C1']) == '2024-03-02 07:00:00'
+
+
+def test_record_employee_access_is_batched_when_enabled(farm, monkeypatch):
+    with open(utils.STORAGE_CONFIG_FILE, 'w') as f:
+        json.dump({'write_batching': True}, f)
+    monkeypatch.setattr(utils, '_storage_config', None)
+    monkeypatch.setattr(utils, 'WRITE_BATCH_WINDOW', 0)
+    batched = []
+    append_batched = utils._append_batched
+    monkeypatch.setattr(utils, '_append_batched',
+                        lambda records, file_path: batched.append(file_path) or append_batched(records, file_path))
+
+    utils.record_employee_access({'id_colaborador': 'C1', 'matricula': '0042'}, '2024-03-01 07:00:00')
+
+    assert batched == [utils.EMPLOYEE_ACCESS_FILE]
+    assert str(utils.get_last_access()['C1']) == '2024-03-01 07:00:00'
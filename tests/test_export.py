@@ -0,0 +1,55 @@
+import gzip
+import io
+import json
+import zipfile
+
+import pandas as pd
+import pytest
+
+import utils
+
+
+DF = pd.DataFrame({'id_animal': ['0790', '0012', 'A3'], 'peso': [101.5, 98.0, None]})
+
+
+def _read_back(data, format_type):
+    if format_type == 'csv':
+        return pd.read_csv(io.BytesIO(data), dtype={'id_animal': str})
+    return pd.DataFrame(json.loads(data))
+
+
+def _decompress(data, compression):
+    if compression == 'gzip':
+        return gzip.decompress(data)
+    if compression == 'zip':
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            return archive.read(archive.namelist()[0])
+    return data
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip', 'zip'])
+@pytest.mark.parametrize('format_type', ['csv', 'json'])
+def test_export_stream_round_trip(format_type, compression):
+    with utils.export_stream(DF, format_type, compression, chunk_rows=2) as exported:
+        data = exported.read()
+
+    assert isinstance(data, bytes)
+    result = _read_back(_decompress(data, compression), format_type)
+    assert result['id_animal'].tolist() == ['0790', '0012', 'A3']
+    assert result['peso'].tolist()[:2] == [101.5, 98.0]
+    assert pd.isna(result['peso'].iloc[2])
+    assert exported.closed
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip', 'zip'])
+def test_export_stream_excel(compression):
+    if 'excel' not in utils.available_export_formats():
+        pytest.skip('xlsxwriter não instalado')
+
+    with utils.export_stream(DF, 'excel', compression, chunk_rows=2) as exported:
+        data = _decompress(exported.read(), compression)
+
+    with zipfile.ZipFile(io.BytesIO(data)) as workbook:
+        assert workbook.testzip() is None
+        strings = workbook.read('xl/worksheets/sheet1.xml').decode('utf-8')
+    assert '0790' in strings and '0012' in strings
@@ -0,0 +1,177 @@
+import base64
+import json
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+
+import github_deploy
+
+
+class GitHubStub:
+    """Minimal in-memory GitHub API serving one repository over http.server"""
+
+    def __init__(self, files=None, empty_status=None):
+        self.files = {path: github_deploy.git_blob_sha(content) for path, content in (files or {}).items()}
+        self.empty_status = empty_status
+        self.requests = []
+        self.blob_uploads = []
+        self.contents_uploads = []
+        self.trees = []
+        self.commits = []
+        self.ref_updates = []
+        self.max_parallel_blobs = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._blob_barrier = threading.Barrier(2, timeout=5)
+
+    def handle(self, method, path, body):
+        self.requests.append((method, path))
+        repo = '/repos/dono/app'
+        if method == 'GET' and path == repo:
+            return 200, {'default_branch': 'main'}
+        if method == 'GET' and path == f'{repo}/git/ref/heads/main':
+            if self.empty_status:
+                return self.empty_status, {'message': 'Git Repository is empty.'}
+            return 200, {'object': {'sha': 'commit0'}}
+        if method == 'GET' and path == f'{repo}/git/commits/commit0':
+            return 200, {'tree': {'sha': 'tree0'}}
+        if method == 'GET' and path.startswith(f'{repo}/git/trees/tree0'):
+            return 200, {'tree': [{'path': p, 'type': 'blob', 'sha': s} for p, s in self.files.items()]}
+        if method == 'POST' and path == f'{repo}/git/blobs':
+            return self._create_blob(body)
+        if method == 'POST' and path == f'{repo}/git/trees':
+            self.trees.append(body)
+            return 201, {'sha': 'tree1'}
+        if method == 'POST' and path == f'{repo}/git/commits':
+            self.commits.append(body)
+            return 201, {'sha': 'commit1'}
+        if method == 'PATCH' and path == f'{repo}/git/refs/heads/main':
+            self.ref_updates.append(body)
+            return 200, {'object': {'sha': body['sha']}}
+        if method == 'PUT' and path.startswith(f'{repo}/contents/'):
+            self.contents_uploads.append((path[len(f'{repo}/contents/'):], body))
+            return 201, {}
+        return 404, {'message': 'Not Found'}
+
+    def _create_blob(self, body):
+        content = base64.b64decode(body['content'])
+        with self._lock:
+            self._in_flight += 1
+            self.max_parallel_blobs = max(self.max_parallel_blobs, self._in_flight)
+            first_two = len(self.blob_uploads) < 2
+            self.blob_uploads.append(content)
+        try:
+            if first_two:
+                # Os dois primeiros envios só terminam juntos: falha se forem sequenciais
+                self._blob_barrier.wait()
+        except threading.BrokenBarrierError:
+            return 500, {'message': 'envios sequenciais'}
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        return 201, {'sha': github_deploy.git_blob_sha(content)}
+
+
+@pytest.fixture
+def github(monkeypatch):
+    stubs = []
+
+    def start(**kwargs):
+        stub = GitHubStub(**kwargs)
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                status, payload = stub.handle(self.command, self.path.split('?')[0], body)
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_PATCH = _reply
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        stubs.append(server)
+        monkeypatch.setattr(github_deploy, 'GITHUB_API_URL', f'http://127.0.0.1:{server.server_port}')
+        return stub
+
+    yield start
+    for server in stubs:
+        server.shutdown()
+        server.server_close()
+
+
+def _package(tmp_path, files):
+    zip_path = tmp_path / 'deploy.zip'
+    with zipfile.ZipFile(zip_path, 'w') as archive:
+        for path, content in files.items():
+            archive.writestr(path, content)
+    return str(zip_path)
+
+
+FILES = {
+    'app.py': b'print("app")\n',
+    'utils.py': b'# utils v2\n',
+    'pages/01_Admin.py': b'# admin v2\n',
+    'requirements.txt': b'streamlit\n',
+}
+
+
+def test_unchanged_files_are_skipped(github, tmp_path):
+    stub = github(files={'app.py': FILES['app.py'], 'requirements.txt': FILES['requirements.txt'],
+                         'utils.py': b'# utils v1\n'})
+
+    ok, message = github_deploy.extract_and_upload_to_github(
+        _package(tmp_path, FILES), 'token', 'dono', 'app', only_modified=True
+    )
+
+    assert ok, message
+    assert sorted(stub.blob_uploads) == [b'# admin v2\n', b'# utils v2\n']
+    assert '2 arquivos não modificados foram ignorados' in message
+    assert not any(method == 'GET' and '/contents/' in path for method, path in stub.requests)
+
+
+def test_changed_files_go_in_parallel_blobs_and_a_single_commit(github, tmp_path):
+    stub = github(files={'app.py': b'# old\n'})
+
+    ok, message = github_deploy.extract_and_upload_to_github(
+        _package(tmp_path, FILES), 'token', 'dono', 'app', only_modified=True
+    )
+
+    assert ok, message
+    assert len(stub.blob_uploads) == len(FILES)
+    assert stub.max_parallel_blobs > 1
+    assert len(stub.trees) == 1 and len(stub.commits) == 1 and len(stub.ref_updates) == 1
+    assert stub.trees[0]['base_tree'] == 'tree0'
+    assert {entry['path']: entry['sha'] for entry in stub.trees[0]['tree']} == {
+        path: github_deploy.git_blob_sha(content) for path, content in FILES.items()
+    }
+    assert stub.commits[0]['parents'] == ['commit0']
+    assert stub.ref_updates == [{'sha': 'commit1'}]
+    assert stub.contents_uploads == []
+
+
+@pytest.mark.parametrize('empty_status', [404, 409])
+def test_empty_repository_falls_back_to_the_contents_api(github, tmp_path, empty_status):
+    stub = github(empty_status=empty_status)
+
+    ok, message = github_deploy.extract_and_upload_to_github(
+        _package(tmp_path, FILES), 'token', 'dono', 'app', only_modified=True
+    )
+
+    assert ok, message
+    assert [path for path, _ in stub.contents_uploads] == sorted(FILES)
+    assert all('sha' not in body for _, body in stub.contents_uploads)
+    assert base64.b64decode(stub.contents_uploads[0][1]['content']) == FILES['app.py']
+    assert stub.blob_uploads == [] and stub.commits == []
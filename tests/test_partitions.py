@@ -0,0 +1,110 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import utils
+
+
+def _heat_records(*datas):
+    return pd.DataFrame({
+        'id_registro': [f'H{i}' for i in range(len(datas))],
+        'id_rufia': 'R1',
+        'id_matriz': '0790',
+        'data_deteccao': list(datas),
+        'hora_deteccao': '06:30',
+        'intensidade_cio': 'Forte',
+        'duracao_minutos': 10,
+        'confirmado': True,
+    })
+
+
+def _set_partitioning(monkeypatch, enabled=True):
+    with open(utils.STORAGE_CONFIG_FILE, 'w') as f:
+        json.dump({'partitioned_storage': enabled, 'partition_period': 'M'}, f)
+    monkeypatch.setattr(utils, '_storage_config', None)
+    utils._clear_all_caches()
+
+
+def _ids(df):
+    return sorted(df['id_registro'])
+
+
+DATES = ('2023-01-10', '2023-02-10', '2023-03-10', '2024-05-10', '2024-05-20')
+
+
+def test_partition_table_requires_partitioned_storage(farm):
+    _heat_records(*DATES).to_csv(utils.HEAT_RECORDS_FILE, index=False)
+
+    with pytest.raises(ValueError):
+        utils.partition_table(utils.HEAT_RECORDS_FILE)
+
+    assert os.path.exists(utils.HEAT_RECORDS_FILE)
+    assert not os.path.exists(utils.PARTITIONS_DIR)
+    assert len(utils.load_heat_records()) == len(DATES)
+
+
+def test_partition_table_round_trip(farm, monkeypatch):
+    _heat_records(*DATES).to_csv(utils.HEAT_RECORDS_FILE, index=False)
+    _set_partitioning(monkeypatch)
+
+    utils.partition_table(utils.HEAT_RECORDS_FILE)
+
+    assert not os.path.exists(utils.HEAT_RECORDS_FILE)
+    manifest = utils._read_manifest(utils.HEAT_RECORDS_FILE)
+    assert sorted(manifest['particoes']) == ['2023-01', '2023-02', '2023-03', '2024-05']
+    loaded = utils.load_heat_records()
+    assert _ids(loaded) == ['H0', 'H1', 'H2', 'H3', 'H4']
+    assert loaded['id_matriz'].unique().tolist() == ['0790']
+    assert _ids(utils.load_partitions(utils.HEAT_RECORDS_FILE, '2024-01-01', '2024-12-31')) == ['H3', 'H4']
+
+    utils.unpartition_table(utils.HEAT_RECORDS_FILE)
+    _set_partitioning(monkeypatch, enabled=False)
+
+    assert not os.path.exists(utils._partition_dir(utils.HEAT_RECORDS_FILE))
+    assert _ids(utils.load_heat_records()) == ['H0', 'H1', 'H2', 'H3', 'H4']
+
+
+def test_append_goes_to_the_partition_of_the_record_date(farm, monkeypatch):
+    _heat_records(*DATES).to_csv(utils.HEAT_RECORDS_FILE, index=False)
+    _set_partitioning(monkeypatch)
+    utils.load_heat_records()
+
+    record = _heat_records('2023-02-15').iloc[0].to_dict()
+    record['id_registro'] = 'H9'
+    utils._append_table(record, utils.HEAT_RECORDS_FILE)
+
+    manifest = utils._read_manifest(utils.HEAT_RECORDS_FILE)
+    assert manifest['particoes']['2023-02']['linhas'] == 2
+    assert 'H9' in _ids(utils.load_heat_records())
+
+
+def test_compact_partitions_round_trip(farm, monkeypatch):
+    _heat_records(*DATES).to_csv(utils.HEAT_RECORDS_FILE, index=False)
+    _set_partitioning(monkeypatch)
+
+    removed = utils.compact_partitions(utils.HEAT_RECORDS_FILE, '2024-01-01', period='Y')
+
+    assert removed == 3
+    manifest = utils._read_manifest(utils.HEAT_RECORDS_FILE)
+    assert sorted(manifest['particoes']) == ['2023', '2024-05']
+    assert manifest['particoes']['2023']['linhas'] == 3
+    assert _ids(utils.load_heat_records()) == ['H0', 'H1', 'H2', 'H3', 'H4']
+    assert _ids(utils.load_partitions(utils.HEAT_RECORDS_FILE, '2023-02-01', '2023-02-28')) == ['H1']
+
+
+def test_archive_partitions_round_trip(farm, monkeypatch):
+    _heat_records(*DATES).to_csv(utils.HEAT_RECORDS_FILE, index=False)
+    _set_partitioning(monkeypatch)
+
+    archived = utils.archive_partitions(utils.HEAT_RECORDS_FILE, '2024-01-01')
+
+    assert archived == 3
+    assert _ids(utils.load_heat_records()) == ['H3', 'H4']
+    with_archive = utils.load_partitions(utils.HEAT_RECORDS_FILE, include_archived=True)
+    assert _ids(with_archive) == ['H0', 'H1', 'H2', 'H3', 'H4']
+    assert with_archive['id_matriz'].unique().tolist() == ['0790']
+
+    utils.unpartition_table(utils.HEAT_RECORDS_FILE)
+    assert len(pd.read_csv(utils.HEAT_RECORDS_FILE)) == len(DATES)
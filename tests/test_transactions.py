@@ -0,0 +1,115 @@
+import pandas as pd
+import pytest
+
+import utils
+
+
+def _add_animals(*ids, id_lote='L1', fase='Inicial'):
+    for id_animal in ids:
+        ok, _ = utils.adicionar_animal_recria(
+            id_animal, f'R-{id_animal}', '2024-01-01', 25.0, 'Creche', id_lote, fase
+        )
+        assert ok
+
+
+def _weighings():
+    return utils.load_recria_pesagens().sort_values(['id_animal', 'data_pesagem']).reset_index(drop=True)
+
+
+def test_first_weighing_without_weighings_table(farm):
+    _add_animals('A1')
+
+    assert utils.registrar_pesagem_recria('A1', '2024-01-15', 30.0, 'Individual', 'Inicial')[0]
+
+    pesagens = _weighings()
+    assert pesagens['peso'].tolist() == [30.0]
+    assert pesagens['gpd_periodo'].isna().all()
+
+
+def test_staged_weighings_of_the_same_animal_in_one_transaction(farm):
+    _add_animals('A1')
+    utils.registrar_pesagem_recria('A1', '2024-01-11', 30.0, 'Individual', 'Inicial')
+
+    with utils.table_transaction(utils.RECRIA_FILE, utils.RECRIA_PESAGENS_FILE) as tx:
+        utils.registrar_pesagem_recria('A1', '2024-01-21', 32.0, 'Individual', 'Inicial', transacao=tx)
+        utils.registrar_pesagem_recria('A1', '2024-01-31', 35.0, 'Individual', 'Inicial', transacao=tx)
+
+    assert _weighings()['gpd_periodo'].tolist()[1:] == [200.0, 300.0]
+
+
+def test_transfer_and_finish_in_one_transaction(farm):
+    _add_animals('A1')
+
+    with utils.table_transaction(utils.RECRIA_FILE, utils.RECRIA_PESAGENS_FILE,
+                                 utils.RECRIA_TRANSFERENCIAS_FILE) as tx:
+        assert utils.transferir_animal_recria('A1', 'L2', 'B2', '2024-01-11', 'Ajuste', 30.0,
+                                              'Final', 'Ana', transacao=tx)[0]
+        assert utils.finalizar_recria('A1', '2024-01-21', 34.0, 'Terminação', transacao=tx)[0]
+
+    recria = utils.load_recria()
+    assert recria[['id_lote', 'fase_recria', 'status']].values.tolist() == [['L2', 'Final', 'Finalizado']]
+    gpd = _weighings()['gpd_periodo']
+    assert pd.isna(gpd[0]) and gpd[1] == 400.0
+    assert len(utils.load_recria_transferencias()) == 1
+
+
+def test_transaction_commits_every_table_at_the_end(farm):
+    _add_animals('A1')
+
+    with utils.table_transaction(utils.RECRIA_FILE, utils.RECRIA_PESAGENS_FILE,
+                                 utils.RECRIA_TRANSFERENCIAS_FILE) as tx:
+        utils.transferir_animal_recria('A1', 'L2', 'B2', '2024-01-11', 'Ajuste', 30.0,
+                                       'Final', 'Ana', transacao=tx)
+        # Nada é gravado antes do fim do bloco
+        assert utils.load_recria()['id_lote'].tolist() == ['L1']
+        assert not utils._table_exists(utils.RECRIA_PESAGENS_FILE)
+
+    assert utils.load_recria()['id_lote'].tolist() == ['L2']
+    assert len(_weighings()) == 1
+
+
+def test_transaction_discards_changes_when_the_block_fails(farm):
+    _add_animals('A1')
+
+    with pytest.raises(RuntimeError):
+        with utils.table_transaction(utils.RECRIA_FILE, utils.RECRIA_PESAGENS_FILE,
+                                     utils.RECRIA_TRANSFERENCIAS_FILE) as tx:
+            utils.transferir_animal_recria('A1', 'L2', 'B2', '2024-01-11', 'Ajuste', 30.0,
+                                           'Final', 'Ana', transacao=tx)
+            raise RuntimeError('falha')
+
+    assert utils.load_recria()['id_lote'].tolist() == ['L1']
+    assert not utils._table_exists(utils.RECRIA_PESAGENS_FILE)
+    assert not utils._table_exists(utils.RECRIA_TRANSFERENCIAS_FILE)
+
+
+def test_transaction_restores_written_tables_when_a_write_fails(farm, monkeypatch):
+    _add_animals('A1')
+    save_table = utils._save_table
+
+    def failing_save(df, file_path):
+        if file_path == utils.RECRIA_FILE:
+            raise OSError('disco cheio')
+        save_table(df, file_path)
+
+    monkeypatch.setattr(utils, '_save_table', failing_save)
+    with pytest.raises(OSError):
+        utils.transferir_animal_recria('A1', 'L2', 'B2', '2024-01-11', 'Ajuste', 30.0, 'Final', 'Ana')
+
+    utils.invalidate_table_cache()
+    assert utils.load_recria()['id_lote'].tolist() == ['L1']
+    assert not utils._table_exists(utils.RECRIA_PESAGENS_FILE)
+    assert not utils._table_exists(utils.RECRIA_TRANSFERENCIAS_FILE)
+
+
+def test_finalizar_lote_recria_counts_the_active_animals(farm):
+    ok, _, id_lote = utils.criar_lote_recria('R01', '2024-01-01', 4, 70, 25.0, 'B1', 'Ana')
+    _add_animals('A1', 'A2', 'A3', id_lote=id_lote)
+    utils.finalizar_recria('A3', '2024-02-01', 40.0, 'Abate')
+
+    assert utils.finalizar_lote_recria(id_lote, '2024-02-01', 40.0, 700, 2.5)[0]
+
+    lote = utils.load_recria_lotes().iloc[0]
+    assert lote['quantidade_final'] == 2
+    assert lote['mortalidade'] == 50.0
+    assert lote['status'] == 'Finalizado'
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from utils import build_vaccination_schedule, calculate_next_vaccinations
+
+
+def _animals():
+    return pd.DataFrame({
+        'id_animal': ['A1'],
+        'identificacao': ['M-01'],
+        'categoria': ['Matriz'],
+        'data_nascimento': [pd.Timestamp('2020-01-01')],
+    })
+
+
+def _protocols(intervalo_reforco):
+    return pd.DataFrame({
+        'id_protocolo': ['P1'],
+        'nome_protocolo': ['Parvovirose'],
+        'categoria_animal': ['Matriz'],
+        'id_vacina': ['V1'],
+        'dose': [2.0],
+        'idade_aplicacao': [180],
+        'intervalo_reforco': [intervalo_reforco],
+        'prioridade': ['Alta'],
+    })
+
+
+def _records(data_aplicacao):
+    return pd.DataFrame({
+        'id_registro': ['R1'],
+        'id_animal': ['A1'],
+        'id_vacina': ['V1'],
+        'id_protocolo': ['P1'],
+        'data_aplicacao': [pd.Timestamp(data_aplicacao)],
+    })
+
+
+def test_schedule_not_due_when_applied_exactly_interval_days_ago():
+    today = pd.Timestamp('2024-06-01')
+    schedule = build_vaccination_schedule(
+        _animals(), _protocols(30), _records(today - pd.Timedelta(days=30)), today
+    )
+
+    assert schedule['dias_restantes'].tolist() == [1]
+    assert schedule['status'].tolist() == ['Agendada']
+
+
+def test_schedule_due_the_day_after_the_interval():
+    today = pd.Timestamp('2024-06-01')
+    schedule = build_vaccination_schedule(
+        _animals(), _protocols(30), _records(today - pd.Timedelta(days=31)), today
+    )
+
+    assert schedule['dias_restantes'].tolist() == [0]
+    assert schedule['status'].tolist() == ['Hoje']
+
+
+def test_schedule_interval_zero_applied_today_is_not_due():
+    today = pd.Timestamp('2024-06-01')
+    schedule = build_vaccination_schedule(_animals(), _protocols(0), _records(today), today)
+
+    assert schedule['dias_restantes'].tolist() == [1]
+    assert schedule['status'].tolist() == ['Agendada']
+
+
+def test_next_vaccinations_boundaries():
+    today = datetime.now().date()
+
+    exactly_interval = calculate_next_vaccinations(
+        'A1', _animals(), _protocols(30), _records(today - timedelta(days=30))
+    )
+    interval_zero_today = calculate_next_vaccinations(
+        'A1', _animals(), _protocols(0), _records(today)
+    )
+    past_interval = calculate_next_vaccinations(
+        'A1', _animals(), _protocols(30), _records(today - timedelta(days=31))
+    )
+
+    assert exactly_interval.empty
+    assert interval_zero_today.empty
+    assert past_interval['id_protocolo'].tolist() == ['P1']
@@ -1,8 +1,35 @@
 import pandas as pd
 import numpy as np
 import os
+import io
+import csv
 from datetime import datetime, timedelta
 import uuid
+import threading
+import tempfile
+import shutil
+import time
+from contextlib import contextmanager
+import json
+import sqlite3
+import zlib
+import gzip
+import zipfile
+import hashlib
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Sem pyarrow os snapshots Parquet ficam desativados
+    pa = None
+    pq = None
+
+try:
+    import xlsxwriter
+except ImportError:
+    # Sem xlsxwriter a exportação para Excel fica indisponível
+    xlsxwriter = None
 
 # File paths for different data
 ANIMALS_FILE = "data/animals.csv"
@@ -22,6 +49,7 @@ NURSERY_MOVEMENTS_FILE = "data/movimentacoes_creche.csv"
 GILTS_FILE = "data/leitoas.csv"
 GILTS_SELECTION_FILE = "data/selecao_leitoas.csv"
 GILTS_DISCARD_FILE = "data/descarte_leitoas.csv"
+CALIBER_SCORES_FILE = "data/caliber_scores.csv"
 
 # Adding new file paths after existing paths
 VACCINES_FILE = "data/vaccines.csv"
@@ -40,6 +68,2649 @@ RECRIA_TRANSFERENCIAS_FILE = "data/recria_transferencias.csv"
 RECRIA_ALIMENTACAO_FILE = "data/recria_alimentacao.csv"
 RECRIA_MEDICACAO_FILE = "data/recria_medicacao.csv"
 
+# Arquivos de mortalidade e colaboradores
+MORTALITY_FILE = "data/mortality.csv"
+EMPLOYEES_FILE = "data/employees.csv"
+EMPLOYEE_ACCESS_FILE = "data/employee_access.csv"
+
+# Registro central de esquemas: colunas de cada tabela e seus tipos.
+# Os tipos são aplicados uma única vez, ao interpretar a tabela:
+#   'string'   - texto e identificadores (nunca inferidos como números)
+#   'datetime' - datas (datetime64)
+#   'category' - texto de baixa cardinalidade (categórico no cache em memória)
+#   'float'    - valores numéricos com casas decimais (NaN para ausentes)
+#   'int'      - contagens (int64, ou float64 quando há valores ausentes)
+#   'bool'     - valores True/False
+TABLE_SCHEMAS = {
+    ANIMALS_FILE: {
+        'id_animal': 'string',
+        'identificacao': 'string',
+        'brinco': 'string',
+        'tatuagem': 'string',
+        'nome': 'string',
+        'categoria': 'category',
+        'data_nascimento': 'datetime',
+        'sexo': 'category',
+        'raca': 'category',
+        'origem': 'category',
+        'data_cadastro': 'datetime',
+        'observacao': 'string'
+    },
+    BREEDING_FILE: {
+        'id_ciclo': 'string',
+        'id_animal': 'string',
+        'numero_ciclo': 'int',
+        'data_cio': 'datetime',
+        'intensidade_cio': 'category',
+        'irmas_cio': 'string',
+        'quantidade_irmas_cio': 'int',
+        'status': 'category',
+        'observacao': 'string'
+    },
+    GESTATION_FILE: {
+        'id_gestacao': 'string',
+        'id_animal': 'string',
+        'data_cobertura': 'datetime',
+        'data_prevista_parto': 'datetime',
+        'data_parto': 'datetime',
+        'quantidade_leitoes': 'int',
+        'status': 'category',
+        'observacao': 'string'
+    },
+    WEIGHT_FILE: {
+        'id_registro': 'string',
+        'id_animal': 'string',
+        'data_registro': 'datetime',
+        'peso': 'float',
+        'observacao': 'string'
+    },
+    INSEMINATION_FILE: {
+        'id_inseminacao': 'string',
+        'id_animal': 'string',
+        'brinco': 'string',
+        'categoria': 'category',
+        'tipo_marran': 'category',
+        'data_inseminacao': 'datetime',
+        'num_semen': 'string',
+        'linhagem_semen': 'category',
+        'idade_semen': 'float',
+        'dose': 'float',
+        'ordem_dose': 'category',        # Primeira, Segunda, ..., Quinta+
+        'metodo': 'category',
+        'tecnico': 'category',
+        'semana_suina': 'int',
+        'data_registro': 'datetime',
+        'observacao': 'string'
+    },
+    PENS_FILE: {
+        'id_baia': 'string',
+        'identificacao': 'string',
+        'setor': 'category',
+        'capacidade': 'int',
+        'largura': 'float',
+        'comprimento': 'float',
+        'area': 'float',
+        'tipo_piso': 'category',
+        'data_cadastro': 'datetime',
+        'observacao': 'string'
+    },
+    PENS_ALLOCATION_FILE: {
+        'id_alocacao': 'string',
+        'id_baia': 'string',
+        'id_animal': 'string',
+        'data_entrada': 'datetime',
+        'data_saida': 'datetime',
+        'motivo_saida': 'string',
+        'status': 'category',
+        'observacao': 'string'
+    },
+    MATERNITY_FILE: {
+        'id_maternidade': 'string',
+        'id_animal': 'string',           # ID da matriz
+        'id_baia': 'string',             # ID da baia de maternidade
+        'data_entrada': 'datetime',      # Data de entrada na maternidade
+        'data_parto': 'datetime',        # Data do parto
+        'data_saida': 'datetime',        # Data de saída da maternidade
+        'status': 'category',            # Status (Ativa, Finalizada)
+        'observacao': 'string'
+    },
+    LITTERS_FILE: {
+        'id_leitegada': 'string',
+        'id_maternidade': 'string',      # Referência à entrada na maternidade
+        'id_animal': 'string',           # ID da matriz
+        'data_parto': 'datetime',
+        'total_nascidos': 'int',         # Total de leitões nascidos
+        'nascidos_vivos': 'int',         # Leitões nascidos vivos
+        'natimortos': 'int',             # Leitões nascidos mortos
+        'mumificados': 'int',            # Leitões mumificados
+        'peso_total': 'float',           # Peso total da leitegada (kg)
+        'peso_medio': 'float',           # Peso médio dos leitões (kg)
+        'tamanho_leitegada_ajustado': 'int', # Tamanho após transferências/adoções
+        'observacao': 'string'
+    },
+    PIGLETS_FILE: {
+        'id_leitao': 'string',
+        'id_leitegada': 'string',        # Referência à leitegada
+        'id_animal_mae': 'string',       # ID da matriz biológica
+        'id_animal_adotiva': 'string',   # ID da matriz adotiva (se houver)
+        'identificacao': 'string',       # Identificação do leitão (número, brinco, etc.)
+        'sexo': 'category',              # Sexo do leitão
+        'data_nascimento': 'datetime',   # Data de nascimento
+        'peso_nascimento': 'float',      # Peso ao nascer (kg)
+        'peso_atual': 'float',           # Último peso registrado (kg)
+        'status_atual': 'category',      # Status (Vivo, Morto, Desmamado, Transferido)
+        'data_status': 'datetime',       # Data do último status
+        'causa_morte': 'category',       # Causa da morte (se aplicável)
+        'observacao': 'string'
+    },
+    WEANING_FILE: {
+        'id_desmame': 'string',
+        'id_leitegada': 'string',        # Referência à leitegada
+        'id_animal_mae': 'string',       # ID da matriz
+        'data_desmame': 'datetime',      # Data do desmame
+        'idade_desmame': 'int',          # Idade média ao desmame (dias)
+        'total_desmamados': 'int',       # Total de leitões desmamados
+        'peso_total_desmame': 'float',   # Peso total dos leitões ao desmame (kg)
+        'peso_medio_desmame': 'float',   # Peso médio dos leitões ao desmame (kg)
+        'ganho_medio_diario': 'float',   # Ganho médio diário de peso (g/dia)
+        'destino_leitoes': 'category',   # Destino dos leitões (Creche, Venda, etc.)
+        'destino_matriz': 'category',    # Destino da matriz (Gestação, Descarte, etc.)
+        'id_baia_destino': 'string',     # ID da baia de destino dos leitões
+        'observacao': 'string'
+    },
+    NURSERY_FILE: {
+        'id_creche': 'string',
+        'id_baia': 'string',             # ID da baia onde os leitões estão
+        'data_inicio': 'datetime',       # Data de início do período de creche
+        'data_fim_prevista': 'datetime', # Data prevista para o fim (saída para crescimento/terminação)
+        'data_fim_real': 'datetime',     # Data real de saída da creche
+        'status': 'category',            # Status (Ativo, Finalizado)
+        'observacao': 'string'
+    },
+    NURSERY_BATCHES_FILE: {
+        'id_lote': 'string',
+        'id_creche': 'string',           # Referência ao período de creche
+        'id_desmame': 'string',          # Referência ao desmame que originou o lote (se aplicável)
+        'identificacao': 'string',       # Identificação do lote
+        'quantidade_inicial': 'int',     # Quantidade inicial de leitões no lote
+        'quantidade_atual': 'int',       # Quantidade atual de leitões
+        'peso_medio_entrada': 'float',   # Peso médio na entrada (kg)
+        'idade_media_entrada': 'int',    # Idade média na entrada (dias)
+        'peso_medio_atual': 'float',     # Peso médio atual (kg)
+        'mortalidade': 'float',          # Taxa de mortalidade (%)
+        'origem': 'category',            # Origem dos leitões (Desmame, Transferência, Compra)
+        'data_entrada': 'datetime',      # Data de entrada na creche
+        'data_saida': 'datetime',        # Data de saída da creche (se aplicável)
+        'destino': 'category',           # Destino após a creche (Crescimento, Terminação, Venda)
+        'status': 'category',            # Status (Ativo, Finalizado)
+        'observacao': 'string'
+    },
+    NURSERY_MOVEMENTS_FILE: {
+        'id_movimentacao': 'string',
+        'id_lote': 'string',             # Referência ao lote
+        'tipo': 'category',              # Tipo (Pesagem, Mortalidade, Medicação, Transferência, etc.)
+        'data': 'datetime',              # Data da movimentação
+        'quantidade': 'int',             # Quantidade de animais afetados
+        'peso_total': 'float',           # Peso total (para pesagens) (kg)
+        'peso_medio': 'float',           # Peso médio (kg)
+        'ganho_diario': 'float',         # Ganho diário desde a última pesagem (g/dia)
+        'causa': 'category',             # Causa (para mortalidade, medicação)
+        'destino': 'category',           # Destino (para transferências)
+        'medicamento': 'category',       # Medicamento (para medicação)
+        'dosagem': 'string',             # Dosagem (para medicação)
+        'via_aplicacao': 'category',     # Via de aplicação (para medicação)
+        'responsavel': 'category',       # Responsável pela movimentação
+        'observacao': 'string'
+    },
+    GILTS_FILE: {
+        'id_leitoa': 'string',
+        'id_animal': 'string',           # ID do animal no cadastro geral (se aplicável)
+        'identificacao': 'string',       # Identificação da leitoa
+        'brinco': 'string',              # Número do brinco
+        'tatuagem': 'string',            # Tatuagem
+        'chip': 'string',                # Número do chip (se aplicável)
+        'data_nascimento': 'datetime',   # Data de nascimento
+        'origem': 'category',            # Origem (Própria, Comprada, etc.)
+        'genetica': 'category',          # Linhagem genética
+        'mae': 'string',                 # Identificação da mãe
+        'pai': 'string',                 # Identificação do pai
+        'data_selecao': 'datetime',      # Data de seleção para reprodução
+        'peso_selecao': 'float',         # Peso na seleção (kg)
+        'idade_selecao': 'int',          # Idade na seleção (dias)
+        'status': 'category',            # Status (Selecionada, Em Adaptação, Em Reprodução, Descartada)
+        'data_primeiro_cio': 'datetime', # Data do primeiro cio observado
+        'observacao': 'string'
+    },
+    GILTS_SELECTION_FILE: {
+        'id_selecao': 'string',
+        'id_leitoa': 'string',           # ID da leitoa
+        'data_selecao': 'datetime',      # Data da seleção
+        'peso': 'float',                 # Peso (kg)
+        'idade': 'int',                  # Idade (dias)
+        'espessura_toucinho': 'float',   # Espessura de toucinho (mm)
+        'profundidade_lombo': 'float',   # Profundidade de lombo (mm)
+        'comprimento_corporal': 'float', # Comprimento corporal (cm)
+        'largura_ombros': 'float',       # Largura dos ombros (cm)
+        'largura_quadril': 'float',      # Largura do quadril (cm)
+        'altura_posterior': 'float',     # Altura posterior (cm)
+        'numero_tetos': 'int',           # Número de tetos funcionais
+        'tetos_invertidos': 'int',       # Número de tetos invertidos
+        'qualidade_aprumos': 'category', # Qualidade dos aprumos (Excelente, Boa, Regular, Ruim)
+        'temperamento': 'category',      # Temperamento (Dócil, Normal, Agressivo)
+        'avaliacao_visual': 'category',  # Avaliação visual (Excelente, Bom, Regular, Ruim)
+        'escore_geral': 'int',           # Escore geral (1-5)
+        'recomendacao': 'category',      # Recomendação (Selecionada, Descartada)
+        'motivo_recomendacao': 'string', # Motivo da recomendação
+        'tecnico_responsavel': 'category', # Técnico responsável pela avaliação
+        'observacao': 'string'
+    },
+    GILTS_DISCARD_FILE: {
+        'id_descarte': 'string',
+        'id_leitoa': 'string',           # ID da leitoa
+        'data_descarte': 'datetime',     # Data do descarte
+        'peso_descarte': 'float',        # Peso no descarte (kg)
+        'idade_descarte': 'int',         # Idade no descarte (dias)
+        'motivo_principal': 'category',  # Motivo principal do descarte
+        'motivos_secundarios': 'string', # Motivos secundários (separados por vírgula)
+        'destino': 'category',           # Destino (Abate, Venda, Outro)
+        'valor_venda': 'float',          # Valor de venda (se aplicável)
+        'tecnico_responsavel': 'category', # Técnico responsável pelo descarte
+        'observacao': 'string'
+    },
+    CALIBER_SCORES_FILE: {
+        'id_score': 'string',
+        'id_animal': 'string',
+        'data_medicao': 'datetime',
+        'medida_p1': 'float',            # P1 (Primeira vértebra lombar)
+        'medida_p2': 'float',            # P2 (Última costela)
+        'medida_p3': 'float',            # P3 (Última vértebra torácica)
+        'score_calculado': 'int',
+        'condicao_corporal': 'category',
+        'tecnico': 'category',
+        'observacao': 'string'
+    },
+    MORTALITY_FILE: {
+        'id_morte': 'string',
+        'id_animal': 'string',
+        'data_morte': 'datetime',
+        'causa_morte': 'category',
+        'categoria': 'category',
+        'idade_dias': 'int',
+        'peso_morte': 'float',
+        'local_morte': 'category',       # Ex: Maternidade, Creche, etc.
+        'necropsia': 'category',         # Realizou necropsia? (Sim/Não)
+        'resultado_necropsia': 'string',
+        'medidas_preventivas': 'string',
+        'responsavel': 'category',
+        'observacao': 'string'
+    },
+    VACCINES_FILE: {
+        'id_vacina': 'string',
+        'nome': 'string',
+        'fabricante': 'category',
+        'tipo': 'category',              # Ex: Bacteriana, Viral, etc.
+        'forma_aplicacao': 'category',   # Ex: Intramuscular, Subcutânea
+        'dose_padrao': 'float',
+        'unidade_dose': 'category',      # Ex: mL, mg
+        'intervalo_minimo': 'int',       # Dias entre doses
+        'validade_dias': 'int',
+        'observacao': 'string'
+    },
+    VACCINATION_PROTOCOLS_FILE: {
+        'id_protocolo': 'string',
+        'nome_protocolo': 'string',
+        'categoria_animal': 'category',  # Ex: Matriz, Leitão, etc.
+        'idade_aplicacao': 'int',        # Idade em dias
+        'id_vacina': 'string',
+        'dose': 'float',
+        'intervalo_reforco': 'int',      # Dias até o reforço
+        'prioridade': 'category',        # Alta, Média, Baixa
+        'obrigatoria': 'bool',           # True/False
+        'observacao': 'string'
+    },
+    VACCINATION_RECORDS_FILE: {
+        'id_registro': 'string',
+        'id_animal': 'string',
+        'id_vacina': 'string',
+        'id_protocolo': 'string',        # Pode ser nulo se for vacinação avulsa
+        'data_aplicacao': 'datetime',
+        'dose_aplicada': 'float',
+        'via_aplicacao': 'category',
+        'lote_vacina': 'string',
+        'data_validade': 'datetime',
+        'responsavel': 'category',
+        'local_aplicacao': 'category',   # Ex: Pescoço, Pernil
+        'reacao': 'string',              # Registrar reações adversas
+        'observacao': 'string'
+    },
+    HEAT_DETECTION_FILE: {
+        'id_rufia': 'string',
+        'id_animal': 'string',           # ID do rufião
+        'nome': 'string',
+        'status': 'category',            # Ativo/Inativo
+        'data_inicio': 'datetime',
+        'data_fim': 'datetime',          # Pode ser null se ainda estiver ativo
+        'observacao': 'string'
+    },
+    HEAT_RECORDS_FILE: {
+        'id_registro': 'string',
+        'id_rufia': 'string',
+        'id_matriz': 'string',
+        'data_deteccao': 'datetime',
+        'hora_deteccao': 'string',
+        'intensidade_cio': 'category',   # Forte, Médio, Fraco
+        'comportamento': 'category',     # Reflexo, Monta, Aceitação
+        'duracao_minutos': 'int',
+        'sinais_externos': 'category',   # Vermelhidão, Inchaço, etc
+        'confirmado': 'bool',            # True/False
+        'responsavel': 'category',
+        'observacao': 'string'
+    },
+    EMPLOYEES_FILE: {
+        'id_colaborador': 'string',
+        'nome': 'string',
+        'matricula': 'string',
+        'cargo': 'category',
+        'setor': 'category',
+        'data_admissao': 'datetime',
+        'status': 'category',            # Ativo/Inativo
+        'ultimo_acesso': 'datetime',
+        'observacao': 'string'
+    },
+    EMPLOYEE_ACCESS_FILE: {
+        'id_colaborador': 'string',
+        'matricula': 'string',
+        'data_acesso': 'datetime'
+    },
+    RECRIA_FILE: {
+        'id_recria': 'string',
+        'id_animal': 'string',           # ID do animal em recria
+        'identificacao': 'string',       # Identificação do animal (brinco, etc.)
+        'data_entrada': 'datetime',      # Data de entrada na recria
+        'peso_entrada': 'float',         # Peso na entrada (kg)
+        'origem': 'category',            # Origem do animal (Desmame, Compra, etc.)
+        'id_lote': 'string',             # ID do lote de recria
+        'data_saida': 'datetime',        # Data de saída da recria
+        'peso_saida': 'float',           # Peso na saída (kg)
+        'destino': 'category',           # Destino (Terminação, Reprodução, Venda, etc.)
+        'status': 'category',            # Status (Ativo, Finalizado, etc.)
+        'fase_recria': 'category',       # Fase da recria (Fase 1, Fase 2, etc.)
+        'observacao': 'string'
+    },
+    RECRIA_LOTES_FILE: {
+        'id_lote': 'string',
+        'codigo': 'string',              # Código do lote
+        'data_formacao': 'datetime',     # Data de formação do lote
+        'quantidade_inicial': 'int',     # Quantidade inicial de animais
+        'idade_media': 'int',            # Idade média dos animais (dias)
+        'peso_medio_inicial': 'float',   # Peso médio inicial (kg)
+        'id_baia': 'string',             # Baia onde o lote está alojado
+        'data_encerramento': 'datetime', # Data de encerramento do lote
+        'quantidade_final': 'int',       # Quantidade final de animais
+        'peso_medio_final': 'float',     # Peso médio final (kg)
+        'gpd': 'float',                  # Ganho de peso diário (kg)
+        'ca': 'float',                   # Conversão alimentar
+        'mortalidade': 'float',          # Taxa de mortalidade (%)
+        'status': 'category',            # Status (Ativo, Finalizado, etc.)
+        'responsavel': 'category',       # Responsável pelo lote
+        'observacao': 'string'
+    },
+    RECRIA_PESAGENS_FILE: {
+        'id_pesagem': 'string',
+        'id_animal': 'string',           # ID do animal pesado
+        'id_lote': 'string',             # ID do lote (quando pesagem em grupo)
+        'data_pesagem': 'datetime',      # Data da pesagem
+        'peso': 'float',                 # Peso (kg)
+        'tipo_pesagem': 'category',      # Individual ou Grupo
+        'fase_recria': 'category',       # Fase da recria
+        'idade_dias': 'int',             # Idade em dias
+        'ganho_desde_ultima': 'float',   # Ganho desde a última pesagem (kg)
+        'gpd_periodo': 'float',          # Ganho de peso diário no período (g/dia)
+        'responsavel': 'category',       # Responsável pela pesagem
+        'observacao': 'string'
+    },
+    RECRIA_TRANSFERENCIAS_FILE: {
+        'id_transferencia': 'string',
+        'id_animal': 'string',           # ID do animal transferido
+        'id_lote_origem': 'string',      # ID do lote de origem
+        'id_lote_destino': 'string',     # ID do lote de destino
+        'id_baia_origem': 'string',      # ID da baia de origem
+        'id_baia_destino': 'string',     # ID da baia de destino
+        'data_transferencia': 'datetime', # Data da transferência
+        'motivo': 'category',            # Motivo da transferência
+        'peso_transferencia': 'float',   # Peso na transferência (kg)
+        'fase_origem': 'category',       # Fase de recria de origem
+        'fase_destino': 'category',      # Fase de recria de destino
+        'responsavel': 'category',       # Responsável pela transferência
+        'observacao': 'string'
+    },
+    RECRIA_ALIMENTACAO_FILE: {
+        'id_alimentacao': 'string',
+        'id_lote': 'string',             # ID do lote alimentado
+        'data_inicio': 'datetime',       # Data de início do fornecimento
+        'data_fim': 'datetime',          # Data de fim do fornecimento
+        'tipo_racao': 'category',        # Tipo de ração
+        'quantidade_kg': 'float',        # Quantidade fornecida (kg)
+        'custo_kg': 'float',             # Custo por kg (R$)
+        'custo_total': 'float',          # Custo total (R$)
+        'consumo_animal_dia': 'float',   # Consumo médio por animal por dia (kg)
+        'fase_recria': 'category',       # Fase da recria
+        'responsavel': 'category',       # Responsável pelo registro
+        'observacao': 'string'
+    },
+    RECRIA_MEDICACAO_FILE: {
+        'id_medicacao': 'string',
+        'id_animal': 'string',           # ID do animal medicado (quando individual)
+        'id_lote': 'string',             # ID do lote (quando medicação coletiva)
+        'data_aplicacao': 'datetime',    # Data da aplicação
+        'medicamento': 'category',       # Nome do medicamento
+        'via_aplicacao': 'category',     # Via de aplicação
+        'dose': 'float',                 # Dose aplicada
+        'unidade_dose': 'category',      # Unidade da dose (ml, mg, etc.)
+        'motivo': 'category',            # Motivo da medicação
+        'tipo_aplicacao': 'category',    # Individual ou Coletiva
+        'periodo_carencia': 'int',       # Período de carência (dias)
+        'data_fim_carencia': 'datetime', # Data do fim da carência
+        'responsavel': 'category',       # Responsável pela aplicação
+        'observacao': 'string'
+    }
+}
+
+# Configuração do backend de armazenamento.
+# O backend padrão é 'csv' (um arquivo por tabela em data/). O backend
+# 'sqlite' grava as mesmas tabelas, com índices, em um único banco SQLite.
+# A escolha vem de STORAGE_CONFIG_FILE e pode ser sobrescrita pela variável
+# de ambiente SUINOCULTURA_STORAGE_BACKEND.
+STORAGE_CONFIG_FILE = "data/storage_config.json"
+SQLITE_DB_FILE = "data/suinocultura.db"
+
+# Colunas indexadas automaticamente nas tabelas SQLite, quando existirem
+SQLITE_INDEXED_COLUMNS = ['id_animal', 'id_lote', 'id_matriz', 'id_leitegada', 'id_baia']
+
+# Coluna de data principal de cada tabela, usada nas consultas por período
+TABLE_DATE_COLUMNS = {
+    'animals': 'data_nascimento',
+    'breeding_cycles': 'data_cio',
+    'gestation': 'data_cobertura',
+    'weight': 'data_registro',
+    'inseminacao': 'data_inseminacao',
+    'baias_alocacao': 'data_entrada',
+    'maternidade': 'data_entrada',
+    'leitegadas': 'data_parto',
+    'leitoes': 'data_nascimento',
+    'desmame': 'data_desmame',
+    'creche': 'data_inicio',
+    'lotes_creche': 'data_entrada',
+    'movimentacoes_creche': 'data',
+    'leitoas': 'data_nascimento',
+    'selecao_leitoas': 'data_selecao',
+    'descarte_leitoas': 'data_descarte',
+    'caliber_scores': 'data_medicao',
+    'mortality': 'data_morte',
+    'vaccination_records': 'data_aplicacao',
+    'heat_detection': 'data_inicio',
+    'heat_records': 'data_deteccao',
+    'employees': 'data_admissao',
+    'employee_access': 'data_acesso',
+    'recria': 'data_entrada',
+    'recria_lotes': 'data_formacao',
+    'recria_pesagens': 'data_pesagem',
+    'recria_transferencias': 'data_transferencia',
+    'recria_alimentacao': 'data_inicio',
+    'recria_medicacao': 'data_aplicacao'
+}
+
+_storage_config = None
+
+def load_storage_config():
+    """
+    Carrega a configuração do backend de armazenamento.
+    
+    Returns:
+        dict: Configuração com as chaves 'backend' ('csv' ou 'sqlite'), 'sqlite_path',
+        'parquet_snapshots' (True para ler as tabelas de histórico via snapshot Parquet),
+        'write_batching' (True para agrupar inserções concorrentes em uma só escrita),
+        'partitioned_storage' (True para guardar as tabelas de histórico em partições
+        por período) e 'partition_period' ('M', 'Q' ou 'Y')
+    """
+    config = {'backend': 'csv', 'sqlite_path': SQLITE_DB_FILE, 'parquet_snapshots': False,
+              'write_batching': False, 'partitioned_storage': False, 'partition_period': 'M'}
+    
+    if os.path.exists(STORAGE_CONFIG_FILE):
+        try:
+            with open(STORAGE_CONFIG_FILE, 'r') as f:
+                config.update(json.load(f))
+        except (OSError, ValueError):
+            # Configuração inválida: mantém o backend CSV
+            pass
+    
+    env_backend = os.environ.get('SUINOCULTURA_STORAGE_BACKEND')
+    if env_backend:
+        config['backend'] = env_backend
+    
+    return config
+
+def _get_storage_config():
+    """Return the storage configuration, loading it on first use"""
+    global _storage_config
+    if _storage_config is None:
+        _storage_config = load_storage_config()
+    return _storage_config
+
+def get_storage_backend():
+    """Return the name of the active storage backend ('csv' or 'sqlite')"""
+    return _get_storage_config()['backend']
+
+def set_storage_backend(backend, sqlite_path=None):
+    """
+    Seleciona o backend de armazenamento para o processo atual.
+    
+    Args:
+        backend: 'csv' ou 'sqlite'
+        sqlite_path: Caminho do banco SQLite (opcional)
+    """
+    global _storage_config
+    if backend not in ('csv', 'sqlite'):
+        raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
+    
+    config = load_storage_config()
+    config['backend'] = backend
+    if sqlite_path:
+        config['sqlite_path'] = sqlite_path
+    _storage_config = config
+    invalidate_table_cache()
+
+def _table_name(file_path):
+    """Return the table name for a data file path (its base name without extension)"""
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+# Cache de tabelas em memória, compartilhado por todas as sessões do processo.
+# Cada entrada é indexada pelo caminho do arquivo e guarda a assinatura do
+# momento da leitura: (mtime, tamanho) do CSV ou a versão da tabela SQLite.
+# Assim uma tabela inalterada é interpretada uma única vez e qualquer
+# alteração externa é detectada.
+_table_cache = {}
+_table_cache_lock = threading.Lock()
+
+# Coordenação de escritas.
+# O Streamlit atende várias sessões no mesmo processo, em threads diferentes.
+# Cada tabela tem um lock próprio (reentrante), mantido durante toda escrita e
+# durante as sequências carregar → alterar → gravar feitas com table_lock, para
+# que duas sessões gravando ao mesmo tempo não descartem os registros uma da outra.
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+# Janela (segundos) em que inserções concorrentes na mesma tabela são agrupadas
+# em uma única escrita, quando 'write_batching' está ativo na configuração
+WRITE_BATCH_WINDOW = 0.05
+
+def _file_lock(file_path):
+    """Return the lock that serializes writes to a table"""
+    with _file_locks_guard:
+        lock = _file_locks.get(file_path)
+        if lock is None:
+            lock = threading.RLock()
+            _file_locks[file_path] = lock
+        return lock
+
+@contextmanager
+def table_lock(*file_paths):
+    """
+    Bloqueia uma ou mais tabelas para uma sequência carregar → alterar → gravar.
+    
+    Enquanto o bloco estiver em execução, nenhuma outra sessão grava nas
+    tabelas indicadas. Os locks são adquiridos sempre na mesma ordem, para
+    evitar impasses entre blocos que bloqueiam várias tabelas.
+    
+    Args:
+        *file_paths: Caminhos das tabelas (ex.: EMPLOYEES_FILE)
+        
+    Exemplo:
+        with table_lock(EMPLOYEES_FILE):
+            df = load_employees()
+            ...
+            save_employees(df)
+    """
+    locks = [_file_lock(file_path) for file_path in sorted(set(file_paths))]
+    for lock in locks:
+        lock.acquire()
+    try:
+        yield
+    finally:
+        for lock in reversed(locks):
+            lock.release()
+
+def _write_csv_atomic(df, file_path):
+    """Write a DataFrame to a temporary file and atomically replace the CSV with it"""
+    directory = os.path.dirname(file_path) or '.'
+    fd, temp_path = tempfile.mkstemp(
+        prefix='.' + os.path.basename(file_path) + '.', suffix='.tmp', dir=directory
+    )
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+class _AppendBatch:
+    """Records waiting to be appended to a table in a single write"""
+    
+    def __init__(self):
+        self.records = []
+        self.done = threading.Event()
+        self.error = None
+
+_append_batches = {}
+_append_batches_lock = threading.Lock()
+
+def _append_batched(records, file_path):
+    """
+    Acrescenta registros agrupando inserções concorrentes na mesma tabela.
+    
+    A primeira sessão a chegar abre um lote, espera WRITE_BATCH_WINDOW e
+    grava de uma só vez todos os registros reunidos nesse intervalo; as
+    demais apenas aguardam a gravação do lote. Todas só retornam depois que
+    seus registros estão gravados, e um erro na gravação é repassado a todas.
+    """
+    with _append_batches_lock:
+        batch = _append_batches.get(file_path)
+        is_leader = batch is None
+        if is_leader:
+            batch = _AppendBatch()
+            _append_batches[file_path] = batch
+        batch.records.extend(records)
+    
+    if is_leader:
+        time.sleep(WRITE_BATCH_WINDOW)
+        with _append_batches_lock:
+            _append_batches.pop(file_path, None)
+        try:
+            _write_records(batch.records, file_path)
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+    else:
+        batch.done.wait()
+    
+    if batch.error is not None:
+        raise batch.error
+
+def _file_signature(file_path):
+    """Return the (mtime_ns, size) pair used to detect changes in a data file"""
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _table_exists(file_path):
+    """Check if a table exists in the active storage backend"""
+    if _partitioning_enabled(file_path):
+        return _partitioned_table_exists(file_path)
+    if get_storage_backend() == 'sqlite':
+        return _sqlite_table_exists(_table_name(file_path))
+    return os.path.exists(file_path)
+
+def _table_signature(file_path):
+    """Return the value that identifies the current version of a table"""
+    if _partitioning_enabled(file_path):
+        return ('partitions', _file_signature(_manifest_path(file_path)))
+    if get_storage_backend() == 'sqlite':
+        return ('sqlite', _sqlite_table_version(_table_name(file_path)))
+    return _file_signature(file_path)
+
+# Tipos pandas das colunas de uma tabela vazia, por tipo lógico do registro
+_EMPTY_COLUMN_DTYPES = {
+    'datetime': 'datetime64[ns]',
+    'float': 'float64',
+    'int': 'int64'
+}
+
+_BOOL_VALUES = {True: True, False: False, 'True': True, 'False': False,
+                'true': True, 'false': False}
+
+def _empty_table(file_path, columns=None):
+    """Return an empty DataFrame with the registered columns and dtypes of a table"""
+    df = pd.DataFrame({
+        column: pd.Series(dtype=_EMPTY_COLUMN_DTYPES.get(kind, 'object'))
+        for column, kind in TABLE_SCHEMAS[file_path].items()
+    })
+    return df.reindex(columns=columns) if columns is not None else df
+
+def _text_columns(file_path):
+    """Return the registered text columns of a table, read as str to keep identifiers intact"""
+    return {
+        column: str for column, kind in TABLE_SCHEMAS.get(file_path, {}).items()
+        if kind in ('string', 'category')
+    }
+
+def _apply_schema(df, file_path, kinds=None):
+    """
+    Converte as colunas de uma tabela para os tipos do registro de esquemas.
+    
+    Colunas que não estão no registro são mantidas como lidas. Se a conversão
+    de uma coluna transformar valores preenchidos em ausentes (por exemplo,
+    uma data em formato inesperado), a coluna é mantida como está, para que
+    nenhum dado se perca ao regravar a tabela.
+    
+    Args:
+        df: DataFrame lido do CSV ou do SQLite
+        file_path: Caminho do arquivo da tabela
+        kinds: Tipos lógicos a aplicar (padrão: todos)
+        
+    Returns:
+        DataFrame: O mesmo DataFrame com as colunas convertidas
+    """
+    for column, kind in TABLE_SCHEMAS.get(file_path, {}).items():
+        if column not in df.columns or (kinds is not None and kind not in kinds):
+            continue
+        
+        original = df[column]
+        if kind == 'datetime':
+            converted = pd.to_datetime(original, errors='coerce', format='ISO8601')
+        elif kind in ('float', 'int'):
+            converted = pd.to_numeric(original, errors='coerce')
+            if kind == 'int' and converted.notna().all() and (converted % 1 == 0).all():
+                converted = converted.astype('int64')
+            else:
+                converted = converted.astype('float64')
+        elif kind == 'bool':
+            converted = original.map(_BOOL_VALUES)
+        elif kind == 'category':
+            if isinstance(original.dtype, pd.CategoricalDtype):
+                continue
+            converted = original.astype('category')
+        else:
+            if pd.api.types.is_string_dtype(original):
+                continue
+            converted = original.where(original.isna(), original.astype(str))
+        
+        if (converted.isna() & original.notna()).any():
+            continue
+        df[column] = converted
+    
+    return df
+
+def _read_csv_typed(source, file_path, **kwargs):
+    """Parse a CSV source with the registered schema of a table"""
+    df = pd.read_csv(source, dtype=_text_columns(file_path), **kwargs)
+    return _apply_schema(df, file_path)
+
+def _expand_categories(df):
+    """Convert categorical columns back to their plain dtype"""
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(df[column].cat.categories.dtype)
+    return df
+
+def _load_table(file_path, columns=None, where=None):
+    """
+    Carrega uma tabela através do cache de tabelas do processo.
+    
+    O DataFrame interpretado fica guardado no cache, já com os tipos do
+    TABLE_SCHEMAS, e nunca é entregue diretamente: cada chamada recebe uma
+    cópia, pois as páginas costumam adicionar ou converter colunas nos
+    DataFrames carregados. As colunas categóricas ficam compactas no cache,
+    mas voltam a ser texto na cópia, já que as páginas atribuem novos
+    valores (status, categoria) que não estão entre as categorias.
+    
+    Com columns e/ou where, só as colunas e linhas pedidas são lidas (veja
+    _read_projected).
+    
+    Args:
+        file_path: Caminho do arquivo da tabela (ex.: ANIMALS_FILE)
+        columns: Lista de colunas a carregar (padrão: todas)
+        where: Dicionário {coluna: valor ou lista de valores} com os filtros
+            de igualdade das linhas
+        
+    Returns:
+        DataFrame: Cópia da tabela em cache, ou a parte pedida da tabela
+    """
+    if columns is None and where is None:
+        return _expand_categories(_cached_table(file_path).copy())
+    return _expand_categories(_read_projected(file_path, columns, where))
+
+# Linhas do CSV interpretadas por vez nas leituras com filtro
+PROJECTION_CHUNK_ROWS = 50000
+
+def _where_mask(df, where):
+    """Return the boolean mask of the rows matching every equality filter"""
+    mask = pd.Series(True, index=df.index)
+    for column, value in (where or {}).items():
+        if column not in df.columns:
+            return pd.Series(False, index=df.index)
+        if isinstance(value, (list, tuple, set, pd.Series, np.ndarray)):
+            mask &= df[column].isin(list(value))
+        else:
+            mask &= df[column] == value
+    return mask
+
+def _read_projected(file_path, columns=None, where=None):
+    """
+    Lê apenas algumas colunas e/ou as linhas que atendem a filtros de igualdade.
+    
+    Uma tabela que já está em dia no cache é só recortada. Caso contrário o
+    cache completo não é montado: no SQLite a projeção e os filtros vão para
+    a consulta SQL; no CSV só as colunas necessárias são interpretadas, em
+    blocos de PROJECTION_CHUNK_ROWS linhas filtrados à medida que são lidos.
+    Colunas pedidas que não existem na tabela voltam vazias.
+    """
+    signature = _table_signature(file_path)
+    with _table_cache_lock:
+        cached = _table_cache.get(file_path)
+    
+    needed = None
+    if columns is not None:
+        needed = list(dict.fromkeys(list(columns) + list((where or {}).keys())))
+    
+    if cached is not None and cached[0] == signature:
+        df = cached[1]
+        df = df[_where_mask(df, where)] if where else df
+    elif get_storage_backend() == 'sqlite':
+        df = _query_sqlite_projected(file_path, needed, where)
+    elif _partitioning_enabled(file_path) or _snapshot_enabled(file_path):
+        df = _cached_table(file_path)
+        df = df[_where_mask(df, where)] if where else df
+    else:
+        usecols = (lambda column: column in needed) if needed is not None else None
+        chunks = []
+        for chunk in pd.read_csv(file_path, dtype=_text_columns(file_path), usecols=usecols,
+                                 chunksize=PROJECTION_CHUNK_ROWS):
+            chunk = _apply_schema(chunk, file_path, kinds=('string', 'bool', 'float', 'int', 'datetime'))
+            chunks.append(chunk[_where_mask(chunk, where)] if where else chunk)
+        if chunks:
+            df = pd.concat(chunks, ignore_index=True)
+        else:
+            df = _read_csv_typed(file_path, file_path, usecols=usecols)
+    
+    if columns is not None:
+        df = df.reindex(columns=columns)
+    return df.reset_index(drop=True)
+
+def _query_sqlite_projected(file_path, columns, where):
+    """Run a projected and filtered SELECT on the SQLite table"""
+    table = _table_name(file_path)
+    con = _sqlite_connect()
+    try:
+        existing = [row[1] for row in con.execute(f'PRAGMA table_info("{table}")')]
+        selected = [column for column in (columns or existing) if column in existing]
+        if not selected:
+            return pd.DataFrame()
+        
+        conditions = []
+        params = []
+        for column, value in (where or {}).items():
+            if column not in existing:
+                return pd.DataFrame(columns=selected)
+            values = list(value) if isinstance(value, (list, tuple, set, pd.Series, np.ndarray)) else [value]
+            if not values:
+                return pd.DataFrame(columns=selected)
+            conditions.append(f'"{column}" IN ({", ".join("?" * len(values))})')
+            params.extend(values)
+        
+        sql = 'SELECT ' + ', '.join(f'"{column}"' for column in selected) + f' FROM "{table}"'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        df = pd.read_sql_query(sql, con, params=params)
+    finally:
+        con.close()
+    return _apply_schema(df, file_path)
+
+def _cached_table(file_path):
+    """
+    Return the parsed table kept in the process cache, parsing it if it changed.
+    
+    The returned DataFrame is shared by every session and must not be modified.
+    """
+    signature = _table_signature(file_path)
+    
+    with _table_cache_lock:
+        cached = _table_cache.get(file_path)
+    
+    if cached is None or cached[0] != signature:
+        if get_storage_backend() == 'sqlite':
+            df = _apply_schema(_load_sqlite(_table_name(file_path)), file_path)
+        elif _partitioning_enabled(file_path):
+            df = _read_partitions(file_path)
+        elif _snapshot_enabled(file_path):
+            df = _read_csv_with_snapshot(file_path)
+        else:
+            df = _read_csv_typed(file_path, file_path)
+        cached = (signature, df)
+        with _table_cache_lock:
+            _table_cache[file_path] = cached
+    
+    return cached[1]
+
+def _save_table(df, file_path):
+    """Save a DataFrame to the active storage backend and invalidate its cache entry"""
+    with _file_lock(file_path):
+        if get_storage_backend() == 'sqlite':
+            _save_sqlite(df, _table_name(file_path))
+        elif _partitioning_enabled(file_path):
+            _write_partitions(df, file_path)
+        else:
+            _write_csv_atomic(df, file_path)
+            _remove_table_snapshot(file_path)
+        invalidate_table_cache(file_path)
+
+def _append_table(records, file_path):
+    """
+    Acrescenta registros a uma tabela sem regravá-la por completo.
+    
+    Com 'write_batching' ativo na configuração de armazenamento, inserções
+    concorrentes na mesma tabela são reunidas em uma única escrita.
+    
+    Args:
+        records: Dicionário ou lista de dicionários com os novos registros
+        file_path: Caminho do arquivo da tabela
+    """
+    if isinstance(records, dict):
+        records = [records]
+    if not records:
+        return
+    
+    if _get_storage_config().get('write_batching', False):
+        _append_batched(records, file_path)
+    else:
+        _write_records(records, file_path)
+
+def _write_records(records, file_path):
+    """Append a list of records to a table while holding its write lock"""
+    with _file_lock(file_path):
+        new_rows = pd.DataFrame(records)
+        tracked = file_path in DASHBOARD_SOURCES
+        if tracked:
+            previous_signature = _table_signature(file_path) if _table_exists(file_path) else None
+        
+        if get_storage_backend() == 'sqlite':
+            _append_sqlite(new_rows, _table_name(file_path))
+            invalidate_table_cache(file_path)
+        elif _partitioning_enabled(file_path):
+            _append_partitions(new_rows, file_path)
+        else:
+            _append_csv(new_rows, file_path)
+        
+        if tracked:
+            _update_dashboard_aggregates(file_path, previous_signature, new_rows)
+
+def _read_csv_header(file_path):
+    """Return the column names in the header line of a CSV, or None if the file is empty"""
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        header_line = f.readline()
+
+    if not header_line.strip():
+        return None
+
+    return next(csv.reader([header_line]))
+
+def _append_csv(new_rows, file_path):
+    """
+    Acrescenta linhas ao final de um CSV sem reescrever o arquivo inteiro.
+
+    As colunas das novas linhas são conferidas com o cabeçalho existente e
+    reordenadas para segui-lo; colunas ausentes ficam vazias. Se o arquivo
+    não existir, for vazio ou as linhas trouxerem colunas que não estão no
+    cabeçalho, a tabela é regravada por completo com _save_table.
+
+    Args:
+        new_rows: DataFrame com os novos registros
+        file_path: Caminho do arquivo CSV
+    """
+    header = _read_csv_header(file_path) if os.path.exists(file_path) else None
+
+    if header is None:
+        _save_table(new_rows, file_path)
+        return
+
+    if not set(new_rows.columns).issubset(header):
+        # Mudança de esquema: regrava a tabela com as novas colunas
+        existing_df = _load_table(file_path)
+        _save_table(pd.concat([existing_df, new_rows], ignore_index=True), file_path)
+        return
+
+    rows_text = new_rows.reindex(columns=header).to_csv(index=False, header=False)
+
+    with _table_cache_lock:
+        previous_signature = _file_signature(file_path)
+
+        with open(file_path, 'rb+') as f:
+            # Garante que a nova linha não seja colada à última linha existente
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+            f.write(rows_text.encode('utf-8'))
+
+        # Mantém o cache atualizado incrementalmente quando ele estava em dia
+        cached = _table_cache.pop(file_path, None)
+        if cached is not None and cached[0] == previous_signature:
+            appended_df = _read_csv_typed(io.StringIO(rows_text), file_path,
+                                          header=None, names=header)
+            if not cached[1].empty:
+                appended_df = pd.concat([cached[1], appended_df], ignore_index=True)
+                appended_df = _apply_schema(appended_df, file_path, kinds=('category',))
+            _table_cache[file_path] = (_file_signature(file_path), appended_df)
+
+def invalidate_table_cache(file_path=None):
+    """
+    Remove tabelas do cache em memória.
+    
+    Args:
+        file_path: Caminho do arquivo a invalidar. Se None, limpa todo o cache.
+    """
+    with _table_cache_lock:
+        if file_path is None:
+            _table_cache.clear()
+        else:
+            _table_cache.pop(file_path, None)
+
+# Backend SQLite
+def _sqlite_connect():
+    """Open a connection to the configured SQLite database"""
+    db_path = _get_storage_config()['sqlite_path']
+    db_dir = os.path.dirname(db_path)
+    if db_dir and not os.path.exists(db_dir):
+        os.makedirs(db_dir)
+    
+    con = sqlite3.connect(db_path, timeout=30)
+    con.execute(
+        'CREATE TABLE IF NOT EXISTS _table_versions '
+        '(tabela TEXT PRIMARY KEY, versao INTEGER NOT NULL)'
+    )
+    return con
+
+def _sqlite_table_exists(table):
+    """Check if a table exists in the SQLite database"""
+    con = _sqlite_connect()
+    try:
+        row = con.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        return row is not None
+    finally:
+        con.close()
+
+def _sqlite_table_version(table):
+    """Return the write counter of a SQLite table, bumped on every save/append"""
+    con = _sqlite_connect()
+    try:
+        row = con.execute(
+            'SELECT versao FROM _table_versions WHERE tabela = ?', (table,)
+        ).fetchone()
+        return row[0] if row else 0
+    finally:
+        con.close()
+
+def _sqlite_bump_version(con, table):
+    """Increment the write counter of a SQLite table"""
+    con.execute(
+        'INSERT INTO _table_versions (tabela, versao) VALUES (?, 1) '
+        'ON CONFLICT(tabela) DO UPDATE SET versao = versao + 1',
+        (table,)
+    )
+
+def _sqlite_create_indexes(con, table, columns):
+    """Create the standard lookup indexes for a SQLite table"""
+    indexed = [c for c in SQLITE_INDEXED_COLUMNS if c in columns]
+    date_column = TABLE_DATE_COLUMNS.get(table)
+    if date_column in columns:
+        indexed.append(date_column)
+    
+    for column in indexed:
+        con.execute(
+            f'CREATE INDEX IF NOT EXISTS "idx_{table}_{column}" ON "{table}" ("{column}")'
+        )
+
+def _load_sqlite(table):
+    """Load a whole table from the SQLite database"""
+    con = _sqlite_connect()
+    try:
+        return pd.read_sql_query(f'SELECT * FROM "{table}"', con)
+    finally:
+        con.close()
+
+def _save_sqlite(df, table):
+    """
+    Substitui uma tabela SQLite pelo conteúdo do DataFrame.
+    
+    Os dados são gravados primeiro em uma tabela temporária, que só então
+    substitui a original, para que uma falha no meio da gravação não
+    deixe a tabela pela metade.
+    """
+    staging_table = f"{table}__staging"
+    con = _sqlite_connect()
+    try:
+        con.execute(f'DROP TABLE IF EXISTS "{staging_table}"')
+        df.to_sql(staging_table, con, index=False)
+        with con:
+            con.execute(f'DROP TABLE IF EXISTS "{table}"')
+            con.execute(f'ALTER TABLE "{staging_table}" RENAME TO "{table}"')
+            _sqlite_create_indexes(con, table, list(df.columns))
+            _sqlite_bump_version(con, table)
+    finally:
+        con.close()
+
+def _append_sqlite(new_rows, table):
+    """Insert rows into a SQLite table, adding any new columns first"""
+    if not _sqlite_table_exists(table):
+        _save_sqlite(new_rows, table)
+        return
+    
+    con = _sqlite_connect()
+    try:
+        existing_columns = [row[1] for row in con.execute(f'PRAGMA table_info("{table}")')]
+        with con:
+            for column in new_rows.columns:
+                if column not in existing_columns:
+                    con.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}"')
+        new_rows.to_sql(table, con, index=False, if_exists='append')
+        with con:
+            _sqlite_bump_version(con, table)
+    finally:
+        con.close()
+
+def list_data_tables():
+    """Return the paths of all data tables managed by this module"""
+    return sorted({
+        value for name, value in globals().items()
+        if name.endswith('_FILE') and isinstance(value, str) and value.endswith('.csv')
+    })
+
+def query_table(file_path, id_animal=None, id_lote=None, start_date=None, end_date=None,
+                date_column=None):
+    """
+    Consulta uma tabela filtrando por animal, lote e/ou período.
+    
+    No backend SQLite a filtragem é feita no banco, usando os índices das
+    colunas; no backend CSV a tabela em cache é filtrada em memória.
+    
+    Args:
+        file_path: Caminho do arquivo da tabela (ex.: RECRIA_PESAGENS_FILE)
+        id_animal: Filtrar pelo ID do animal
+        id_lote: Filtrar pelo ID do lote
+        start_date: Data inicial do período (inclusive)
+        end_date: Data final do período (inclusive)
+        date_column: Coluna de data usada no filtro (padrão: TABLE_DATE_COLUMNS)
+        
+    Returns:
+        DataFrame: Registros que atendem aos filtros
+    """
+    table = _table_name(file_path)
+    if date_column is None:
+        date_column = TABLE_DATE_COLUMNS.get(table)
+    
+    if not _table_exists(file_path):
+        return pd.DataFrame()
+    
+    # Limites do período como texto ISO: o fim é exclusivo no dia seguinte
+    # para incluir registros com hora na data final
+    start_text = pd.to_datetime(start_date).strftime('%Y-%m-%d') if start_date is not None else None
+    end_text = ((pd.to_datetime(end_date) + timedelta(days=1)).strftime('%Y-%m-%d')
+                if end_date is not None else None)
+    
+    if get_storage_backend() == 'sqlite':
+        conditions = []
+        params = []
+        if id_animal is not None:
+            conditions.append('"id_animal" = ?')
+            params.append(id_animal)
+        if id_lote is not None:
+            conditions.append('"id_lote" = ?')
+            params.append(id_lote)
+        if date_column and start_text:
+            conditions.append(f'"{date_column}" >= ?')
+            params.append(start_text)
+        if date_column and end_text:
+            conditions.append(f'"{date_column}" < ?')
+            params.append(end_text)
+        
+        sql = f'SELECT * FROM "{table}"'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        
+        con = _sqlite_connect()
+        try:
+            df = pd.read_sql_query(sql, con, params=params)
+        finally:
+            con.close()
+        return _expand_categories(_apply_schema(df, file_path))
+    
+    if (_partitioning_enabled(file_path) and (start_text or end_text)
+            and date_column == TABLE_DATE_COLUMNS.get(table)):
+        # Só as partições que cruzam o período são lidas
+        df = _expand_categories(_read_partitions(file_path, start_date, end_date))
+    else:
+        df = _load_table(file_path)
+    mask = pd.Series(True, index=df.index)
+    if id_animal is not None:
+        mask &= df['id_animal'] == id_animal
+    if id_lote is not None:
+        mask &= df['id_lote'] == id_lote
+    if date_column and (start_text or end_text):
+        dates = pd.to_datetime(df[date_column], errors='coerce')
+        if start_text:
+            mask &= dates >= pd.to_datetime(start_text)
+        if end_text:
+            mask &= dates < pd.to_datetime(end_text)
+    
+    return df[mask].reset_index(drop=True)
+
+# Índices de rótulos: mapas id → rótulo das tabelas de cadastro, montados uma
+# única vez por versão da tabela e aplicados com Series.map, em vez de filtrar o
+# DataFrame inteiro para cada linha exibida.
+_lookup_cache = {}
+_lookup_cache_lock = threading.Lock()
+
+def get_lookup(file_path, key_column, value_column):
+    """
+    Retorna o mapa chave → valor de uma tabela, reaproveitado enquanto ela não mudar.
+    
+    Quando a chave se repete, vale a primeira ocorrência, como em
+    df[df[chave] == x][valor].iloc[0].
+    
+    Args:
+        file_path: Caminho da tabela (ex.: ANIMALS_FILE)
+        key_column: Coluna de identificação (ex.: 'id_animal')
+        value_column: Coluna com o rótulo (ex.: 'identificacao')
+        
+    Returns:
+        Series: Valores indexados pela chave
+    """
+    if not _table_exists(file_path):
+        return pd.Series(dtype=object)
+    
+    signature = _table_signature(file_path)
+    cache_key = (file_path, key_column, value_column)
+    with _lookup_cache_lock:
+        cached = _lookup_cache.get(cache_key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    
+    # Só as duas colunas do mapa são lidas quando a tabela não está em cache
+    df = _read_projected(file_path, [key_column, value_column])
+    if df[key_column].isna().all() or df[value_column].isna().all():
+        lookup = pd.Series(dtype=object)
+    else:
+        lookup = df.dropna(subset=[key_column])
+        lookup = lookup.drop_duplicates(key_column).set_index(key_column)[value_column]
+        if isinstance(lookup.dtype, pd.CategoricalDtype):
+            lookup = lookup.astype(lookup.cat.categories.dtype)
+    
+    with _lookup_cache_lock:
+        _lookup_cache[cache_key] = (signature, lookup)
+    return lookup
+
+def map_labels(ids, file_path, key_column, value_column='identificacao', default=None):
+    """
+    Converte uma coluna de IDs nos rótulos correspondentes de outra tabela.
+    
+    Args:
+        ids: Series com os IDs
+        file_path: Tabela de onde vêm os rótulos
+        key_column: Coluna de identificação na tabela
+        value_column: Coluna com o rótulo
+        default: Valor para IDs não encontrados
+        
+    Returns:
+        Series: Rótulos, no mesmo índice de ids
+    """
+    labels = ids.map(get_lookup(file_path, key_column, value_column))
+    if default is not None:
+        labels = labels.where(labels.notna(), default)
+    return labels
+
+def animal_labels(ids, column='identificacao', default="Desconhecido"):
+    """Map animal IDs to their identification (or another animals column)"""
+    return map_labels(ids, ANIMALS_FILE, 'id_animal', column, default)
+
+def pen_labels(ids, column='identificacao', default="Desconhecida"):
+    """Map pen IDs to their identification"""
+    return map_labels(ids, PENS_FILE, 'id_baia', column, default)
+
+def nursery_batch_labels(ids, column='identificacao', default="Desconhecido"):
+    """Map nursery batch IDs to their identification"""
+    return map_labels(ids, NURSERY_BATCHES_FILE, 'id_lote', column, default)
+
+def recria_batch_labels(ids, column='codigo', default="Desconhecido"):
+    """Map recria batch IDs to their code"""
+    return map_labels(ids, RECRIA_LOTES_FILE, 'id_lote', column, default)
+
+def employee_labels(ids, column='nome', default="Desconhecido"):
+    """Map employee IDs to their name"""
+    return map_labels(ids, EMPLOYEES_FILE, 'id_colaborador', column, default)
+
+# Transações entre várias tabelas
+def _records_frame(records, file_path):
+    """Build a DataFrame from raw records with the same dtypes as the loaded table"""
+    # Os registros pendentes trazem datas como texto; sem a conversão a
+    # coluna misturaria Timestamp e str e não poderia ser ordenada
+    return _expand_categories(_apply_schema(pd.DataFrame(records), file_path))
+
+class TableTransaction:
+    """
+    Unidade de trabalho que prepara alterações em várias tabelas na memória.
+    
+    As tabelas carregadas com load() e os registros acrescentados com append()
+    ficam pendentes até commit(), que grava cada tabela uma única vez com os
+    locks de escrita de todas elas adquiridos. Se alguma gravação falhar, as
+    tabelas já gravadas voltam ao conteúdo anterior. Normalmente é usada
+    através de table_transaction().
+    """
+    
+    def __init__(self):
+        self._frames = {}
+        self._appends = {}
+        self._dirty = set()
+    
+    def load(self, file_path):
+        """Return the staged DataFrame of a table, loading it on first use"""
+        if file_path not in self._frames:
+            if _table_exists(file_path):
+                self._frames[file_path] = _load_table(file_path)
+            else:
+                self._frames[file_path] = _empty_table(file_path)
+        
+        pending = self._appends.pop(file_path, None)
+        if pending:
+            self._frames[file_path] = pd.concat(
+                [self._frames[file_path], _records_frame(pending, file_path)], ignore_index=True
+            )
+            self._dirty.add(file_path)
+        return self._frames[file_path]
+    
+    def save(self, file_path, df):
+        """Stage the new contents of a table"""
+        self._frames[file_path] = df
+        self._appends.pop(file_path, None)
+        self._dirty.add(file_path)
+    
+    def append(self, file_path, records):
+        """Stage records to be appended to a table"""
+        if isinstance(records, dict):
+            records = [records]
+        self._appends.setdefault(file_path, []).extend(records)
+    
+    def query(self, file_path, id_animal=None, id_lote=None):
+        """Query a table by animal and/or batch, including the changes staged so far"""
+        if file_path in self._frames:
+            df = self.load(file_path)
+        else:
+            if _table_exists(file_path):
+                df = query_table(file_path, id_animal=id_animal, id_lote=id_lote)
+            else:
+                df = _empty_table(file_path)
+            pending = self._appends.get(file_path)
+            if pending:
+                df = pd.concat([df, _records_frame(pending, file_path)], ignore_index=True)
+        
+        mask = pd.Series(True, index=df.index)
+        if id_animal is not None:
+            mask &= df['id_animal'] == id_animal
+        if id_lote is not None:
+            mask &= df['id_lote'] == id_lote
+        return df[mask].reset_index(drop=True)
+    
+    def commit(self):
+        """Write every staged table once, restoring the written ones if a write fails"""
+        tables = sorted(self._dirty | set(self._appends))
+        
+        with table_lock(*tables):
+            backups = {}
+            try:
+                for file_path in tables:
+                    backups[file_path] = self._backup(file_path)
+                    if file_path in self._dirty:
+                        _save_table(self.load(file_path), file_path)
+                    else:
+                        _write_records(self._appends[file_path], file_path)
+            except Exception:
+                for file_path, backup in backups.items():
+                    self._restore(file_path, backup)
+                raise
+            finally:
+                self.rollback()
+    
+    def rollback(self):
+        """Discard every staged change"""
+        self._frames = {}
+        self._appends = {}
+        self._dirty = set()
+    
+    def _backup(self, file_path):
+        """Capture what is needed to restore a table to its current contents"""
+        if not _table_exists(file_path):
+            return ('missing', None)
+        if (get_storage_backend() == 'csv' and file_path not in self._dirty
+                and not _partitioning_enabled(file_path)):
+            # Tabela só com inserções: basta voltar ao tamanho anterior do CSV
+            return ('size', os.path.getsize(file_path))
+        return ('frame', _load_table(file_path))
+    
+    def _restore(self, file_path, backup):
+        """Restore a table from a backup taken by _backup"""
+        kind, value = backup
+        if kind == 'frame':
+            _save_table(value, file_path)
+        elif kind == 'size':
+            os.truncate(file_path, value)
+        elif _partitioning_enabled(file_path):
+            if os.path.exists(_partition_dir(file_path)):
+                shutil.rmtree(_partition_dir(file_path))
+        elif get_storage_backend() == 'sqlite':
+            con = _sqlite_connect()
+            try:
+                with con:
+                    con.execute(f'DROP TABLE IF EXISTS "{_table_name(file_path)}"')
+            finally:
+                con.close()
+        elif os.path.exists(file_path):
+            os.remove(file_path)
+        invalidate_table_cache(file_path)
+
+@contextmanager
+def table_transaction(*file_paths):
+    """
+    Abre uma transação entre várias tabelas.
+    
+    As tabelas indicadas ficam bloqueadas para escrita desde o início, de modo
+    que nada do que foi carregado na transação mude antes do commit. Ao fim do
+    bloco as alterações são gravadas; se o bloco lançar uma exceção, elas são
+    descartadas.
+    
+    Args:
+        *file_paths: Tabelas que serão lidas e alteradas na transação
+        
+    Exemplo:
+        with table_transaction(RECRIA_FILE, RECRIA_PESAGENS_FILE) as transacao:
+            for id_animal in animais:
+                transferir_animal_recria(id_animal, ..., transacao=transacao)
+    """
+    transaction = TableTransaction()
+    with table_lock(*file_paths):
+        try:
+            yield transaction
+        except BaseException:
+            transaction.rollback()
+            raise
+        transaction.commit()
+
+@contextmanager
+def _unit_of_work(transacao, *file_paths):
+    """Use the caller's transaction, or open one that commits when the block ends"""
+    if transacao is not None:
+        yield transacao
+    else:
+        with table_transaction(*file_paths) as transaction:
+            yield transaction
+
+# Snapshots Parquet das tabelas de histórico.
+# As tabelas de pesagens, detecções de cio e vacinações só crescem no fim do
+# arquivo. O snapshot guarda, em Parquet e com tipos explícitos, o conteúdo do
+# CSV até um determinado byte; na leitura basta abrir o snapshot e interpretar
+# apenas as linhas acrescentadas depois dele.
+SNAPSHOT_DIR = "data/snapshots"
+SNAPSHOT_ROW_GROUP_SIZE = 50000
+SNAPSHOT_MAX_TAIL_ROWS = 10000
+
+# Tabelas lidas através de snapshot; os tipos vêm do TABLE_SCHEMAS
+SNAPSHOT_TABLES = {RECRIA_PESAGENS_FILE, HEAT_RECORDS_FILE, VACCINATION_RECORDS_FILE}
+
+def _snapshot_enabled(file_path):
+    """Check if a table is read through a Parquet snapshot"""
+    return (
+        pq is not None
+        and get_storage_backend() == 'csv'
+        and _get_storage_config().get('parquet_snapshots', False)
+        and file_path in SNAPSHOT_TABLES
+        and not _partitioning_enabled(file_path)
+    )
+
+def _snapshot_path(file_path):
+    """Return the Parquet snapshot path of a table"""
+    return os.path.join(SNAPSHOT_DIR, _table_name(file_path) + ".parquet")
+
+def _prefix_checksum(data):
+    """Return the checksum of the last 4 KB of a byte prefix, used to detect rewrites"""
+    return zlib.crc32(data[-4096:])
+
+def _write_table_snapshot(df, file_path, source_size, source_checksum):
+    """Write a typed DataFrame as the Parquet snapshot of a table"""
+    if not os.path.exists(SNAPSHOT_DIR):
+        os.makedirs(SNAPSHOT_DIR)
+    
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'suinocultura_source_size'] = str(source_size).encode()
+    metadata[b'suinocultura_source_checksum'] = str(source_checksum).encode()
+    table = table.replace_schema_metadata(metadata)
+    
+    # Grava em arquivo temporário e substitui, para nunca deixar um snapshot incompleto
+    snapshot_path = _snapshot_path(file_path)
+    temp_path = snapshot_path + ".tmp"
+    pq.write_table(table, temp_path, row_group_size=SNAPSHOT_ROW_GROUP_SIZE)
+    os.replace(temp_path, snapshot_path)
+
+def _remove_table_snapshot(file_path):
+    """Remove the Parquet snapshot of a table, if any"""
+    snapshot_path = _snapshot_path(file_path)
+    if os.path.exists(snapshot_path):
+        os.remove(snapshot_path)
+
+def build_table_snapshot(file_path):
+    """
+    Gera (ou regenera) o snapshot Parquet de uma tabela de histórico.
+    
+    Args:
+        file_path: Caminho do CSV (ex.: RECRIA_PESAGENS_FILE)
+        
+    Returns:
+        DataFrame: Tabela completa com os tipos explícitos aplicados
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    
+    df = _read_csv_typed(io.BytesIO(data), file_path)
+    
+    if pq is not None:
+        _write_table_snapshot(df, file_path, len(data), _prefix_checksum(data))
+    
+    return df
+
+def _snapshot_source_offset(file_path):
+    """
+    Verifica se o snapshot ainda corresponde ao início do CSV.
+    
+    Returns:
+        int: Byte do CSV até onde o snapshot vai, ou None se ele não existir
+        ou se o CSV tiver sido regravado depois dele
+    """
+    snapshot_path = _snapshot_path(file_path)
+    if not os.path.exists(snapshot_path):
+        return None
+    
+    metadata = pq.read_schema(snapshot_path).metadata or {}
+    try:
+        source_size = int(metadata[b'suinocultura_source_size'])
+        source_checksum = int(metadata[b'suinocultura_source_checksum'])
+    except (KeyError, ValueError):
+        return None
+    
+    if os.path.getsize(file_path) < source_size:
+        return None
+    
+    with open(file_path, 'rb') as f:
+        f.seek(max(source_size - 4096, 0))
+        prefix_end = f.read(source_size - max(source_size - 4096, 0))
+    
+    if _prefix_checksum(prefix_end) != source_checksum:
+        return None
+    
+    return source_size
+
+def _read_csv_tail(file_path, offset):
+    """Parse the rows appended to a CSV after the given byte offset"""
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        tail = f.read()
+    
+    if not tail.strip():
+        return None
+    
+    return _read_csv_typed(io.BytesIO(tail), file_path,
+                           header=None, names=_read_csv_header(file_path))
+
+def _read_csv_with_snapshot(file_path, columns=None, start_date=None, end_date=None):
+    """
+    Lê uma tabela de histórico combinando o snapshot Parquet e as linhas novas do CSV.
+    
+    Sem filtros, um snapshot ausente ou desatualizado é regenerado, assim como
+    um snapshot cujo CSV acumulou mais de SNAPSHOT_MAX_TAIL_ROWS linhas novas.
+    """
+    date_column = TABLE_DATE_COLUMNS.get(_table_name(file_path))
+    offset = _snapshot_source_offset(file_path)
+    
+    if offset is None:
+        df = build_table_snapshot(file_path)
+        return _filter_snapshot_frame(df, columns, date_column, start_date, end_date)
+    
+    filters = []
+    if start_date is not None:
+        filters.append((date_column, '>=', pd.Timestamp(start_date)))
+    if end_date is not None:
+        filters.append((date_column, '<', pd.Timestamp(end_date) + timedelta(days=1)))
+    
+    # Os filtros de data usam as estatísticas de cada row group para pular blocos inteiros
+    df = pq.read_table(
+        _snapshot_path(file_path),
+        columns=columns,
+        filters=filters or None
+    ).to_pandas()
+    
+    tail_df = _read_csv_tail(file_path, offset)
+    if tail_df is None:
+        return df
+    
+    if columns is None and start_date is None and end_date is None and len(tail_df) > SNAPSHOT_MAX_TAIL_ROWS:
+        return build_table_snapshot(file_path)
+    
+    tail_df = _filter_snapshot_frame(tail_df, columns, date_column, start_date, end_date)
+    df = pd.concat([df, tail_df], ignore_index=True)
+    return _apply_schema(df, file_path, kinds=('category',))
+
+def _filter_snapshot_frame(df, columns, date_column, start_date, end_date):
+    """Apply column projection and date range filters to an in-memory history frame"""
+    if start_date is not None:
+        df = df[df[date_column] >= pd.Timestamp(start_date)]
+    if end_date is not None:
+        df = df[df[date_column] < pd.Timestamp(end_date) + timedelta(days=1)]
+    if columns is not None:
+        df = df[columns]
+    return df.reset_index(drop=True)
+
+def load_table_snapshot(file_path, columns=None, start_date=None, end_date=None):
+    """
+    Carrega uma tabela de histórico pelo snapshot Parquet, lendo só o necessário.
+    
+    Apenas as colunas pedidas são lidas e os row groups fora do período são
+    descartados pelas estatísticas do Parquet. Se o snapshot não estiver
+    disponível (pyarrow ausente ou snapshots desativados), a tabela é lida
+    normalmente e filtrada em memória.
+    
+    Args:
+        file_path: Caminho da tabela (RECRIA_PESAGENS_FILE, HEAT_RECORDS_FILE
+            ou VACCINATION_RECORDS_FILE)
+        columns: Lista de colunas a carregar (padrão: todas)
+        start_date: Data inicial do período (inclusive)
+        end_date: Data final do período (inclusive)
+        
+    Returns:
+        DataFrame: Registros do período com as colunas pedidas
+    """
+    if not _table_exists(file_path):
+        return pd.DataFrame(columns=columns)
+    
+    if _snapshot_enabled(file_path):
+        return _read_csv_with_snapshot(file_path, columns, start_date, end_date)
+    
+    if _partitioning_enabled(file_path):
+        return load_partitions(file_path, start_date, end_date, columns)
+    
+    df = query_table(file_path, start_date=start_date, end_date=end_date)
+    return df[columns] if columns is not None else df
+
+# Particionamento por período das tabelas de histórico.
+# Pesagens, detecções de cio, movimentações da creche, mortalidade e vacinações
+# só crescem, e quase todas as telas olham para um período recente. Com
+# 'partitioned_storage' ativo, cada uma dessas tabelas é guardada em
+# PARTITIONS_DIR/<tabela>/, um CSV por período ('partition_period': 'M' para
+# mês, 'Q' para trimestre ou 'Y' para ano) da sua coluna de data, e um
+# manifest.json com o intervalo de datas e o número de linhas de cada partição.
+# As consultas por período abrem só as partições que cruzam o intervalo.
+# Partições antigas podem ser compactadas em partições maiores ou arquivadas
+# (comprimidas e fora da leitura normal da tabela).
+PARTITIONS_DIR = "data/partitions"
+PARTITION_MANIFEST = "manifest.json"
+UNDATED_PARTITION = "sem_data"
+
+PARTITIONED_TABLES = {
+    RECRIA_PESAGENS_FILE,
+    HEAT_RECORDS_FILE,
+    NURSERY_MOVEMENTS_FILE,
+    MORTALITY_FILE,
+    VACCINATION_RECORDS_FILE
+}
+
+# Partições já interpretadas, por (tabela, partição), com a assinatura do arquivo
+_partition_cache = {}
+
+def _partitioning_enabled(file_path):
+    """Check if a table is stored in date partitions"""
+    return (
+        get_storage_backend() == 'csv'
+        and _get_storage_config().get('partitioned_storage', False)
+        and file_path in PARTITIONED_TABLES
+    )
+
+def _partition_dir(file_path):
+    """Return the directory holding the partitions of a table"""
+    return os.path.join(PARTITIONS_DIR, _table_name(file_path))
+
+def _manifest_path(file_path):
+    """Return the manifest path of a partitioned table"""
+    return os.path.join(_partition_dir(file_path), PARTITION_MANIFEST)
+
+def _read_manifest(file_path):
+    """Read the manifest of a partitioned table"""
+    with open(_manifest_path(file_path), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_manifest(file_path, manifest):
+    """Atomically replace the manifest of a partitioned table"""
+    manifest_path = _manifest_path(file_path)
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, manifest_path)
+
+def _partition_file(file_path, key, archived=False):
+    """Return the file of a partition (archived partitions are gzip-compressed)"""
+    name = f"{_table_name(file_path)}_{key}.csv"
+    if archived:
+        return os.path.join(_partition_dir(file_path), "archive", name + ".gz")
+    return os.path.join(_partition_dir(file_path), name)
+
+def _partition_bounds(key):
+    """Return the first and last day covered by a partition key, or (None, None) if undated"""
+    if key == UNDATED_PARTITION:
+        return None, None
+    period = pd.Period(key)
+    return period.start_time.strftime('%Y-%m-%d'), period.end_time.strftime('%Y-%m-%d')
+
+def _sorted_partitions(partitions):
+    """Return the partition keys in date order, undated rows first"""
+    return sorted(partitions, key=lambda key: (partitions[key]['inicio'] or '', key))
+
+def _assign_partitions(df, file_path, manifest):
+    """
+    Define a partição de cada linha pela sua coluna de data.
+    
+    Linhas cuja data cai dentro de uma partição ativa existente (por exemplo,
+    uma partição anual compactada) vão para ela; as demais vão para a partição
+    do período configurado. Linhas sem data válida ficam em UNDATED_PARTITION.
+    """
+    date_column = TABLE_DATE_COLUMNS[_table_name(file_path)]
+    if date_column in df.columns:
+        dates = _as_datetime(df[date_column])
+    else:
+        dates = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+    
+    keys = dates.dt.to_period(manifest['periodo']).astype(str)
+    keys[dates.isna()] = UNDATED_PARTITION
+    
+    # Partições mais largas que o período configurado (compactadas)
+    for key, info in manifest['particoes'].items():
+        if info['inicio'] is None or _partition_bounds(key) == _partition_bounds(
+                str(pd.Period(info['inicio'], freq=manifest['periodo']))):
+            continue
+        inside = (dates >= pd.Timestamp(info['inicio'])) & (dates < pd.Timestamp(info['fim']) + timedelta(days=1))
+        keys[inside] = key
+    
+    return keys
+
+def _write_partitions(df, file_path, keep_archived=True):
+    """Rewrite every active partition of a table from a full DataFrame"""
+    directory = _partition_dir(file_path)
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    
+    if os.path.exists(_manifest_path(file_path)):
+        manifest = _read_manifest(file_path)
+    else:
+        manifest = {'tabela': _table_name(file_path), 'particoes': {}, 'arquivadas': {}}
+    manifest['periodo'] = manifest.get('periodo') or _get_storage_config().get('partition_period', 'M')
+    manifest['colunas'] = [str(column) for column in df.columns]
+    if not keep_archived:
+        manifest['arquivadas'] = {}
+    
+    keys = _assign_partitions(df, file_path, manifest)
+    old_partitions = manifest['particoes']
+    manifest['particoes'] = {}
+    
+    for key, rows in df.groupby(keys.values, sort=True):
+        _write_csv_atomic(rows, _partition_file(file_path, key))
+        info = old_partitions.get(key)
+        if info is None:
+            inicio, fim = _partition_bounds(key)
+            info = {'arquivo': os.path.basename(_partition_file(file_path, key)),
+                    'inicio': inicio, 'fim': fim}
+        info['linhas'] = len(rows)
+        manifest['particoes'][key] = info
+    
+    for key in set(old_partitions) - set(manifest['particoes']):
+        partition_path = _partition_file(file_path, key)
+        if os.path.exists(partition_path):
+            os.remove(partition_path)
+    
+    _write_manifest(file_path, manifest)
+
+def _ensure_partitioned(file_path):
+    """Move a table kept in a single CSV into partitions the first time it is used partitioned"""
+    # Sem 'partitioned_storage' a tabela continua sendo lida do CSV, que não
+    # pode ser removido
+    if not _partitioning_enabled(file_path):
+        return
+    if os.path.exists(_manifest_path(file_path)) or not os.path.exists(file_path):
+        return
+    
+    with _file_lock(file_path):
+        if os.path.exists(_manifest_path(file_path)) or not os.path.exists(file_path):
+            return
+        _write_partitions(_read_csv_typed(file_path, file_path), file_path)
+        os.remove(file_path)
+        _remove_table_snapshot(file_path)
+        invalidate_table_cache(file_path)
+
+def _partitioned_table_exists(file_path):
+    """Check if a partitioned table exists, partitioning its CSV if needed"""
+    _ensure_partitioned(file_path)
+    return os.path.exists(_manifest_path(file_path))
+
+def _read_partition(file_path, key, archived=False):
+    """Parse one partition, reusing the cached frame while its file is unchanged"""
+    partition_path = _partition_file(file_path, key, archived)
+    signature = _file_signature(partition_path)
+    
+    with _table_cache_lock:
+        cached = _partition_cache.get((file_path, key, archived))
+    
+    if cached is None or cached[0] != signature:
+        cached = (signature, _read_csv_typed(partition_path, file_path))
+        with _table_cache_lock:
+            _partition_cache[(file_path, key, archived)] = cached
+    
+    return cached[1]
+
+def _read_partitions(file_path, start_date=None, end_date=None, include_archived=False):
+    """
+    Lê as partições de uma tabela que cruzam um período.
+    
+    As partições são escolhidas pelo intervalo de datas do manifesto; as
+    linhas das partições escolhidas ainda são filtradas pela data, de modo
+    que o resultado contém apenas o período pedido. Linhas sem data só
+    entram quando não há período.
+    """
+    manifest = _read_manifest(file_path)
+    start = pd.Timestamp(start_date).strftime('%Y-%m-%d') if start_date is not None else None
+    end = pd.Timestamp(end_date).strftime('%Y-%m-%d') if end_date is not None else None
+    
+    def overlaps(info):
+        if info['inicio'] is None:
+            return start is None and end is None
+        return (start is None or info['fim'] >= start) and (end is None or info['inicio'] <= end)
+    
+    groups = [(manifest['particoes'], False)]
+    if include_archived:
+        groups.insert(0, (manifest.get('arquivadas', {}), True))
+    
+    frames = [
+        _read_partition(file_path, key, archived)
+        for partitions, archived in groups
+        for key in _sorted_partitions(partitions)
+        if overlaps(partitions[key])
+    ]
+    
+    if not frames:
+        df = _empty_table(file_path).reindex(columns=manifest['colunas'])
+    elif len(frames) == 1:
+        df = frames[0].copy()
+    else:
+        df = _apply_schema(pd.concat(frames, ignore_index=True), file_path, kinds=('category',))
+    
+    if start_date is not None or end_date is not None:
+        date_column = TABLE_DATE_COLUMNS[_table_name(file_path)]
+        df = _filter_snapshot_frame(df, None, date_column, start_date, end_date)
+    return df
+
+def _append_partitions(new_rows, file_path):
+    """
+    Acrescenta linhas às partições de uma tabela sem regravá-las.
+    
+    Cada linha vai para o fim do CSV da sua partição e o manifesto é
+    atualizado. Linhas com colunas fora do cabeçalho regravam a tabela.
+    """
+    if not _partitioned_table_exists(file_path):
+        _write_partitions(new_rows, file_path)
+        invalidate_table_cache(file_path)
+        return
+    
+    manifest = _read_manifest(file_path)
+    header = manifest['colunas']
+    if not set(new_rows.columns).issubset(header):
+        existing_df = _load_table(file_path)
+        _save_table(pd.concat([existing_df, new_rows], ignore_index=True), file_path)
+        return
+    
+    new_rows = new_rows.reindex(columns=header)
+    keys = _assign_partitions(new_rows, file_path, manifest)
+    
+    with _table_cache_lock:
+        previous_signature = _table_signature(file_path)
+        last_key = _sorted_partitions(manifest['particoes'])[-1] if manifest['particoes'] else None
+        
+        for key, rows in new_rows.groupby(keys.values, sort=True):
+            partition_path = _partition_file(file_path, key)
+            info = manifest['particoes'].get(key)
+            if info is None:
+                inicio, fim = _partition_bounds(key)
+                info = {'arquivo': os.path.basename(partition_path), 'inicio': inicio,
+                        'fim': fim, 'linhas': 0}
+                manifest['particoes'][key] = info
+            
+            with open(partition_path, 'ab+') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    f.write(rows.to_csv(index=False).encode('utf-8'))
+                else:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        f.write(b'\n')
+                    f.write(rows.to_csv(index=False, header=False).encode('utf-8'))
+            info['linhas'] += len(rows)
+        
+        _write_manifest(file_path, manifest)
+        
+        # O cache da tabela só é atualizado quando as linhas novas ficam no fim
+        # da leitura completa, isto é, todas na última partição
+        cached = _table_cache.pop(file_path, None)
+        if (cached is not None and cached[0] == previous_signature
+                and last_key is not None and set(keys) == {last_key}):
+            rows_text = new_rows.to_csv(index=False, header=False)
+            appended_df = _read_csv_typed(io.StringIO(rows_text), file_path, header=None, names=header)
+            if not cached[1].empty:
+                appended_df = pd.concat([cached[1], appended_df], ignore_index=True)
+                appended_df = _apply_schema(appended_df, file_path, kinds=('category',))
+            _table_cache[file_path] = (_table_signature(file_path), appended_df)
+
+def partition_table(file_path):
+    """
+    Divide o CSV de uma tabela de histórico em partições por período.
+    
+    Normalmente não é necessário chamar esta função: com 'partitioned_storage'
+    ativo, a tabela é particionada no primeiro acesso. Com ele desativado a
+    função lança ValueError, já que a tabela continua sendo lida do CSV.
+    
+    Args:
+        file_path: Caminho da tabela (uma das PARTITIONED_TABLES)
+    """
+    if file_path not in PARTITIONED_TABLES:
+        raise ValueError(f"Tabela sem particionamento: {_table_name(file_path)}")
+    if not _partitioning_enabled(file_path):
+        raise ValueError("Ative 'partitioned_storage' na configuração antes de particionar a tabela")
+    _ensure_partitioned(file_path)
+
+def unpartition_table(file_path, include_archived=True):
+    """
+    Junta as partições de uma tabela de volta em um único CSV.
+    
+    Usada antes de desativar 'partitioned_storage'.
+    
+    Args:
+        file_path: Caminho da tabela
+        include_archived: Incluir as partições arquivadas no CSV
+    """
+    if not os.path.exists(_manifest_path(file_path)):
+        return
+    
+    with _file_lock(file_path):
+        df = _read_partitions(file_path, include_archived=include_archived)
+        _write_csv_atomic(_expand_categories(df), file_path)
+        shutil.rmtree(_partition_dir(file_path))
+        invalidate_table_cache(file_path)
+
+def load_partitions(file_path, start_date=None, end_date=None, columns=None, include_archived=False):
+    """
+    Carrega uma tabela de histórico lendo só as partições do período.
+    
+    Se a tabela não estiver particionada, ela é lida normalmente e filtrada
+    em memória.
+    
+    Args:
+        file_path: Caminho da tabela (ex.: RECRIA_PESAGENS_FILE)
+        start_date: Data inicial do período (inclusive)
+        end_date: Data final do período (inclusive)
+        columns: Lista de colunas a carregar (padrão: todas)
+        include_archived: Incluir as partições arquivadas
+        
+    Returns:
+        DataFrame: Registros do período
+    """
+    if not _partitioning_enabled(file_path):
+        df = query_table(file_path, start_date=start_date, end_date=end_date)
+    elif not _partitioned_table_exists(file_path):
+        df = _empty_table(file_path)
+    else:
+        df = _expand_categories(_read_partitions(file_path, start_date, end_date, include_archived))
+    return df[columns] if columns is not None else df
+
+def _old_partitions(manifest, before):
+    """Return the active partition keys that end before a date"""
+    before = pd.Timestamp(before).strftime('%Y-%m-%d')
+    return [
+        key for key in _sorted_partitions(manifest['particoes'])
+        if manifest['particoes'][key]['fim'] is not None and manifest['particoes'][key]['fim'] < before
+    ]
+
+def compact_partitions(file_path, before, period='Y'):
+    """
+    Junta as partições antigas de uma tabela em partições de um período maior.
+    
+    Args:
+        file_path: Caminho da tabela particionada
+        before: Só partições que terminam antes desta data são compactadas
+        period: Período das partições compactadas ('Q' ou 'Y')
+        
+    Returns:
+        int: Número de partições removidas pela compactação
+    """
+    with _file_lock(file_path):
+        if not _partitioned_table_exists(file_path):
+            return 0
+        
+        manifest = _read_manifest(file_path)
+        groups = {}
+        for key in _old_partitions(manifest, before):
+            target = str(pd.Period(manifest['particoes'][key]['inicio'], freq=period))
+            groups.setdefault(target, []).append(key)
+        
+        removed = 0
+        for target, keys in groups.items():
+            if keys == [target]:
+                continue
+            
+            df = pd.concat([_read_partition(file_path, key) for key in keys], ignore_index=True)
+            inicio, fim = _partition_bounds(target)
+            
+            # Uma partição de mesmo nome (ex.: ano já compactado) é absorvida
+            if target in manifest['particoes'] and target not in keys:
+                df = pd.concat([_read_partition(file_path, target), df], ignore_index=True)
+            
+            _write_csv_atomic(_expand_categories(df), _partition_file(file_path, target))
+            for key in keys:
+                if key != target:
+                    os.remove(_partition_file(file_path, key))
+                    del manifest['particoes'][key]
+                    removed += 1
+            manifest['particoes'][target] = {
+                'arquivo': os.path.basename(_partition_file(file_path, target)),
+                'inicio': inicio, 'fim': fim, 'linhas': len(df)
+            }
+        
+        _write_manifest(file_path, manifest)
+        invalidate_table_cache(file_path)
+        return removed
+
+def archive_partitions(file_path, before):
+    """
+    Arquiva as partições antigas de uma tabela.
+    
+    As partições arquivadas são comprimidas em PARTITIONS_DIR/<tabela>/archive
+    e deixam de ser lidas junto com a tabela; load_partitions com
+    include_archived=True ainda as consulta.
+    
+    Args:
+        file_path: Caminho da tabela particionada
+        before: Partições que terminam antes desta data são arquivadas
+        
+    Returns:
+        int: Número de partições arquivadas
+    """
+    with _file_lock(file_path):
+        if not _partitioned_table_exists(file_path):
+            return 0
+        
+        manifest = _read_manifest(file_path)
+        archive_dir = os.path.join(_partition_dir(file_path), "archive")
+        if not os.path.exists(archive_dir):
+            os.makedirs(archive_dir)
+        
+        keys = _old_partitions(manifest, before)
+        archived = manifest.setdefault('arquivadas', {})
+        for key in keys:
+            df = _read_partition(file_path, key)
+            if key in archived:
+                df = pd.concat([_read_partition(file_path, key, archived=True), df], ignore_index=True)
+            
+            archive_path = _partition_file(file_path, key, archived=True)
+            _expand_categories(df.copy()).to_csv(archive_path + ".tmp", index=False, compression='gzip')
+            os.replace(archive_path + ".tmp", archive_path)
+            
+            info = manifest['particoes'].pop(key)
+            info['arquivo'] = os.path.join("archive", os.path.basename(archive_path))
+            info['linhas'] = len(df)
+            archived[key] = info
+            os.remove(_partition_file(file_path, key))
+        
+        _write_manifest(file_path, manifest)
+        invalidate_table_cache(file_path)
+        return len(keys)
+
+# Exportação de dados.
+# As exportações são gravadas em blocos de EXPORT_CHUNK_ROWS linhas em um
+# arquivo temporário, que é entregue aberto para leitura. Uma tabela
+# informada pelo caminho é lida do armazenamento bloco a bloco, sem carregar
+# a tabela inteira, de modo que a memória usada na conversão não depende do
+# tamanho do que é exportado. O st.download_button não aceita o arquivo
+# temporário em si: as páginas passam o conteúdo lido (read()).
+EXPORT_CHUNK_ROWS = 20000
+
+# Extensão e tipo MIME de cada formato de exportação
+EXPORT_FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'json': ('json', 'application/json')
+}
+
+EXPORT_COMPRESSIONS = {
+    'gzip': ('gz', 'application/gzip'),
+    'zip': ('zip', 'application/zip')
+}
+
+# Limite de linhas de uma planilha do Excel (incluindo o cabeçalho)
+EXCEL_MAX_ROWS = 1048576
+
+def available_export_formats():
+    """Return the export formats available in this installation"""
+    return [fmt for fmt in EXPORT_FORMATS if fmt != 'excel' or xlsxwriter is not None]
+
+def iter_table_chunks(file_path, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Percorre uma tabela em blocos de linhas, sem carregá-la por inteiro.
+    
+    Args:
+        file_path: Caminho da tabela (ex.: WEIGHT_FILE)
+        chunk_rows: Número máximo de linhas por bloco
+        
+    Yields:
+        DataFrame: Blocos consecutivos da tabela, com os tipos do registro
+    """
+    if not _table_exists(file_path):
+        yield _empty_table(file_path)
+        return
+    
+    if get_storage_backend() == 'sqlite':
+        con = _sqlite_connect()
+        try:
+            for chunk in pd.read_sql_query(f'SELECT * FROM "{_table_name(file_path)}"', con,
+                                           chunksize=chunk_rows):
+                yield _expand_categories(_apply_schema(chunk, file_path))
+        finally:
+            con.close()
+    elif _partitioning_enabled(file_path):
+        manifest = _read_manifest(file_path)
+        for key in _sorted_partitions(manifest['particoes']):
+            df = _read_partition(file_path, key)
+            for start in range(0, len(df), chunk_rows):
+                yield _expand_categories(df.iloc[start:start + chunk_rows].copy())
+    else:
+        for chunk in pd.read_csv(file_path, dtype=_text_columns(file_path), chunksize=chunk_rows):
+            yield _expand_categories(_apply_schema(chunk, file_path))
+
+def _export_chunks(source, chunk_rows):
+    """Return the chunks of an export source (DataFrame, table path or iterable of DataFrames)"""
+    if isinstance(source, pd.DataFrame):
+        if source.empty:
+            return [source]
+        return (source.iloc[start:start + chunk_rows] for start in range(0, len(source), chunk_rows))
+    if isinstance(source, str):
+        return iter_table_chunks(source, chunk_rows)
+    return source
+
+def _write_csv_chunks(chunks, binary):
+    """Write chunks as CSV with a single header line"""
+    text = io.TextIOWrapper(binary, encoding='utf-8', newline='')
+    header = True
+    for chunk in chunks:
+        chunk.to_csv(text, index=False, header=header)
+        header = False
+    text.flush()
+    text.detach()
+
+def _write_json_chunks(chunks, binary):
+    """Write chunks as a single JSON array of records"""
+    binary.write(b'[')
+    first = True
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        records = chunk.to_json(orient='records', date_format='iso', force_ascii=False)
+        if not first:
+            binary.write(b',')
+        binary.write(records[1:-1].encode('utf-8'))
+        first = False
+    binary.write(b']')
+
+def _write_excel_chunks(chunks, binary, sheet_name='Dados'):
+    """Write chunks to an XLSX workbook row by row, starting a new sheet at the Excel row limit"""
+    if xlsxwriter is None:
+        raise ValueError("A exportação para Excel requer o pacote xlsxwriter")
+    
+    # Em constant_memory as linhas já escritas vão para disco, e a pasta de
+    # trabalho não guarda a planilha inteira na memória
+    workbook = xlsxwriter.Workbook(binary, {
+        'constant_memory': True,
+        'default_date_format': 'dd/mm/yyyy hh:mm',
+        'strings_to_numbers': False
+    })
+    worksheet = None
+    row = 0
+    sheets = 0
+    
+    for chunk in chunks:
+        if worksheet is None or (row >= EXCEL_MAX_ROWS and not chunk.empty):
+            sheets += 1
+            worksheet = workbook.add_worksheet(sheet_name if sheets == 1 else f"{sheet_name} {sheets}")
+            worksheet.write_row(0, 0, [str(column) for column in chunk.columns])
+            row = 1
+        
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for record in values.itertuples(index=False, name=None):
+            if row >= EXCEL_MAX_ROWS:
+                sheets += 1
+                worksheet = workbook.add_worksheet(f"{sheet_name} {sheets}")
+                worksheet.write_row(0, 0, [str(column) for column in chunk.columns])
+                row = 1
+            worksheet.write_row(row, 0, record)
+            row += 1
+    
+    if worksheet is None:
+        workbook.add_worksheet(sheet_name)
+    workbook.close()
+
+def export_stream(source, format_type='csv', compression=None, file_name='dados',
+                  chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Exporta dados em blocos para um arquivo temporário.
+    
+    Args:
+        source: DataFrame, caminho de uma tabela (ex.: WEIGHT_FILE) ou
+            iterável de DataFrames com as mesmas colunas
+        format_type: 'csv', 'excel' (XLSX) ou 'json'
+        compression: None, 'gzip' ou 'zip'
+        file_name: Nome do arquivo dentro do .zip (sem extensão)
+        chunk_rows: Número de linhas convertidas por vez
+        
+    Returns:
+        Arquivo binário temporário posicionado no início, apagado ao ser
+        fechado (use-o em um bloco with e passe read() ao st.download_button)
+    """
+    if format_type not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportação desconhecido: {format_type}")
+    if compression is not None and compression not in EXPORT_COMPRESSIONS:
+        raise ValueError(f"Compressão desconhecida: {compression}")
+    
+    writers = {'csv': _write_csv_chunks, 'json': _write_json_chunks, 'excel': _write_excel_chunks}
+    chunks = _export_chunks(source, chunk_rows)
+    
+    def write(binary):
+        # O xlsxwriter precisa de um arquivo com seek, que os fluxos
+        # comprimidos não têm: a planilha é montada em um arquivo temporário
+        # e copiada para o fluxo comprimido depois
+        if format_type == 'excel' and compression is not None:
+            with tempfile.TemporaryFile(prefix='export_') as workbook_file:
+                _write_excel_chunks(chunks, workbook_file)
+                workbook_file.seek(0)
+                shutil.copyfileobj(workbook_file, binary)
+        else:
+            writers[format_type](chunks, binary)
+    
+    # O arquivo temporário é apagado pelo sistema operacional quando for
+    # fechado, inclusive no Windows; use o retorno em um bloco with
+    target = tempfile.TemporaryFile(prefix='export_')
+    try:
+        if compression == 'gzip':
+            with gzip.GzipFile(fileobj=target, mode='wb', compresslevel=6) as compressed:
+                write(compressed)
+        elif compression == 'zip':
+            inner_name = f"{file_name}.{EXPORT_FORMATS[format_type][0]}"
+            with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as archive:
+                with archive.open(inner_name, 'w', force_zip64=True) as compressed:
+                    write(compressed)
+        else:
+            write(target)
+        target.seek(0)
+    except BaseException:
+        target.close()
+        raise
+    
+    return target
+
+def export_file_info(base_name, format_type='csv', compression=None):
+    """
+    Retorna o nome do arquivo e o tipo MIME de uma exportação.
+    
+    Returns:
+        tuple: (nome_do_arquivo, mime)
+    """
+    extension, mime = EXPORT_FORMATS[format_type]
+    file_name = f"{base_name}.{extension}"
+    if compression == 'gzip':
+        file_name += ".gz"
+        mime = EXPORT_COMPRESSIONS['gzip'][1]
+    elif compression == 'zip':
+        file_name = f"{base_name}.zip"
+        mime = EXPORT_COMPRESSIONS['zip'][1]
+    return file_name, mime
+
+def export_data(dataframe, format_type, compression=None):
+    """Export dataframe to various formats, returning the file contents as bytes"""
+    with export_stream(dataframe, format_type, compression) as exported:
+        return exported.read()
+
+# Backups incrementais do diretório de dados.
+# Cada arquivo é dividido em blocos de BACKUP_CHUNK_BYTES, guardados uma única
+# vez em BACKUP_DIR/objects pelo seu SHA-256 (comprimidos). Um snapshot é só
+# um manifesto com a lista de blocos de cada arquivo: como as tabelas de
+# histórico crescem no fim, um novo snapshot guarda apenas os blocos finais
+# que mudaram. Arquivos com o mesmo tamanho e data de modificação do snapshot
+# anterior reaproveitam os blocos sem serem lidos.
+DATA_DIR = "data"
+BACKUP_DIR = "backups/incremental"
+BACKUP_CHUNK_BYTES = 1024 * 1024
+
+# Caminhos dentro de data/ que não entram no backup: caches derivados e
+# arquivos temporários de gravação
+BACKUP_EXCLUDED_DIRS = {os.path.basename(SNAPSHOT_DIR)}
+BACKUP_EXCLUDED_SUFFIXES = ('.tmp',)
+
+def _backup_object_path(digest):
+    """Return the path of a stored backup chunk"""
+    return os.path.join(BACKUP_DIR, "objects", digest[:2], digest[2:])
+
+def _backup_manifest_path(snapshot_id):
+    """Return the path of a snapshot manifest"""
+    return os.path.join(BACKUP_DIR, "snapshots", f"{snapshot_id}.json")
+
+def _store_backup_chunk(chunk):
+    """Store a chunk under its SHA-256 if it is not stored yet, returning (digest, stored)"""
+    digest = hashlib.sha256(chunk).hexdigest()
+    object_path = _backup_object_path(digest)
+    if os.path.exists(object_path):
+        return digest, False
+    
+    object_dir = os.path.dirname(object_path)
+    if not os.path.exists(object_dir):
+        os.makedirs(object_dir, exist_ok=True)
+    temp_path = f"{object_path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(zlib.compress(chunk, 6))
+    os.replace(temp_path, object_path)
+    return digest, True
+
+def _read_backup_chunk(digest):
+    """Read and verify a stored backup chunk"""
+    with open(_backup_object_path(digest), 'rb') as f:
+        chunk = zlib.decompress(f.read())
+    if hashlib.sha256(chunk).hexdigest() != digest:
+        raise ValueError(f"Bloco de backup corrompido: {digest}")
+    return chunk
+
+def _backup_files(source_dir):
+    """List the files of the data directory that go into a backup, as paths relative to its parent"""
+    files = []
+    for root, dirs, names in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if d not in BACKUP_EXCLUDED_DIRS)
+        for name in sorted(names):
+            if name.startswith('.') or name.endswith(BACKUP_EXCLUDED_SUFFIXES):
+                continue
+            path = os.path.join(root, name)
+            files.append(os.path.relpath(path, os.path.dirname(os.path.abspath(source_dir))))
+    return files
+
+def list_backups():
+    """
+    Lista os snapshots de backup, do mais recente para o mais antigo.
+    
+    Returns:
+        list: Manifestos dos snapshots (sem a lista de arquivos)
+    """
+    snapshots_dir = os.path.join(BACKUP_DIR, "snapshots")
+    if not os.path.exists(snapshots_dir):
+        return []
+    
+    backups = []
+    for name in os.listdir(snapshots_dir):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(snapshots_dir, name), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest.pop('arquivos', None)
+        backups.append(manifest)
+    return sorted(backups, key=lambda manifest: manifest['id'], reverse=True)
+
+def load_backup_manifest(snapshot_id):
+    """Load the full manifest of a backup snapshot"""
+    with open(_backup_manifest_path(snapshot_id), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def create_backup(description=None, source_dir=DATA_DIR):
+    """
+    Cria um snapshot incremental do diretório de dados.
+    
+    As tabelas ficam bloqueadas para escrita durante o snapshot, para que
+    ele corresponda a um único momento.
+    
+    Args:
+        description: Descrição opcional do snapshot
+        source_dir: Diretório de dados
+        
+    Returns:
+        dict: Manifesto do snapshot criado, com o número de blocos e de bytes novos
+    """
+    previous = list_backups()
+    previous_files = load_backup_manifest(previous[0]['id'])['arquivos'] if previous else {}
+    
+    created_at = datetime.now()
+    snapshot_id = created_at.strftime('%Y%m%d_%H%M%S_%f')
+    files = {}
+    new_chunks = 0
+    new_bytes = 0
+    
+    with table_lock(*list_data_tables()):
+        for relative_path in _backup_files(source_dir):
+            path = os.path.join(os.path.dirname(os.path.abspath(source_dir)), relative_path)
+            stat = os.stat(path)
+            
+            previous_entry = previous_files.get(relative_path)
+            if (previous_entry is not None and previous_entry['tamanho'] == stat.st_size
+                    and previous_entry['mtime_ns'] == stat.st_mtime_ns):
+                files[relative_path] = previous_entry
+                continue
+            
+            chunks = []
+            file_hash = hashlib.sha256()
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(BACKUP_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    file_hash.update(chunk)
+                    digest, stored = _store_backup_chunk(chunk)
+                    chunks.append(digest)
+                    if stored:
+                        new_chunks += 1
+                        new_bytes += len(chunk)
+            
+            files[relative_path] = {
+                'tamanho': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': file_hash.hexdigest(),
+                'blocos': chunks
+            }
+    
+    manifest = {
+        'id': snapshot_id,
+        'criado_em': created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'descricao': description or "",
+        'total_arquivos': len(files),
+        'total_bytes': sum(entry['tamanho'] for entry in files.values()),
+        'novos_blocos': new_chunks,
+        'bytes_novos': new_bytes,
+        'arquivos': files
+    }
+    
+    manifest_path = _backup_manifest_path(snapshot_id)
+    if not os.path.exists(os.path.dirname(manifest_path)):
+        os.makedirs(os.path.dirname(manifest_path))
+    with open(manifest_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    
+    return manifest
+
+def _file_matches_backup(path, entry):
+    """Check if a file already has the contents recorded for it in a snapshot"""
+    if not os.path.exists(path) or os.path.getsize(path) != entry['tamanho']:
+        return False
+    
+    file_hash = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BACKUP_CHUNK_BYTES), b''):
+            file_hash.update(block)
+    return file_hash.hexdigest() == entry['sha256']
+
+def _clear_all_caches():
+    """Drop every in-memory table, partition and derived cache"""
+    global _pen_occupancy_cache, _litter_kpis_cache, _open_maternity_cache
+    global _nursery_metrics_cache, _vaccination_schedule_cache, _heat_statistics_cache
+    global _employee_index_cache, _last_access_cache, _permission_cache
+    
+    # Um backup restaurado pode trazer de volta contadores de versão
+    # (_table_versions do SQLite) ou assinaturas já vistas, então os caches
+    # derivados não podem ser validados pela assinatura e são descartados
+    invalidate_table_cache()
+    with _table_cache_lock:
+        _partition_cache.clear()
+    with _lookup_cache_lock:
+        _lookup_cache.clear()
+    with _dashboard_aggregates_lock:
+        _dashboard_aggregates.clear()
+    with _pen_occupancy_lock:
+        _pen_occupancy_cache = None
+    with _litter_kpis_lock:
+        _litter_kpis_cache = None
+    with _open_maternity_lock:
+        _open_maternity_cache = None
+    with _nursery_metrics_lock:
+        _nursery_metrics_cache = None
+    with _vaccination_schedule_lock:
+        _vaccination_schedule_cache = None
+    with _heat_statistics_lock:
+        _heat_statistics_cache = None
+    with _employee_index_lock:
+        _employee_index_cache = None
+        _last_access_cache = None
+    with _permission_cache_lock:
+        _permission_cache = None
+
+def restore_backup(snapshot_id, target_dir=DATA_DIR):
+    """
+    Restaura o diretório de dados para o estado de um snapshot.
+    
+    Só os arquivos que diferem do snapshot são regravados (de forma atômica);
+    arquivos de dados criados depois do snapshot são removidos.
+    
+    Args:
+        snapshot_id: ID do snapshot (veja list_backups)
+        target_dir: Diretório de dados a restaurar
+        
+    Returns:
+        int: Número de arquivos regravados ou removidos
+    """
+    manifest = load_backup_manifest(snapshot_id)
+    base_dir = os.path.dirname(os.path.abspath(target_dir))
+    source_name = os.path.basename(os.path.normpath(target_dir))
+    
+    # Os caminhos do manifesto começam pelo nome do diretório de dados
+    def target_path(relative_path):
+        parts = relative_path.split(os.sep, 1)
+        return os.path.join(base_dir, source_name, parts[1] if len(parts) > 1 else '')
+    
+    changed = 0
+    with table_lock(*list_data_tables()):
+        wanted = set()
+        for relative_path, entry in manifest['arquivos'].items():
+            path = target_path(relative_path)
+            wanted.add(os.path.abspath(path))
+            if _file_matches_backup(path, entry):
+                continue
+            
+            if not os.path.exists(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            temp_path = path + ".restore.tmp"
+            with open(temp_path, 'wb') as f:
+                for digest in entry['blocos']:
+                    f.write(_read_backup_chunk(digest))
+            os.replace(temp_path, path)
+            changed += 1
+        
+        for relative_path in _backup_files(target_dir):
+            path = os.path.join(base_dir, relative_path)
+            if os.path.abspath(path) not in wanted:
+                os.remove(path)
+                changed += 1
+        
+        # Os arquivos mudaram por fora das funções de gravação
+        for file_path in SNAPSHOT_TABLES:
+            _remove_table_snapshot(file_path)
+        _clear_all_caches()
+    
+    return changed
+
+def export_backup(snapshot_id):
+    """
+    Gera um .zip com os arquivos de um snapshot, para download.
+    
+    O zip tem a mesma estrutura do diretório de dados (data/...) e é
+    montado bloco a bloco em um arquivo temporário.
+    
+    Args:
+        snapshot_id: ID do snapshot
+        
+    Returns:
+        Arquivo binário do zip aberto para leitura; o arquivo temporário é
+        apagado ao ser fechado (use-o em um bloco with e passe read() ao
+        st.download_button)
+    """
+    manifest = load_backup_manifest(snapshot_id)
+    target = tempfile.TemporaryFile(prefix='backup_', suffix='.zip')
+    try:
+        with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for relative_path, entry in sorted(manifest['arquivos'].items()):
+                with archive.open(relative_path.replace(os.sep, '/'), 'w', force_zip64=True) as member:
+                    for digest in entry['blocos']:
+                        member.write(_read_backup_chunk(digest))
+        target.seek(0)
+    except Exception:
+        target.close()
+        raise
+    return target
+
+def prune_backups(keep=10):
+    """
+    Remove os snapshots mais antigos e os blocos que nenhum snapshot restante usa.
+    
+    Args:
+        keep: Número de snapshots mais recentes a manter
+        
+    Returns:
+        int: Número de blocos removidos
+    """
+    backups = list_backups()
+    for manifest in backups[keep:]:
+        os.remove(_backup_manifest_path(manifest['id']))
+    
+    referenced = set()
+    for manifest in backups[:keep]:
+        for entry in load_backup_manifest(manifest['id'])['arquivos'].values():
+            referenced.update(entry['blocos'])
+    
+    removed = 0
+    objects_dir = os.path.join(BACKUP_DIR, "objects")
+    if os.path.exists(objects_dir):
+        for prefix in os.listdir(objects_dir):
+            for name in os.listdir(os.path.join(objects_dir, prefix)):
+                if prefix + name not in referenced:
+                    os.remove(os.path.join(objects_dir, prefix, name))
+                    removed += 1
+    return removed
+
 # Calendário suíno de 1000 dias
 def date_to_pig_calendar(date):
     """
@@ -79,129 +2750,226 @@ def pig_calendar_to_date(pig_day, reference_year=None):
     
     return target_date
 
-def load_animals():
+def load_animals(columns=None, where=None):
     """Load animals data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(ANIMALS_FILE):
-        return pd.read_csv(ANIMALS_FILE)
+    if _table_exists(ANIMALS_FILE):
+        return _load_table(ANIMALS_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_animal': [],
-            'identificacao': [], 
-            'brinco': [],
-            'tatuagem': [],
-            'nome': [],
-            'categoria': [],
-            'data_nascimento': [],
-            'sexo': [],
-            'raca': [],
-            'origem': [],
-            'data_cadastro': []
-        })
+        return _empty_table(ANIMALS_FILE, columns)
 
 def save_animals(df):
     """Save animals data to CSV"""
-    df.to_csv(ANIMALS_FILE, index=False)
+    _save_table(df, ANIMALS_FILE)
 
-def load_breeding_cycles():
+def load_breeding_cycles(columns=None, where=None):
     """Load breeding cycles data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(BREEDING_FILE):
-        return pd.read_csv(BREEDING_FILE)
+    if _table_exists(BREEDING_FILE):
+        return _load_table(BREEDING_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_ciclo': [],
-            'id_animal': [],
-            'numero_ciclo': [],
-            'data_cio': [],
-            'intensidade_cio': [],
-            'irmas_cio': [],
-            'quantidade_irmas_cio': [],
-            'status': [],
-            'observacao': []
-        })
+        return _empty_table(BREEDING_FILE, columns)
 
 def save_breeding_cycles(df):
     """Save breeding cycles data to CSV"""
-    df.to_csv(BREEDING_FILE, index=False)
+    _save_table(df, BREEDING_FILE)
+
+def append_breeding_cycles(records):
+    """Append one or more breeding cycle records to CSV without rewriting the file"""
+    _append_table(records, BREEDING_FILE)
 
-def load_gestation():
+def load_gestation(columns=None, where=None):
     """Load gestation data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(GESTATION_FILE):
-        return pd.read_csv(GESTATION_FILE)
+    if _table_exists(GESTATION_FILE):
+        return _load_table(GESTATION_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_gestacao': [],
-            'id_animal': [],
-            'data_cobertura': [],
-            'data_prevista_parto': [],
-            'data_parto': [],
-            'quantidade_leitoes': [],
-            'status': [],
-            'observacao': []
-        })
+        return _empty_table(GESTATION_FILE, columns)
 
 def save_gestation(df):
     """Save gestation data to CSV"""
-    df.to_csv(GESTATION_FILE, index=False)
+    _save_table(df, GESTATION_FILE)
 
-def load_weight_records():
+def load_weight_records(columns=None, where=None):
     """Load weight records data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(WEIGHT_FILE):
-        return pd.read_csv(WEIGHT_FILE)
+    if _table_exists(WEIGHT_FILE):
+        return _load_table(WEIGHT_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_registro': [],
-            'id_animal': [],
-            'data_registro': [],
-            'peso': [],
-            'observacao': []
-        })
+        return _empty_table(WEIGHT_FILE, columns)
 
 def save_weight_records(df):
     """Save weight records data to CSV"""
-    df.to_csv(WEIGHT_FILE, index=False)
+    _save_table(df, WEIGHT_FILE)
 
-def calculate_statistics(animals_df, breeding_df, gestation_df, weight_df):
-    """Calculate various statistics for dashboard"""
-    stats = {}
+def query_weight_records(id_animal=None, start_date=None, end_date=None):
+    """Load weight records filtered by animal and/or date range"""
+    return query_table(WEIGHT_FILE, id_animal=id_animal, start_date=start_date, end_date=end_date)
+
+def _summarize_animals(df):
+    """Summarize the animals table for the dashboard"""
+    if 'categoria' in df.columns:
+        categorias = df['categoria'].value_counts()
+        categorias = categorias[categorias > 0].to_dict()
+    else:
+        categorias = {}
+    return {'total': len(df), 'por_categoria': categorias}
+
+def _summarize_gestation(df):
+    """Summarize the gestation table for the dashboard"""
+    gestantes = int(df['data_parto'].isna().sum()) if 'data_parto' in df.columns else 0
+    return {'gestantes': gestantes}
+
+def _summarize_breeding(df):
+    """Summarize the breeding table for the dashboard as heat counts per day"""
+    column = 'data_cio' if 'data_cio' in df.columns else 'ultima_data'
+    if column not in df.columns:
+        return {'cios_por_data': {}}
+    datas = _as_datetime(df[column]).dropna().dt.normalize()
+    return {'cios_por_data': datas.value_counts().to_dict()}
+
+def _summarize_weights(df):
+    """Summarize the weight records table for the dashboard"""
+    if 'peso' in df.columns:
+        peso = pd.to_numeric(df['peso'], errors='coerce').dropna()
+    else:
+        peso = pd.Series(dtype='float64')
+    return {
+        'registros': len(peso),
+        'soma': float(peso.sum()),
+        'min': float(peso.min()) if len(peso) else None,
+        'max': float(peso.max()) if len(peso) else None
+    }
+
+# Resumo de cada tabela usado pelos indicadores do painel
+DASHBOARD_SOURCES = {
+    ANIMALS_FILE: _summarize_animals,
+    GESTATION_FILE: _summarize_gestation,
+    BREEDING_FILE: _summarize_breeding,
+    WEIGHT_FILE: _summarize_weights
+}
+
+# Agregados do painel mantidos em memória: o resumo de cada tabela é calculado
+# uma vez por versão da tabela e acumulado a cada inserção feita por
+# _write_records. Uma regravação completa da tabela muda a sua versão, e o
+# resumo é recalculado na próxima consulta.
+_dashboard_aggregates = {}
+_dashboard_aggregates_lock = threading.Lock()
+
+def _merge_summary(current, added):
+    """Combine two summaries of the same table (counters add up, 'min'/'max' keep the extreme)"""
+    merged = dict(current)
+    for key, value in added.items():
+        previous = current.get(key)
+        if isinstance(value, dict):
+            merged[key] = dict(previous)
+            for item, count in value.items():
+                merged[key][item] = merged[key].get(item, 0) + count
+        elif key in ('min', 'max'):
+            candidates = [v for v in (previous, value) if v is not None]
+            merged[key] = (min if key == 'min' else max)(candidates) if candidates else None
+        else:
+            merged[key] = previous + value
+    return merged
+
+def _dashboard_summary(file_path):
+    """Return the maintained dashboard summary of a table, recomputing it if the table changed"""
+    if not _table_exists(file_path):
+        return DASHBOARD_SOURCES[file_path](_empty_table(file_path))
     
-    # Total animals
-    stats['total_animals'] = len(animals_df) if not animals_df.empty else 0
+    signature = _table_signature(file_path)
+    with _dashboard_aggregates_lock:
+        cached = _dashboard_aggregates.get(file_path)
     
-    # Animals by category
-    if not animals_df.empty:
-        stats['animals_by_category'] = animals_df['categoria'].value_counts().to_dict()
-    else:
-        stats['animals_by_category'] = {}
+    if cached is None or cached[0] != signature:
+        cached = (signature, DASHBOARD_SOURCES[file_path](_cached_table(file_path)))
+        with _dashboard_aggregates_lock:
+            _dashboard_aggregates[file_path] = cached
     
-    # Animals in gestation
-    if not gestation_df.empty:
-        stats['pregnant_animals'] = len(gestation_df[gestation_df['data_parto'].isna()])
-    else:
-        stats['pregnant_animals'] = 0
-        
-    # Animals in heat or near heat cycle
-    if not breeding_df.empty:
-        today = datetime.now().date()
-        breeding_df['data_cio'] = pd.to_datetime(breeding_df['data_cio']).dt.date
-        breeding_df['next_heat'] = breeding_df['data_cio'] + pd.to_timedelta([21]*len(breeding_df), unit='d')
-        stats['animals_in_heat'] = len(breeding_df[
-            (breeding_df['next_heat'] >= today) & 
-            (breeding_df['next_heat'] <= today + timedelta(days=3))
-        ])
-    else:
-        stats['animals_in_heat'] = 0
+    return cached[1]
+
+def _update_dashboard_aggregates(file_path, previous_signature, new_rows):
+    """
+    Acumula no resumo mantido de uma tabela as linhas recém-inseridas.
+    
+    O resumo só é atualizado se correspondia à tabela antes da escrita; caso
+    contrário ele é descartado e recalculado na próxima consulta.
+    
+    Args:
+        file_path: Caminho do arquivo da tabela
+        previous_signature: Assinatura da tabela antes da escrita
+        new_rows: DataFrame com as linhas inseridas
+    """
+    with _dashboard_aggregates_lock:
+        cached = _dashboard_aggregates.pop(file_path, None)
+        if cached is None or cached[0] != previous_signature:
+            return
         
-    # Weight statistics
-    if not weight_df.empty:
-        stats['avg_weight'] = weight_df['peso'].mean()
-        stats['min_weight'] = weight_df['peso'].min()
-        stats['max_weight'] = weight_df['peso'].max()
-    else:
-        stats['avg_weight'] = 0
-        stats['min_weight'] = 0
-        stats['max_weight'] = 0
+        added = DASHBOARD_SOURCES[file_path](_apply_schema(new_rows.copy(), file_path))
+        _dashboard_aggregates[file_path] = (_table_signature(file_path), _merge_summary(cached[1], added))
+
+def refresh_dashboard_aggregates():
+    """Discard the maintained dashboard aggregates and recompute them from the tables"""
+    with _dashboard_aggregates_lock:
+        _dashboard_aggregates.clear()
+    for file_path in DASHBOARD_SOURCES:
+        _dashboard_summary(file_path)
+
+def _statistics_from_summaries(animais, gestacao, ciclos, pesos, today=None):
+    """Build the dashboard statistics dict from the table summaries"""
+    today = pd.Timestamp(today or datetime.now().date()).normalize()
+    
+    # Próximo cio previsto 21 dias após o último, nos próximos 3 dias
+    cios_por_data = ciclos['cios_por_data']
+    animals_in_heat = sum(
+        cios_por_data.get(today - timedelta(days=21 - dia), 0) for dia in range(4)
+    )
+    
+    return {
+        'total_animals': animais['total'],
+        'animals_by_category': dict(animais['por_categoria']),
+        'pregnant_animals': gestacao['gestantes'],
+        'animals_in_heat': int(animals_in_heat),
+        'avg_weight': pesos['soma'] / pesos['registros'] if pesos['registros'] else 0,
+        'min_weight': pesos['min'] if pesos['min'] is not None else 0,
+        'max_weight': pesos['max'] if pesos['max'] is not None else 0
+    }
+
+def get_dashboard_statistics(today=None):
+    """
+    Retorna os indicadores do painel a partir dos agregados mantidos.
+    
+    Com os agregados em dia, a consulta não depende do tamanho do rebanho.
+    
+    Args:
+        today: Data de referência para os animais próximos ao cio (padrão: hoje)
         
-    return stats
+    Returns:
+        dict: Indicadores no mesmo formato de calculate_statistics
+    """
+    return _statistics_from_summaries(
+        _dashboard_summary(ANIMALS_FILE),
+        _dashboard_summary(GESTATION_FILE),
+        _dashboard_summary(BREEDING_FILE),
+        _dashboard_summary(WEIGHT_FILE),
+        today=today
+    )
+
+def calculate_statistics(animals_df=None, breeding_df=None, gestation_df=None, weight_df=None):
+    """
+    Calculate various statistics for dashboard.
+    
+    DataFrames that are not given come from the maintained aggregates, so a
+    call without arguments does not touch the tables. The given DataFrames
+    are not modified.
+    """
+    frames = [
+        (ANIMALS_FILE, animals_df),
+        (GESTATION_FILE, gestation_df),
+        (BREEDING_FILE, breeding_df),
+        (WEIGHT_FILE, weight_df)
+    ]
+    summaries = [
+        _dashboard_summary(file_path) if df is None else DASHBOARD_SOURCES[file_path](df)
+        for file_path, df in frames
+    ]
+    return _statistics_from_summaries(*summaries)
 
 def calculate_age(birth_date):
     """Calculate age in days from birth date"""
@@ -220,6 +2988,57 @@ def predict_heat_date(last_heat_date):
     last_heat_date = pd.to_datetime(last_heat_date).date()
     return last_heat_date + timedelta(days=21)
 
+def analyze_cycle_regularity(cycles_df, animals_df=None, date_column='data_cio', id_column='id_animal', min_cycles=2):
+    """
+    Calcula a regularidade dos intervalos entre ciclos de cada animal.
+
+    Os ciclos são ordenados uma vez por animal e data, os intervalos saem de
+    um groupby().diff() e os dados de identificação entram com um único merge.
+
+    Args:
+        cycles_df: DataFrame com um registro por ciclo
+        animals_df: DataFrame de animais para identificação (carregado se None)
+        date_column: Coluna com a data do ciclo
+        id_column: Coluna que identifica o animal
+        min_cycles: Número mínimo de ciclos para o animal entrar na análise
+
+    Returns:
+        DataFrame: Um registro por animal com id_animal, identificacao, nome,
+        num_ciclos, intervalo_medio, intervalo_min, intervalo_max e
+        regularidade (desvio padrão populacional dos intervalos)
+    """
+    columns = [
+        'id_animal', 'identificacao', 'nome', 'num_ciclos', 'intervalo_medio',
+        'intervalo_min', 'intervalo_max', 'regularidade'
+    ]
+    if cycles_df.empty:
+        return pd.DataFrame(columns=columns)
+
+    ciclos = pd.DataFrame({
+        'id_animal': cycles_df[id_column].astype(object),
+        'data': _as_datetime(cycles_df[date_column])
+    }).dropna().sort_values(['id_animal', 'data'])
+    ciclos['intervalo'] = ciclos.groupby('id_animal')['data'].diff().dt.days
+
+    resumo = ciclos.groupby('id_animal').agg(
+        num_ciclos=('data', 'size'),
+        intervalo_medio=('intervalo', 'mean'),
+        intervalo_min=('intervalo', 'min'),
+        intervalo_max=('intervalo', 'max')
+    )
+    resumo['regularidade'] = ciclos.groupby('id_animal')['intervalo'].std(ddof=0).fillna(0.0)
+    resumo = resumo.reset_index()
+    resumo = resumo[resumo['num_ciclos'] >= max(min_cycles, 2)]
+
+    if animals_df is None:
+        animals_df = _cached_table(ANIMALS_FILE) if _table_exists(ANIMALS_FILE) else _empty_table(ANIMALS_FILE)
+    info = animals_df.reindex(columns=['id_animal', 'identificacao', 'nome']).drop_duplicates('id_animal')
+    info = info.astype({'id_animal': object})
+
+    resumo = resumo.merge(info, on='id_animal', how='left')
+    resumo['nome'] = resumo['nome'].astype(object).where(resumo['nome'].notna(), '')
+    return resumo[columns].reset_index(drop=True)
+
 def calculate_gestation_details(gestation_date):
     """Calculate expected delivery date and current gestation stage"""
     gestation_date = pd.to_datetime(gestation_date).date()
@@ -245,108 +3064,127 @@ def calculate_gestation_details(gestation_date):
         'percentage': percentage
     }
 
-def load_insemination():
+def load_insemination(columns=None, where=None):
     """Load insemination data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(INSEMINATION_FILE):
-        return pd.read_csv(INSEMINATION_FILE)
+    if _table_exists(INSEMINATION_FILE):
+        return _load_table(INSEMINATION_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_inseminacao': [],
-            'id_animal': [],
-            'brinco': [],
-            'categoria': [],
-            'tipo_marran': [],
-            'data_inseminacao': [],
-            'num_semen': [],
-            'linhagem_semen': [],
-            'idade_semen': [],
-            'dose': [],
-            'ordem_dose': [],
-            'metodo': [],
-            'tecnico': [],
-            'semana_suina': [],
-            'data_registro': [],
-            'observacao': []
-        })
+        return _empty_table(INSEMINATION_FILE, columns)
 
 def save_insemination(df):
     """Save insemination data to CSV"""
-    df.to_csv(INSEMINATION_FILE, index=False)
-
-def export_data(dataframe, format_type):
-    """Export dataframe to various formats"""
-    if format_type == 'csv':
-        return dataframe.to_csv(index=False)
-    elif format_type == 'excel':
-        # Return as CSV since we can't generate binary Excel files
-        return dataframe.to_csv(index=False)
-    elif format_type == 'json':
-        return dataframe.to_json(orient='records')
-    else:
-        return dataframe.to_csv(index=False)
+    _save_table(df, INSEMINATION_FILE)
+
+def append_insemination(records):
+    """Append one or more insemination records to CSV without rewriting the file"""
+    _append_table(records, INSEMINATION_FILE)
 
-def load_pens():
+def load_pens(columns=None, where=None):
     """Load pens data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(PENS_FILE):
-        return pd.read_csv(PENS_FILE)
+    if _table_exists(PENS_FILE):
+        return _load_table(PENS_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_baia': [],
-            'identificacao': [],
-            'setor': [],
-            'capacidade': [],
-            'largura': [],
-            'comprimento': [],
-            'area': [],
-            'tipo_piso': [],
-            'data_cadastro': [],
-            'observacao': []
-        })
+        return _empty_table(PENS_FILE, columns)
 
 def save_pens(df):
     """Save pens data to CSV"""
-    df.to_csv(PENS_FILE, index=False)
+    _save_table(df, PENS_FILE)
 
-def load_pen_allocations():
+def load_pen_allocations(columns=None, where=None):
     """Load pen allocation data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(PENS_ALLOCATION_FILE):
-        return pd.read_csv(PENS_ALLOCATION_FILE)
+    if _table_exists(PENS_ALLOCATION_FILE):
+        return _load_table(PENS_ALLOCATION_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_alocacao': [],
-            'id_baia': [],
-            'id_animal': [],
-            'data_entrada': [],
-            'data_saida': [],
-            'motivo_saida': [],
-            'status': [],
-            'observacao': []
-        })
+        return _empty_table(PENS_ALLOCATION_FILE, columns)
 
 def save_pen_allocations(df):
     """Save pen allocation data to CSV"""
-    df.to_csv(PENS_ALLOCATION_FILE, index=False)
+    _save_table(df, PENS_ALLOCATION_FILE)
 
-def get_pen_occupancy(pen_id, allocations_df):
-    """Get current occupancy for a specific pen"""
+def compute_pen_occupancy(allocations_df):
+    """
+    Calcula a ocupação atual de todas as baias de uma vez.
+    
+    Args:
+        allocations_df: DataFrame de alocações
+        
+    Returns:
+        Series: Número de alocações em aberto (sem data de saída), indexado por id_baia
+    """
     if allocations_df.empty:
-        return 0
+        return pd.Series(dtype='int64')
+    
+    abertas = allocations_df[allocations_df['data_saida'].isna()]
+    return abertas.groupby('id_baia', observed=True).size().astype('int64')
+
+# Ocupação das baias mantida em memória: calculada uma vez por versão da tabela
+# de alocações e ajustada diretamente nas alocações, saídas e realocações feitas
+# pelas funções abaixo, sem recontar a tabela inteira.
+_pen_occupancy_cache = None
+_pen_occupancy_lock = threading.Lock()
+
+def get_pen_occupancy_counts():
+    """Return the current occupancy of every pen from the maintained aggregate"""
+    global _pen_occupancy_cache
+    if not _table_exists(PENS_ALLOCATION_FILE):
+        return pd.Series(dtype='int64')
     
-    # Filter for the specific pen and active allocations (no exit date)
-    current_occupants = allocations_df[(allocations_df['id_baia'] == pen_id) & 
-                                       (allocations_df['data_saida'].isna())]
+    signature = _table_signature(PENS_ALLOCATION_FILE)
+    with _pen_occupancy_lock:
+        cached = _pen_occupancy_cache
     
-    return len(current_occupants)
+    if cached is None or cached[0] != signature:
+        cached = (signature, compute_pen_occupancy(_cached_table(PENS_ALLOCATION_FILE)))
+        with _pen_occupancy_lock:
+            _pen_occupancy_cache = cached
+    
+    return cached[1].copy()
+
+def _update_pen_occupancy(previous_signature, changes):
+    """
+    Aplica a variação de ocupação de uma escrita ao agregado mantido.
+    
+    O ajuste só é feito se o agregado correspondia à tabela antes da escrita;
+    caso contrário ele é descartado e recalculado na próxima consulta.
+    
+    Args:
+        previous_signature: Assinatura da tabela de alocações antes da escrita
+        changes: Dicionário {id_baia: variação}
+    """
+    global _pen_occupancy_cache
+    with _pen_occupancy_lock:
+        cached = _pen_occupancy_cache
+        _pen_occupancy_cache = None
+        if cached is None or cached[0] != previous_signature:
+            return
+        
+        counts = cached[1].add(pd.Series(changes, dtype='int64'), fill_value=0).astype('int64')
+        _pen_occupancy_cache = (_table_signature(PENS_ALLOCATION_FILE), counts[counts > 0])
 
-def get_available_pens(pens_df, allocations_df, animal_category=None):
-    """Get list of available pens with capacity information"""
+def get_pen_occupancy(pen_id, allocations_df=None):
+    """Get current occupancy for a specific pen"""
+    counts = get_pen_occupancy_counts() if allocations_df is None else compute_pen_occupancy(allocations_df)
+    return int(counts.get(pen_id, 0))
+
+def get_available_pens(pens_df, allocations_df=None, animal_category=None):
+    """
+    Lista as baias com vagas, com a ocupação atual de cada uma.
+    
+    Args:
+        pens_df: DataFrame de baias
+        allocations_df: DataFrame de alocações (padrão: ocupação mantida em memória)
+        animal_category: Categoria do animal, para sugerir o setor adequado
+        
+    Returns:
+        DataFrame: Baias com vagas, com as colunas 'ocupacao_atual' e 'vagas_disponiveis'
+    """
     if pens_df.empty:
         return pd.DataFrame()
     
+    counts = get_pen_occupancy_counts() if allocations_df is None else compute_pen_occupancy(allocations_df)
+    
     pens_with_occupancy = pens_df.copy()
-    pens_with_occupancy['ocupacao_atual'] = pens_with_occupancy['id_baia'].apply(
-        lambda x: get_pen_occupancy(x, allocations_df)
-    )
+    pens_with_occupancy['ocupacao_atual'] = pens_with_occupancy['id_baia'].map(counts).fillna(0).astype('int64')
     
     pens_with_occupancy['vagas_disponiveis'] = pens_with_occupancy['capacidade'] - pens_with_occupancy['ocupacao_atual']
     
@@ -368,169 +3206,403 @@ def get_available_pens(pens_df, allocations_df, animal_category=None):
     # Return only pens with available space
     return pens_with_occupancy[pens_with_occupancy['vagas_disponiveis'] > 0]
 
+def _allocation_signature():
+    """Return the signature of the allocations table, or None if it does not exist"""
+    return _table_signature(PENS_ALLOCATION_FILE) if _table_exists(PENS_ALLOCATION_FILE) else None
+
+def _new_allocation(id_animal, id_baia, data_entrada, observacao):
+    """Build a new open allocation record"""
+    return {
+        'id_alocacao': str(uuid.uuid4()),
+        'id_baia': id_baia,
+        'id_animal': id_animal,
+        'data_entrada': data_entrada,
+        'data_saida': None,
+        'motivo_saida': None,
+        'status': 'Ativo',
+        'observacao': observacao
+    }
+
+def alocar_animal_baia(id_animal, id_baia, data_entrada, observacao=None):
+    """
+    Aloca um animal em uma baia.
+    
+    Returns:
+        tuple: (sucesso, mensagem)
+    """
+    with table_lock(PENS_ALLOCATION_FILE):
+        previous_signature = _allocation_signature()
+        
+        if previous_signature is not None:
+            allocations_df = _cached_table(PENS_ALLOCATION_FILE)
+            if ((allocations_df['id_animal'] == id_animal) & allocations_df['data_saida'].isna()).any():
+                return False, "Este animal já está alocado em uma baia"
+        
+        _write_records([_new_allocation(id_animal, id_baia, data_entrada, observacao)], PENS_ALLOCATION_FILE)
+        _update_pen_occupancy(previous_signature, {id_baia: 1})
+        return True, "Animal alocado com sucesso!"
+
+def remover_animal_baia(id_alocacao, data_saida, motivo_saida, observacao=None):
+    """
+    Encerra a alocação de um animal (saída da baia).
+    
+    Returns:
+        tuple: (sucesso, mensagem)
+    """
+    with table_lock(PENS_ALLOCATION_FILE):
+        previous_signature = _allocation_signature()
+        allocations_df = load_pen_allocations()
+        
+        alocacao = allocations_df['id_alocacao'] == id_alocacao
+        if not (alocacao & allocations_df['data_saida'].isna()).any():
+            return False, "Alocação não encontrada ou já encerrada"
+        
+        id_baia = allocations_df.loc[alocacao, 'id_baia'].iloc[0]
+        allocations_df.loc[alocacao, 'data_saida'] = data_saida
+        allocations_df.loc[alocacao, 'motivo_saida'] = motivo_saida
+        allocations_df.loc[alocacao, 'status'] = 'Inativo'
+        allocations_df.loc[alocacao, 'observacao'] = observacao
+        
+        save_pen_allocations(allocations_df)
+        _update_pen_occupancy(previous_signature, {id_baia: -1})
+        return True, "Animal removido da baia com sucesso!"
+
+def realocar_animal_baia(id_alocacao, id_baia_destino, data_realocacao, observacao=""):
+    """
+    Move um animal para outra baia: encerra a alocação atual e abre uma nova.
+    
+    Returns:
+        tuple: (sucesso, mensagem)
+    """
+    with table_lock(PENS_ALLOCATION_FILE):
+        previous_signature = _allocation_signature()
+        allocations_df = load_pen_allocations()
+        
+        alocacao = allocations_df['id_alocacao'] == id_alocacao
+        if not (alocacao & allocations_df['data_saida'].isna()).any():
+            return False, "Alocação não encontrada ou já encerrada"
+        
+        id_baia_origem = allocations_df.loc[alocacao, 'id_baia'].iloc[0]
+        id_animal = allocations_df.loc[alocacao, 'id_animal'].iloc[0]
+        
+        # 1. Marcar a alocação atual como encerrada
+        allocations_df.loc[alocacao, 'data_saida'] = data_realocacao
+        allocations_df.loc[alocacao, 'motivo_saida'] = "Transferência"
+        allocations_df.loc[alocacao, 'status'] = 'Inativo'
+        allocations_df.loc[alocacao, 'observacao'] = f"Realocado para outra baia. {observacao}"
+        
+        # 2. Criar nova alocação
+        nova_alocacao = _new_allocation(id_animal, id_baia_destino, data_realocacao,
+                                        f"Realocado de outra baia. {observacao}")
+        allocations_df = pd.concat([allocations_df, pd.DataFrame([nova_alocacao])], ignore_index=True)
+        
+        save_pen_allocations(allocations_df)
+        changes = {id_baia_origem: -1}
+        changes[id_baia_destino] = changes.get(id_baia_destino, 0) + 1
+        _update_pen_occupancy(previous_signature, changes)
+        return True, "Animal realocado com sucesso!"
+
 # Funções para o sistema de maternidade
-def load_maternity():
+def load_maternity(columns=None, where=None):
     """Load maternity data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(MATERNITY_FILE):
-        return pd.read_csv(MATERNITY_FILE)
+    if _table_exists(MATERNITY_FILE):
+        return _load_table(MATERNITY_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_maternidade': [],
-            'id_animal': [],        # ID da matriz
-            'id_baia': [],          # ID da baia de maternidade
-            'data_entrada': [],     # Data de entrada na maternidade
-            'data_parto': [],       # Data do parto
-            'data_saida': [],       # Data de saída da maternidade
-            'status': [],           # Status (Ativa, Finalizada)
-            'observacao': []
-        })
+        return _empty_table(MATERNITY_FILE, columns)
 
 def save_maternity(df):
     """Save maternity data to CSV"""
-    df.to_csv(MATERNITY_FILE, index=False)
+    _save_table(df, MATERNITY_FILE)
 
-def load_litters():
+def load_litters(columns=None, where=None):
     """Load litters data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(LITTERS_FILE):
-        return pd.read_csv(LITTERS_FILE)
+    if _table_exists(LITTERS_FILE):
+        return _load_table(LITTERS_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_leitegada': [],
-            'id_maternidade': [],     # Referência à entrada na maternidade
-            'id_animal': [],          # ID da matriz
-            'data_parto': [],
-            'total_nascidos': [],     # Total de leitões nascidos
-            'nascidos_vivos': [],     # Leitões nascidos vivos
-            'natimortos': [],         # Leitões nascidos mortos
-            'mumificados': [],        # Leitões mumificados
-            'peso_total': [],         # Peso total da leitegada (kg)
-            'peso_medio': [],         # Peso médio dos leitões (kg)
-            'tamanho_leitegada_ajustado': [], # Tamanho após transferências/adoções
-            'observacao': []
-        })
+        return _empty_table(LITTERS_FILE, columns)
 
 def save_litters(df):
     """Save litters data to CSV"""
-    df.to_csv(LITTERS_FILE, index=False)
+    _save_table(df, LITTERS_FILE)
 
-def load_piglets():
+def load_piglets(columns=None, where=None):
     """Load piglets data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(PIGLETS_FILE):
-        return pd.read_csv(PIGLETS_FILE)
+    if _table_exists(PIGLETS_FILE):
+        return _load_table(PIGLETS_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_leitao': [],
-            'id_leitegada': [],        # Referência à leitegada
-            'id_animal_mae': [],       # ID da matriz biológica
-            'id_animal_adotiva': [],   # ID da matriz adotiva (se houver)
-            'identificacao': [],       # Identificação do leitão (número, brinco, etc.)
-            'sexo': [],                # Sexo do leitão
-            'data_nascimento': [],     # Data de nascimento
-            'peso_nascimento': [],     # Peso ao nascer (kg)
-            'status_atual': [],        # Status (Vivo, Morto, Desmamado, Transferido)
-            'data_status': [],         # Data do último status
-            'causa_morte': [],         # Causa da morte (se aplicável)
-            'observacao': []
-        })
+        return _empty_table(PIGLETS_FILE, columns)
 
 def save_piglets(df):
     """Save piglets data to CSV"""
-    df.to_csv(PIGLETS_FILE, index=False)
+    _save_table(df, PIGLETS_FILE)
 
-def load_weaning():
+def load_weaning(columns=None, where=None):
     """Load weaning data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(WEANING_FILE):
-        return pd.read_csv(WEANING_FILE)
+    if _table_exists(WEANING_FILE):
+        return _load_table(WEANING_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_desmame': [],
-            'id_leitegada': [],        # Referência à leitegada
-            'id_animal_mae': [],       # ID da matriz
-            'data_desmame': [],        # Data do desmame
-            'idade_desmame': [],       # Idade média ao desmame (dias)
-            'total_desmamados': [],    # Total de leitões desmamados
-            'peso_total_desmame': [],  # Peso total dos leitões ao desmame (kg)
-            'peso_medio_desmame': [],  # Peso médio dos leitões ao desmame (kg)
-            'ganho_medio_diario': [],  # Ganho médio diário de peso (g/dia)
-            'destino_leitoes': [],     # Destino dos leitões (Creche, Venda, etc.)
-            'destino_matriz': [],      # Destino da matriz (Gestação, Descarte, etc.)
-            'id_baia_destino': [],     # ID da baia de destino dos leitões
-            'observacao': []
-        })
+        return _empty_table(WEANING_FILE, columns)
 
 def save_weaning(df):
     """Save weaning data to CSV"""
-    df.to_csv(WEANING_FILE, index=False)
+    _save_table(df, WEANING_FILE)
 
-def calculate_weaning_metrics(litter_id, piglets_df):
-    """Calculate metrics for weaning based on piglet data"""
-    if piglets_df.empty or litter_id not in piglets_df['id_leitegada'].values:
-        return {
-            'total_desmamados': 0,
-            'peso_total_desmame': 0,
-            'peso_medio_desmame': 0,
-            'ganho_medio_diario': 0
-        }
-    
-    # Filtrar leitões da leitegada selecionada que estão vivos
-    litter_piglets = piglets_df[(piglets_df['id_leitegada'] == litter_id) & 
-                                (piglets_df['status_atual'] == 'Vivo')]
+# Indicadores de cada leitegada, calculados a partir dos leitões
+LITTER_KPI_COLUMNS = [
+    'total_leitoes', 'leitoes_vivos', 'leitoes_mortos', 'mortalidade',
+    'peso_total', 'peso_medio', 'ganho_medio_diario'
+]
+
+def compute_litter_kpis(piglets_df, today=None):
+    """
+    Calcula os indicadores de todas as leitegadas com um único agrupamento.
     
-    total_piglets = len(litter_piglets)
+    Peso e ganho médio diário consideram só os leitões vivos; o ganho de cada
+    leitão é (peso atual - peso ao nascer) dividido pela idade em dias.
     
-    # Se não houver dados de peso, retorna zeros
-    if 'peso_atual' not in litter_piglets.columns or litter_piglets['peso_atual'].isna().all():
-        return {
-            'total_desmamados': total_piglets,
-            'peso_total_desmame': 0,
-            'peso_medio_desmame': 0,
-            'ganho_medio_diario': 0
-        }
+    Args:
+        piglets_df: DataFrame de leitões
+        today: Data de referência para a idade dos leitões (padrão: hoje)
+        
+    Returns:
+        DataFrame: Indexado por id_leitegada, com as colunas de LITTER_KPI_COLUMNS
+    """
+    if piglets_df is None or piglets_df.empty:
+        return pd.DataFrame(columns=LITTER_KPI_COLUMNS, index=pd.Index([], name='id_leitegada'))
+    
+    today = pd.Timestamp(today if today is not None else datetime.now().date())
+    leitoes = piglets_df.reindex(columns=[
+        'id_leitegada', 'status_atual', 'peso_atual', 'peso_nascimento', 'data_nascimento'
+    ])
+    vivo = leitoes['status_atual'] == 'Vivo'
+    peso_atual = pd.to_numeric(leitoes['peso_atual'], errors='coerce').where(vivo)
+    
+    idade = (today - _as_datetime(leitoes['data_nascimento'])).dt.days
+    ganho = (peso_atual - pd.to_numeric(leitoes['peso_nascimento'], errors='coerce')) * 1000 / idade.where(idade > 0)
+    
+    grupos = pd.DataFrame({
+        'id_leitegada': leitoes['id_leitegada'],
+        'total_leitoes': 1,
+        'leitoes_vivos': vivo.astype('int64'),
+        'leitoes_mortos': (leitoes['status_atual'] == 'Morto').astype('int64'),
+        'peso_total': peso_atual,
+        'ganho_medio_diario': ganho
+    }).groupby('id_leitegada', sort=False, observed=True)
+    
+    kpis = grupos[['total_leitoes', 'leitoes_vivos', 'leitoes_mortos']].sum()
+    kpis['peso_total'] = grupos['peso_total'].sum()
+    kpis['ganho_medio_diario'] = grupos['ganho_medio_diario'].mean().fillna(0)
+    kpis['peso_medio'] = (kpis['peso_total'] / kpis['leitoes_vivos']).where(kpis['leitoes_vivos'] > 0, 0)
+    kpis['mortalidade'] = kpis['leitoes_mortos'] * 100 / kpis['total_leitoes']
+    return kpis[LITTER_KPI_COLUMNS]
+
+# Indicadores das leitegadas mantidos em memória, recalculados só quando a
+# tabela de leitões (ou a data de referência) muda
+_litter_kpis_cache = None
+_litter_kpis_lock = threading.Lock()
+
+def get_litter_kpis(litter_id=None, today=None):
+    """
+    Retorna os indicadores das leitegadas a partir do cache em memória.
     
-    # Calcular métricas com os dados disponíveis
-    peso_total = litter_piglets['peso_atual'].sum()
-    peso_medio = peso_total / total_piglets if total_piglets > 0 else 0
+    Args:
+        litter_id: ID de uma leitegada. Se informado, retorna só os seus
+            indicadores, consultados direto no índice
+        today: Data de referência para a idade dos leitões (padrão: hoje)
+        
+    Returns:
+        DataFrame indexado por id_leitegada (veja compute_litter_kpis) ou,
+        para uma leitegada, um dicionário com os indicadores (zerados se ela
+        não tiver leitões)
+    """
+    global _litter_kpis_cache
+    today = pd.Timestamp(today if today is not None else datetime.now().date())
     
-    # Calcular ganho médio diário, se possível
-    ganho_medio = 0
-    if 'peso_nascimento' in litter_piglets.columns and 'data_nascimento' in litter_piglets.columns:
-        # Calcular idade média em dias
-        today = datetime.now().date()
-        litter_piglets['data_nascimento'] = pd.to_datetime(litter_piglets['data_nascimento']).dt.date
-        litter_piglets['idade_dias'] = litter_piglets['data_nascimento'].apply(lambda x: (today - x).days)
+    if _table_exists(PIGLETS_FILE):
+        signature = (_table_signature(PIGLETS_FILE), today)
+        with _litter_kpis_lock:
+            cached = _litter_kpis_cache
         
-        # Calcular ganho médio diário (g/dia)
-        litter_piglets['ganho_diario'] = (litter_piglets['peso_atual'] - litter_piglets['peso_nascimento']) * 1000 / litter_piglets['idade_dias']
-        ganho_medio = litter_piglets['ganho_diario'].mean()
+        if cached is None or cached[0] != signature:
+            cached = (signature, compute_litter_kpis(_cached_table(PIGLETS_FILE), today))
+            with _litter_kpis_lock:
+                _litter_kpis_cache = cached
+        kpis = cached[1]
+    else:
+        kpis = compute_litter_kpis(None)
+    
+    if litter_id is None:
+        return kpis.copy()
+    if litter_id in kpis.index:
+        return {column: kpis.at[litter_id, column] for column in LITTER_KPI_COLUMNS}
+    return dict.fromkeys(LITTER_KPI_COLUMNS, 0)
+
+def calculate_weaning_metrics(litter_id, piglets_df=None):
+    """Calculate metrics for weaning based on piglet data (default: the maintained litter KPIs)"""
+    if piglets_df is None:
+        kpis = get_litter_kpis(litter_id)
+    elif piglets_df.empty or litter_id not in piglets_df['id_leitegada'].values:
+        kpis = dict.fromkeys(LITTER_KPI_COLUMNS, 0)
+    else:
+        kpis = compute_litter_kpis(piglets_df[piglets_df['id_leitegada'] == litter_id]).loc[litter_id]
     
     return {
-        'total_desmamados': total_piglets,
-        'peso_total_desmame': peso_total,
-        'peso_medio_desmame': peso_medio,
-        'ganho_medio_diario': ganho_medio
+        'total_desmamados': int(kpis['leitoes_vivos']),
+        'peso_total_desmame': kpis['peso_total'],
+        'peso_medio_desmame': kpis['peso_medio'],
+        'ganho_medio_diario': kpis['ganho_medio_diario']
     }
 
-def get_active_maternity_sows(maternity_df, animals_df):
-    """Get list of sows currently in maternity"""
-    if maternity_df.empty:
-        return pd.DataFrame()
+def compute_open_maternity_entries(maternity_df):
+    """
+    Monta o índice das entradas de maternidade em aberto (sem data de saída).
+    
+    Args:
+        maternity_df: DataFrame de maternidade
+        
+    Returns:
+        dict: {id_animal: id_maternidade} com a primeira entrada em aberto de cada matriz
+    """
+    if maternity_df is None or maternity_df.empty:
+        return {}
     
-    # Filter for active maternity entries (no exit date)
-    active_entries = maternity_df[maternity_df['data_saida'].isna()]
+    abertas = maternity_df[maternity_df['data_saida'].isna()].drop_duplicates('id_animal')
+    return dict(zip(abertas['id_animal'], abertas['id_maternidade']))
+
+# Entradas em aberto na maternidade mantidas em memória: calculadas uma vez
+# por versão da tabela e ajustadas diretamente nas entradas e saídas
+# registradas pelas funções abaixo, sem reler a tabela.
+_open_maternity_cache = None
+_open_maternity_lock = threading.Lock()
+
+def _maternity_signature():
+    """Return the signature of the maternity table, or None if it does not exist"""
+    return _table_signature(MATERNITY_FILE) if _table_exists(MATERNITY_FILE) else None
+
+def get_open_maternity_entries():
+    """Return the {id_animal: id_maternidade} index of open maternity entries"""
+    global _open_maternity_cache
+    signature = _maternity_signature()
+    if signature is None:
+        return {}
     
-    if active_entries.empty or animals_df.empty:
-        return pd.DataFrame()
+    with _open_maternity_lock:
+        cached = _open_maternity_cache
     
-    # Get animal details for each active maternity sow
-    sow_ids = active_entries['id_animal'].unique()
-    sows = animals_df[animals_df['id_animal'].isin(sow_ids)].copy()
+    if cached is None or cached[0] != signature:
+        cached = (signature, compute_open_maternity_entries(_cached_table(MATERNITY_FILE)))
+        with _open_maternity_lock:
+            _open_maternity_cache = cached
     
-    # Add maternity information
-    sows['id_maternidade'] = sows['id_animal'].apply(
-        lambda x: active_entries[active_entries['id_animal'] == x]['id_maternidade'].iloc[0]
-    )
+    return cached[1]
+
+def _update_open_maternity(previous_signature, entered=None, left=None):
+    """
+    Aplica uma entrada ou saída ao índice mantido.
+    
+    O ajuste só é feito se o índice correspondia à tabela antes da escrita;
+    caso contrário ele é descartado e refeito na próxima consulta.
+    
+    Args:
+        previous_signature: Assinatura da tabela de maternidade antes da escrita
+        entered: Tupla (id_animal, id_maternidade) da nova entrada
+        left: id_animal da matriz que saiu
+    """
+    global _open_maternity_cache
+    with _open_maternity_lock:
+        cached = _open_maternity_cache
+        _open_maternity_cache = None
+        if cached is None or cached[0] != previous_signature:
+            return
+        
+        entries = dict(cached[1])
+        if left is not None:
+            entries.pop(left, None)
+        if entered is not None:
+            entries.setdefault(*entered)
+        _open_maternity_cache = (_table_signature(MATERNITY_FILE), entries)
+
+def is_sow_in_maternity(id_animal):
+    """Check if a sow has an open maternity entry"""
+    return id_animal in get_open_maternity_entries()
+
+def registrar_entrada_maternidade(id_animal, id_baia, data_entrada, observacao=None):
+    """
+    Registra a entrada de uma matriz na maternidade.
+    
+    Returns:
+        tuple: (sucesso, mensagem)
+    """
+    with table_lock(MATERNITY_FILE):
+        previous_signature = _maternity_signature()
+        if id_animal in get_open_maternity_entries():
+            return False, "Esta matriz já está na maternidade"
+        
+        id_maternidade = str(uuid.uuid4())
+        _write_records([{
+            'id_maternidade': id_maternidade,
+            'id_animal': id_animal,
+            'id_baia': id_baia,
+            'data_entrada': data_entrada,
+            'data_parto': None,
+            'data_saida': None,
+            'status': 'Ativa',
+            'observacao': observacao
+        }], MATERNITY_FILE)
+        _update_open_maternity(previous_signature, entered=(id_animal, id_maternidade))
+        return True, "Entrada na maternidade registrada com sucesso!"
+
+def registrar_saida_maternidade(id_maternidade, data_saida, observacao=None):
+    """
+    Encerra uma entrada de maternidade (saída da matriz).
+    
+    Args:
+        id_maternidade: ID da entrada de maternidade
+        data_saida: Data de saída
+        observacao: Texto acrescentado à observação da entrada
+        
+    Returns:
+        tuple: (sucesso, mensagem)
+    """
+    with table_lock(MATERNITY_FILE):
+        previous_signature = _maternity_signature()
+        maternity_df = load_maternity()
+        
+        entrada = maternity_df['id_maternidade'] == id_maternidade
+        if not entrada.any():
+            return False, "Entrada de maternidade não encontrada"
+        
+        id_animal = maternity_df.loc[entrada, 'id_animal'].iloc[0]
+        maternity_df.loc[entrada, 'data_saida'] = data_saida
+        maternity_df.loc[entrada, 'status'] = 'Finalizada'
+        if observacao:
+            atual = maternity_df.loc[entrada, 'observacao'].iloc[0]
+            maternity_df.loc[entrada, 'observacao'] = f"{atual}\n{observacao}" if pd.notna(atual) and atual else observacao
+        
+        save_maternity(maternity_df)
+        _update_open_maternity(previous_signature, left=id_animal)
+        return True, "Saída da maternidade registrada com sucesso!"
+
+def get_active_maternity_sows(maternity_df=None, animals_df=None):
+    """
+    Lista as matrizes que estão na maternidade, com o ID da entrada em aberto.
+    
+    Args:
+        maternity_df: DataFrame de maternidade (padrão: índice mantido em memória)
+        animals_df: DataFrame de animais (padrão: tabela de animais)
+        
+    Returns:
+        DataFrame: Animais com entrada em aberto, com a coluna 'id_maternidade'
+    """
+    entries = get_open_maternity_entries() if maternity_df is None else compute_open_maternity_entries(maternity_df)
+    if animals_df is None:
+        animals_df = load_animals()
     
-    return sows
+    if not entries or animals_df.empty:
+        return pd.DataFrame()
+    
+    abertas = pd.DataFrame({'id_animal': list(entries), 'id_maternidade': list(entries.values())})
+    return animals_df.merge(abertas, on='id_animal', how='inner')
 
 def check_litter_exists(litters_df, maternity_id):
     """Check if a litter already exists for a given maternity entry"""
@@ -540,79 +3612,38 @@ def check_litter_exists(litters_df, maternity_id):
     return maternity_id in litters_df['id_maternidade'].values
 
 # Funções para o sistema de creche
-def load_nursery():
+def load_nursery(columns=None, where=None):
     """Load nursery data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(NURSERY_FILE):
-        return pd.read_csv(NURSERY_FILE)
+    if _table_exists(NURSERY_FILE):
+        return _load_table(NURSERY_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_creche': [],
-            'id_baia': [],           # ID da baia onde os leitões estão
-            'data_inicio': [],       # Data de início do período de creche
-            'data_fim_prevista': [], # Data prevista para o fim (saída para crescimento/terminação)
-            'data_fim_real': [],     # Data real de saída da creche
-            'status': [],            # Status (Ativo, Finalizado)
-            'observacao': []
-        })
+        return _empty_table(NURSERY_FILE, columns)
 
 def save_nursery(df):
     """Save nursery data to CSV"""
-    df.to_csv(NURSERY_FILE, index=False)
+    _save_table(df, NURSERY_FILE)
 
-def load_nursery_batches():
+def load_nursery_batches(columns=None, where=None):
     """Load nursery batches data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(NURSERY_BATCHES_FILE):
-        return pd.read_csv(NURSERY_BATCHES_FILE)
+    if _table_exists(NURSERY_BATCHES_FILE):
+        return _load_table(NURSERY_BATCHES_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_lote': [],
-            'id_creche': [],         # Referência ao período de creche
-            'id_desmame': [],        # Referência ao desmame que originou o lote (se aplicável)
-            'identificacao': [],     # Identificação do lote
-            'quantidade_inicial': [], # Quantidade inicial de leitões no lote
-            'quantidade_atual': [],  # Quantidade atual de leitões
-            'peso_medio_entrada': [], # Peso médio na entrada (kg)
-            'idade_media_entrada': [], # Idade média na entrada (dias)
-            'peso_medio_atual': [],  # Peso médio atual (kg)
-            'mortalidade': [],       # Taxa de mortalidade (%)
-            'origem': [],            # Origem dos leitões (Desmame, Transferência, Compra)
-            'data_entrada': [],      # Data de entrada na creche
-            'data_saida': [],        # Data de saída da creche (se aplicável)
-            'destino': [],           # Destino após a creche (Crescimento, Terminação, Venda)
-            'status': [],            # Status (Ativo, Finalizado)
-            'observacao': []
-        })
+        return _empty_table(NURSERY_BATCHES_FILE, columns)
 
 def save_nursery_batches(df):
     """Save nursery batches data to CSV"""
-    df.to_csv(NURSERY_BATCHES_FILE, index=False)
+    _save_table(df, NURSERY_BATCHES_FILE)
 
-def load_nursery_movements():
+def load_nursery_movements(columns=None, where=None):
     """Load nursery movements data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(NURSERY_MOVEMENTS_FILE):
-        return pd.read_csv(NURSERY_MOVEMENTS_FILE)
+    if _table_exists(NURSERY_MOVEMENTS_FILE):
+        return _load_table(NURSERY_MOVEMENTS_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_movimentacao': [],
-            'id_lote': [],          # Referência ao lote
-            'tipo': [],             # Tipo (Pesagem, Mortalidade, Medicação, Transferência, etc.)
-            'data': [],             # Data da movimentação
-            'quantidade': [],       # Quantidade de animais afetados
-            'peso_total': [],       # Peso total (para pesagens) (kg)
-            'peso_medio': [],       # Peso médio (kg)
-            'ganho_diario': [],     # Ganho diário desde a última pesagem (g/dia)
-            'causa': [],            # Causa (para mortalidade, medicação)
-            'destino': [],          # Destino (para transferências)
-            'medicamento': [],      # Medicamento (para medicação)
-            'dosagem': [],          # Dosagem (para medicação)
-            'via_aplicacao': [],    # Via de aplicação (para medicação)
-            'responsavel': [],      # Responsável pela movimentação
-            'observacao': []
-        })
+        return _empty_table(NURSERY_MOVEMENTS_FILE, columns)
 
 def save_nursery_movements(df):
     """Save nursery movements data to CSV"""
-    df.to_csv(NURSERY_MOVEMENTS_FILE, index=False)
+    _save_table(df, NURSERY_MOVEMENTS_FILE)
 
 def get_active_nursery_batches(nursery_batches_df):
     """Get list of active nursery batches"""
@@ -621,22 +3652,195 @@ def get_active_nursery_batches(nursery_batches_df):
     
     return nursery_batches_df[nursery_batches_df['status'] == 'Ativo']
 
-def calculate_nursery_metrics(batch_id, movements_df):
-    """Calculate metrics for a nursery batch based on movement data"""
-    if movements_df.empty or batch_id not in movements_df['id_lote'].values:
-        return {
-            'ultimo_peso_medio': 0,
-            'ultimo_ganho_diario': 0,
-            'data_ultima_pesagem': None,
-            'idade_atual': 0,
-            'dias_na_creche': 0
-        }
+# Colunas da curva de crescimento dos lotes da creche
+NURSERY_GROWTH_COLUMNS = [
+    'id_lote', 'identificacao', 'tipo', 'data', 'peso_medio', 'ganho_diario',
+    'dias_creche', 'idade'
+]
+
+# Ordem dos pontos de cada lote na curva
+NURSERY_GROWTH_POINT_ORDER = {'Entrada': 0, 'Pesagem': 1, 'Saída': 2}
+
+def build_nursery_growth_curves(nursery_batches_df, movements_df, batch_ids=None):
+    """
+    Monta a curva de crescimento (entrada, pesagens e saída) dos lotes da creche.
+    
+    Todos os lotes são processados de uma vez: as movimentações são filtradas
+    e unidas aos lotes em um único merge, e os dias de creche e a idade de
+    cada ponto vêm da diferença de datas vetorizada em relação à entrada.
+    
+    Args:
+        nursery_batches_df: DataFrame dos lotes. Se None, a curva tem só as
+            pesagens e saídas das movimentações, sem entrada nem idade
+        movements_df: DataFrame das movimentações da creche
+        batch_ids: Lotes a incluir (padrão: todos)
+        
+    Returns:
+        DataFrame: Um ponto por linha, com as colunas de NURSERY_GROWTH_COLUMNS,
+        ordenado por lote (na ordem de nursery_batches_df), tipo e data
+    """
+    movement_columns = ['id_lote', 'tipo', 'data', 'peso_medio', 'ganho_diario']
+    if movements_df is None or movements_df.empty:
+        movimentos = pd.DataFrame(columns=movement_columns)
+    else:
+        movimentos = movements_df.reindex(columns=movement_columns)
+    
+    lotes = None
+    if nursery_batches_df is not None:
+        lotes = nursery_batches_df.reindex(columns=[
+            'id_lote', 'identificacao', 'data_entrada', 'peso_medio_entrada',
+            'idade_media_entrada', 'data_saida'
+        ]).drop_duplicates('id_lote')
+        if batch_ids is not None:
+            lotes = lotes[lotes['id_lote'].isin(batch_ids)]
+        lotes = lotes.reset_index(drop=True)
+        batch_ids = lotes['id_lote']
+    
+    mask = movimentos['tipo'].isin(['Pesagem', 'Saída', 'Transferência'])
+    if batch_ids is not None:
+        mask &= movimentos['id_lote'].isin(batch_ids)
+    movimentos = movimentos[mask]
+    
+    # A saída de cada lote é a sua primeira movimentação de saída ou transferência
+    pesagens = movimentos[movimentos['tipo'] == 'Pesagem'].assign(tipo='Pesagem')
+    saidas = movimentos[movimentos['tipo'] != 'Pesagem'].drop_duplicates('id_lote').assign(tipo='Saída')
+    pontos = pd.concat([pesagens, saidas], ignore_index=True)
+    pontos['data'] = _as_datetime(pontos['data'])
+    
+    if lotes is None:
+        pontos['identificacao'] = None
+        pontos['dias_creche'] = np.nan
+        pontos['idade'] = np.nan
+        ordem_lote = pontos['id_lote']
+    else:
+        pontos = pontos.merge(
+            lotes[['id_lote', 'identificacao', 'data_entrada', 'idade_media_entrada', 'data_saida']],
+            on='id_lote', how='inner'
+        )
+        # Só os lotes com data de saída registrada têm o ponto de saída
+        pontos = pontos[(pontos['tipo'] != 'Saída') | pontos['data_saida'].notna()]
+        
+        entradas = lotes.assign(
+            tipo='Entrada',
+            data=_as_datetime(lotes['data_entrada']),
+            peso_medio=lotes['peso_medio_entrada'],
+            ganho_diario=np.nan
+        )
+        pontos = pd.concat([entradas, pontos], ignore_index=True)
+        
+        dias_creche = (pontos['data'] - _as_datetime(pontos['data_entrada'])).dt.days
+        pontos['dias_creche'] = dias_creche.where(pontos['tipo'] != 'Entrada', 0)
+        pontos['idade'] = pd.to_numeric(pontos['idade_media_entrada'], errors='coerce') + pontos['dias_creche']
+        ordem_lote = pontos['id_lote'].map(pd.Series(lotes.index, index=lotes['id_lote']))
+    
+    pontos = pontos.assign(
+        _ordem_lote=ordem_lote,
+        _ordem_tipo=pontos['tipo'].map(NURSERY_GROWTH_POINT_ORDER)
+    ).sort_values(['_ordem_lote', '_ordem_tipo', 'data'], kind='mergesort')
+    
+    return pontos.reindex(columns=NURSERY_GROWTH_COLUMNS).reset_index(drop=True)
+
+# Métricas de todos os lotes da creche
+NURSERY_BATCH_METRICS_COLUMNS = [
+    'ultimo_peso_medio', 'ultimo_ganho_diario', 'data_ultima_pesagem', 'gpd_medio',
+    'idade_atual', 'dias_na_creche'
+]
+
+def _nursery_weighing_metrics(nursery_batches_df, movements_df):
+    """Return the date-independent metrics of every batch, indexed by id_lote"""
+    curvas = build_nursery_growth_curves(nursery_batches_df, movements_df)
+    entradas = curvas[curvas['tipo'] == 'Entrada'].set_index('id_lote')
+    ultimas = curvas[curvas['tipo'] == 'Pesagem'].drop_duplicates('id_lote', keep='last').set_index('id_lote')
+    
+    metrics = pd.DataFrame(index=entradas.index)
+    metrics['status'] = metrics.index.map(
+        nursery_batches_df.drop_duplicates('id_lote').set_index('id_lote')['status']
+    ) if 'status' in nursery_batches_df.columns else None
+    metrics['data_entrada'] = entradas['data']
+    metrics['idade_media_entrada'] = entradas['idade']
+    
+    # Lotes sem pesagem ficam com peso e ganho zerados, como em calculate_nursery_metrics
+    metrics['ultimo_peso_medio'] = ultimas['peso_medio'].reindex(metrics.index, fill_value=0)
+    metrics['ultimo_ganho_diario'] = ultimas['ganho_diario'].reindex(metrics.index, fill_value=0)
+    metrics['data_ultima_pesagem'] = ultimas['data'].reindex(metrics.index)
+    
+    # Ganho médio diário desde a entrada até a última pesagem (g/dia)
+    dias = ultimas['dias_creche'].reindex(metrics.index)
+    ganho = (ultimas['peso_medio'].reindex(metrics.index) - entradas['peso_medio']) * 1000
+    metrics['gpd_medio'] = (ganho / dias).where(dias > 0)
+    return metrics
+
+def _finish_nursery_batch_metrics(metrics, today=None):
+    """Add the current age and days in nursery, which depend on the reference date"""
+    today = pd.Timestamp(today if today is not None else datetime.now().date())
+    metrics = metrics.copy()
+    metrics['dias_na_creche'] = (today - _as_datetime(metrics['data_entrada'])).dt.days.fillna(0).astype('int64')
+    metrics['idade_atual'] = metrics['idade_media_entrada'] + metrics['dias_na_creche']
+    return metrics[NURSERY_BATCH_METRICS_COLUMNS]
+
+def compute_nursery_batch_metrics(nursery_batches_df, movements_df, today=None):
+    """
+    Calcula as métricas de todos os lotes da creche de uma vez.
+    
+    Args:
+        nursery_batches_df: DataFrame dos lotes
+        movements_df: DataFrame das movimentações da creche
+        today: Data de referência para a idade e os dias na creche (padrão: hoje)
+        
+    Returns:
+        DataFrame: Indexado por id_lote, com a última pesagem (peso, ganho
+        diário e data), o GPD médio desde a entrada, a idade atual e os dias
+        na creche
+    """
+    if nursery_batches_df is None or nursery_batches_df.empty:
+        return pd.DataFrame(columns=NURSERY_BATCH_METRICS_COLUMNS, index=pd.Index([], name='id_lote'))
+    
+    return _finish_nursery_batch_metrics(_nursery_weighing_metrics(nursery_batches_df, movements_df), today)
+
+# Métricas dos lotes mantidas em memória: recalculadas só quando a tabela de
+# movimentações (ou a de lotes) muda; a idade e os dias na creche são
+# completados a cada consulta.
+_nursery_metrics_cache = None
+_nursery_metrics_lock = threading.Lock()
+
+def get_nursery_batch_metrics(today=None, active_only=True):
+    """
+    Retorna as métricas dos lotes da creche a partir do cache em memória.
+    
+    Args:
+        today: Data de referência para a idade e os dias na creche (padrão: hoje)
+        active_only: Se True, retorna só os lotes ativos
+        
+    Returns:
+        DataFrame: Métricas indexadas por id_lote (veja compute_nursery_batch_metrics)
+    """
+    global _nursery_metrics_cache
+    if not _table_exists(NURSERY_BATCHES_FILE):
+        return compute_nursery_batch_metrics(None, None)
+    
+    movements_exist = _table_exists(NURSERY_MOVEMENTS_FILE)
+    signature = (
+        _table_signature(NURSERY_MOVEMENTS_FILE) if movements_exist else None,
+        _table_signature(NURSERY_BATCHES_FILE)
+    )
+    with _nursery_metrics_lock:
+        cached = _nursery_metrics_cache
     
-    # Filtrar movimentações do lote
-    batch_movements = movements_df[movements_df['id_lote'] == batch_id]
+    if cached is None or cached[0] != signature:
+        movements_df = _cached_table(NURSERY_MOVEMENTS_FILE) if movements_exist else None
+        cached = (signature, _nursery_weighing_metrics(_cached_table(NURSERY_BATCHES_FILE), movements_df))
+        with _nursery_metrics_lock:
+            _nursery_metrics_cache = cached
     
-    # Obter pesagens
-    pesagens = batch_movements[batch_movements['tipo'] == 'Pesagem'].sort_values('data')
+    metrics = cached[1]
+    if active_only:
+        metrics = metrics[metrics['status'] == 'Ativo']
+    return _finish_nursery_batch_metrics(metrics, today)
+
+def calculate_nursery_metrics(batch_id, movements_df):
+    """Calculate metrics for a nursery batch based on movement data"""
+    pesagens = build_nursery_growth_curves(None, movements_df, batch_ids=[batch_id])
+    pesagens = pesagens[pesagens['tipo'] == 'Pesagem']
     
     if pesagens.empty:
         return {
@@ -688,91 +3892,135 @@ def get_batch_details(batch_id, nursery_batches_df, movements_df):
     
     return result
 
+def registrar_pesagens_creche(pesagens, responsavel=None, observacao=None, transacao=None):
+    """
+    Registra de uma só vez as pesagens de vários lotes da creche.
+    
+    O ganho diário de cada lote é calculado em relação à última pesagem ou
+    entrada anterior (um único merge_asof para todos os lotes) ou, se não
+    houver, ao peso e à data de entrada do lote. As movimentações são
+    gravadas em uma única escrita e o peso médio atual dos lotes é
+    atualizado em seguida, exceto quando a pesagem é anterior à última já
+    gravada para o lote.
+    
+    Args:
+        pesagens: DataFrame com as colunas 'id_lote', 'peso_medio' e 'data';
+            'quantidade' (padrão: quantidade atual do lote), 'responsavel' e
+            'observacao' são opcionais
+        responsavel: Responsável pelas pesagens
+        observacao: Observação gravada nas linhas sem observação própria
+        transacao: Transação em andamento (opcional)
+        
+    Returns:
+        tuple: (sucesso, mensagem)
+    """
+    pesagens = pesagens.reset_index(drop=True)
+    if pesagens.empty:
+        return False, "Nenhuma pesagem informada"
+    
+    with _unit_of_work(transacao, NURSERY_BATCHES_FILE, NURSERY_MOVEMENTS_FILE) as tx:
+        lotes_df = tx.load(NURSERY_BATCHES_FILE)
+        lotes = lotes_df.drop_duplicates('id_lote').set_index('id_lote')
+        
+        desconhecidos = ~pesagens['id_lote'].isin(lotes.index)
+        if desconhecidos.any():
+            return False, f"{int(desconhecidos.sum())} lote(s) não encontrado(s)"
+        
+        pesagens['data'] = pd.to_datetime(pesagens['data'])
+        pesagens['peso_medio'] = pd.to_numeric(pesagens['peso_medio'])
+        quantidade_lote = pesagens['id_lote'].map(lotes['quantidade_atual'])
+        quantidade = pesagens['quantidade'].fillna(quantidade_lote) if 'quantidade' in pesagens else quantidade_lote
+        
+        # Última pesagem ou entrada anterior de cada lote
+        historico = tx.query(NURSERY_MOVEMENTS_FILE)
+        if historico.empty:
+            historico = pd.DataFrame(columns=['id_lote', 'tipo', 'data', 'peso_medio'])
+        historico = historico[
+            historico['id_lote'].isin(pesagens['id_lote']) &
+            historico['tipo'].isin(['Pesagem', 'Entrada'])
+        ][['id_lote', 'tipo', 'data', 'peso_medio']]
+        historico['data'] = pd.to_datetime(historico['data'], errors='coerce')
+        historico['peso_medio'] = pd.to_numeric(historico['peso_medio'], errors='coerce')
+        ultima_gravada = historico[historico['tipo'] == 'Pesagem'].groupby('id_lote')['data'].max()
+        historico = pd.concat([historico.drop(columns='tipo'), pesagens[['id_lote', 'data', 'peso_medio']]],
+                              ignore_index=True)
+        
+        anteriores = _previous_measurement(pesagens, historico, 'id_lote', 'data', 'peso_medio')
+        
+        # Sem pesagem anterior, a referência é a entrada do lote
+        peso_anterior = anteriores['valor_anterior'].fillna(
+            pd.to_numeric(pesagens['id_lote'].map(lotes['peso_medio_entrada']), errors='coerce')
+        )
+        data_anterior = anteriores['data_anterior'].fillna(
+            pd.to_datetime(pesagens['id_lote'].map(lotes['data_entrada']), errors='coerce')
+        )
+        dias = (pesagens['data'] - data_anterior).dt.days
+        ganho_diario = ((pesagens['peso_medio'] - peso_anterior) * 1000 / dias).where(dias > 0, 0).fillna(0)
+        
+        novas_movimentacoes = pd.DataFrame({
+            'id_movimentacao': [str(uuid.uuid4()) for _ in range(len(pesagens))],
+            'id_lote': pesagens['id_lote'],
+            'tipo': 'Pesagem',
+            'data': pesagens['data'].dt.strftime('%Y-%m-%d'),
+            'quantidade': quantidade,
+            'peso_total': pesagens['peso_medio'] * quantidade,
+            'peso_medio': pesagens['peso_medio'],
+            'ganho_diario': ganho_diario,
+            'causa': None,
+            'destino': None,
+            'medicamento': None,
+            'dosagem': None,
+            'via_aplicacao': None,
+            'responsavel': pesagens['responsavel'].fillna(responsavel) if 'responsavel' in pesagens else responsavel,
+            'observacao': pesagens['observacao'].fillna(observacao) if 'observacao' in pesagens else observacao
+        })
+        
+        # Peso médio atual de cada lote: o da pesagem mais recente, desde que
+        # não seja anterior a uma pesagem já gravada (lançamento retroativo)
+        ultimas = pesagens.sort_values('data', kind='stable').drop_duplicates('id_lote', keep='last').set_index('id_lote')
+        retroativas = ultimas['data'].to_numpy() < ultima_gravada.reindex(ultimas.index).to_numpy()
+        ultimas = ultimas.loc[~retroativas, 'peso_medio']
+        pesados = lotes_df['id_lote'].isin(ultimas.index)
+        lotes_df.loc[pesados, 'peso_medio_atual'] = lotes_df.loc[pesados, 'id_lote'].map(ultimas)
+        
+        tx.append(NURSERY_MOVEMENTS_FILE,
+                  novas_movimentacoes.astype(object).where(novas_movimentacoes.notna(), None).to_dict('records'))
+        tx.save(NURSERY_BATCHES_FILE, lotes_df)
+        return True, f"{len(novas_movimentacoes)} pesagens registradas com sucesso"
+
 # Funções para o sistema de seleção de leitoas
-def load_gilts():
+def load_gilts(columns=None, where=None):
     """Load gilts data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(GILTS_FILE):
-        return pd.read_csv(GILTS_FILE)
+    if _table_exists(GILTS_FILE):
+        return _load_table(GILTS_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_leitoa': [],
-            'id_animal': [],          # ID do animal no cadastro geral (se aplicável)
-            'identificacao': [],      # Identificação da leitoa
-            'brinco': [],             # Número do brinco
-            'tatuagem': [],           # Tatuagem
-            'chip': [],               # Número do chip (se aplicável)
-            'data_nascimento': [],    # Data de nascimento
-            'origem': [],             # Origem (Própria, Comprada, etc.)
-            'genetica': [],           # Linhagem genética
-            'mae': [],                # Identificação da mãe
-            'pai': [],                # Identificação do pai
-            'data_selecao': [],       # Data de seleção para reprodução
-            'peso_selecao': [],       # Peso na seleção (kg)
-            'idade_selecao': [],      # Idade na seleção (dias)
-            'status': [],             # Status (Selecionada, Em Adaptação, Em Reprodução, Descartada)
-            'data_primeiro_cio': [],  # Data do primeiro cio observado
-            'observacao': []
-        })
+        return _empty_table(GILTS_FILE, columns)
 
 def save_gilts(df):
     """Save gilts data to CSV"""
-    df.to_csv(GILTS_FILE, index=False)
+    _save_table(df, GILTS_FILE)
 
-def load_gilts_selection():
+def load_gilts_selection(columns=None, where=None):
     """Load gilts selection data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(GILTS_SELECTION_FILE):
-        return pd.read_csv(GILTS_SELECTION_FILE)
+    if _table_exists(GILTS_SELECTION_FILE):
+        return _load_table(GILTS_SELECTION_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_selecao': [],
-            'id_leitoa': [],                  # ID da leitoa
-            'data_selecao': [],               # Data da seleção
-            'peso': [],                       # Peso (kg)
-            'idade': [],                      # Idade (dias)
-            'espessura_toucinho': [],         # Espessura de toucinho (mm)
-            'profundidade_lombo': [],         # Profundidade de lombo (mm)
-            'comprimento_corporal': [],       # Comprimento corporal (cm)
-            'largura_ombros': [],             # Largura dos ombros (cm)
-            'largura_quadril': [],            # Largura do quadril (cm)
-            'altura_posterior': [],           # Altura posterior (cm)
-            'numero_tetos': [],               # Número de tetos funcionais
-            'tetos_invertidos': [],           # Número de tetos invertidos
-            'qualidade_aprumos': [],          # Qualidade dos aprumos (Excelente, Boa, Regular, Ruim)
-            'temperamento': [],               # Temperamento (Dócil, Normal, Agressivo)
-            'avaliacao_visual': [],           # Avaliação visual (Excelente, Bom, Regular, Ruim)
-            'escore_geral': [],               # Escore geral (1-5)
-            'recomendacao': [],               # Recomendação (Selecionada, Descartada)
-            'motivo_recomendacao': [],        # Motivo da recomendação
-            'tecnico_responsavel': [],        # Técnico responsável pela avaliação
-            'observacao': []
-        })
+        return _empty_table(GILTS_SELECTION_FILE, columns)
 
 def save_gilts_selection(df):
     """Save gilts selection data to CSV"""
-    df.to_csv(GILTS_SELECTION_FILE, index=False)
+    _save_table(df, GILTS_SELECTION_FILE)
 
-def load_gilts_discard():
+def load_gilts_discard(columns=None, where=None):
     """Load gilts discard data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(GILTS_DISCARD_FILE):
-        return pd.read_csv(GILTS_DISCARD_FILE)
+    if _table_exists(GILTS_DISCARD_FILE):
+        return _load_table(GILTS_DISCARD_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_descarte': [],
-            'id_leitoa': [],              # ID da leitoa
-            'data_descarte': [],          # Data do descarte
-            'peso_descarte': [],          # Peso no descarte (kg)
-            'idade_descarte': [],         # Idade no descarte (dias)
-            'motivo_principal': [],       # Motivo principal do descarte
-            'motivos_secundarios': [],    # Motivos secundários (separados por vírgula)
-            'destino': [],                # Destino (Abate, Venda, Outro)
-            'valor_venda': [],            # Valor de venda (se aplicável)
-            'tecnico_responsavel': [],    # Técnico responsável pelo descarte
-            'observacao': []
-        })
+        return _empty_table(GILTS_DISCARD_FILE, columns)
 
 def save_gilts_discard(df):
     """Save gilts discard data to CSV"""
-    df.to_csv(GILTS_DISCARD_FILE, index=False)
+    _save_table(df, GILTS_DISCARD_FILE)
 
 def get_available_gilts(gilts_df):
     """Get list of available gilts (not discarded)"""
@@ -788,28 +4036,16 @@ def get_discarded_gilts(gilts_df):
     
     return gilts_df[gilts_df['status'] == 'Descartada']
 
-def load_caliber_scores():
+def load_caliber_scores(columns=None, where=None):
     """Load caliber scores data from CSV or create empty DataFrame if file doesn't exist"""
-    file_path = "data/caliber_scores.csv"
-    if os.path.exists(file_path):
-        return pd.read_csv(file_path)
+    if _table_exists(CALIBER_SCORES_FILE):
+        return _load_table(CALIBER_SCORES_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_score': [],
-            'id_animal': [],
-            'data_medicao': [],
-            'medida_p1': [],  # P1 (Primeira vértebra lombar)
-            'medida_p2': [],  # P2 (Última costela)
-            'medida_p3': [],  # P3 (Última vértebra torácica)
-            'score_calculado': [],
-            'condicao_corporal': [],
-            'tecnico': [],
-            'observacao': []
-        })
+        return _empty_table(CALIBER_SCORES_FILE, columns)
 
 def save_caliber_scores(df):
     """Save caliber scores data to CSV"""
-    df.to_csv("data/caliber_scores.csv", index=False)
+    _save_table(df, CALIBER_SCORES_FILE)
 
 def calculate_body_condition(p2_value):
     """Calculate body condition score based on P2 measurement (mm)"""
@@ -863,35 +4099,16 @@ def calculate_gilts_statistics(gilts_df, selection_df, discard_df):
     
     return stats
 
-# Add after the last function in the file
-
-# File path for mortality records
-MORTALITY_FILE = "data/mortality.csv"
-
-def load_mortality_records():
+def load_mortality_records(columns=None, where=None):
     """Load mortality records from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(MORTALITY_FILE):
-        return pd.read_csv(MORTALITY_FILE)
+    if _table_exists(MORTALITY_FILE):
+        return _load_table(MORTALITY_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_morte': [],
-            'id_animal': [],
-            'data_morte': [],
-            'causa_morte': [],
-            'categoria': [],
-            'idade_dias': [],
-            'peso_morte': [],
-            'local_morte': [],  # Ex: Maternidade, Creche, etc.
-            'necropsia': [],    # Realizou necropsia? (Sim/Não)
-            'resultado_necropsia': [],
-            'medidas_preventivas': [],
-            'responsavel': [],
-            'observacao': []
-        })
+        return _empty_table(MORTALITY_FILE, columns)
 
 def save_mortality_records(df):
     """Save mortality records to CSV"""
-    df.to_csv(MORTALITY_FILE, index=False)
+    _save_table(df, MORTALITY_FILE)
 
 def calculate_mortality_statistics(mortality_df, start_date=None, end_date=None, category=None):
     """Calculate mortality statistics for the given period and category"""
@@ -952,119 +4169,260 @@ def generate_mortality_report(mortality_df, animals_df, start_date=None, end_dat
 
     return report_df.sort_values('data_morte', ascending=False)
 
-def load_vaccines():
+def load_vaccines(columns=None, where=None):
     """Load vaccines data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(VACCINES_FILE):
-        return pd.read_csv(VACCINES_FILE)
+    if _table_exists(VACCINES_FILE):
+        return _load_table(VACCINES_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_vacina': [],
-            'nome': [],
-            'fabricante': [],
-            'tipo': [],  # Ex: Bacteriana, Viral, etc.
-            'forma_aplicacao': [],  # Ex: Intramuscular, Subcutânea
-            'dose_padrao': [],
-            'unidade_dose': [],  # Ex: mL, mg
-            'intervalo_minimo': [],  # Dias entre doses
-            'validade_dias': [],
-            'observacao': []
-        })
+        return _empty_table(VACCINES_FILE, columns)
 
 def save_vaccines(df):
     """Save vaccines data to CSV"""
-    df.to_csv(VACCINES_FILE, index=False)
+    _save_table(df, VACCINES_FILE)
 
-def load_vaccination_protocols():
+def load_vaccination_protocols(columns=None, where=None):
     """Load vaccination protocols data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(VACCINATION_PROTOCOLS_FILE):
-        return pd.read_csv(VACCINATION_PROTOCOLS_FILE)
+    if _table_exists(VACCINATION_PROTOCOLS_FILE):
+        return _load_table(VACCINATION_PROTOCOLS_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_protocolo': [],
-            'nome_protocolo': [],
-            'categoria_animal': [],  # Ex: Matriz, Leitão, etc.
-            'idade_aplicacao': [],  # Idade em dias
-            'id_vacina': [],
-            'dose': [],
-            'intervalo_reforco': [],  # Dias até o reforço
-            'prioridade': [],  # Alta, Média, Baixa
-            'obrigatoria': [],  # True/False
-            'observacao': []
-        })
+        return _empty_table(VACCINATION_PROTOCOLS_FILE, columns)
 
 def save_vaccination_protocols(df):
     """Save vaccination protocols data to CSV"""
-    df.to_csv(VACCINATION_PROTOCOLS_FILE, index=False)
+    _save_table(df, VACCINATION_PROTOCOLS_FILE)
 
-def load_vaccination_records():
+def load_vaccination_records(columns=None, where=None):
     """Load vaccination records data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(VACCINATION_RECORDS_FILE):
-        return pd.read_csv(VACCINATION_RECORDS_FILE)
+    if _table_exists(VACCINATION_RECORDS_FILE):
+        return _load_table(VACCINATION_RECORDS_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_registro': [],
-            'id_animal': [],
-            'id_vacina': [],
-            'id_protocolo': [],  # Pode ser nulo se for vacinação avulsa
-            'data_aplicacao': [],
-            'dose_aplicada': [],
-            'via_aplicacao': [],
-            'lote_vacina': [],
-            'data_validade': [],
-            'responsavel': [],
-            'local_aplicacao': [],  # Ex: Pescoço, Pernil
-            'reacao': [],  # Registrar reações adversas
-            'observacao': []
-        })
+        return _empty_table(VACCINATION_RECORDS_FILE, columns)
 
 def save_vaccination_records(df):
     """Save vaccination records data to CSV"""
-    df.to_csv(VACCINATION_RECORDS_FILE, index=False)
+    _save_table(df, VACCINATION_RECORDS_FILE)
+
+def query_vaccination_records(id_animal=None, start_date=None, end_date=None):
+    """Load vaccination records filtered by animal and/or application date range"""
+    return query_table(VACCINATION_RECORDS_FILE, id_animal=id_animal,
+                       start_date=start_date, end_date=end_date)
+
+def _as_datetime(values):
+    """Convert a Series to datetime, skipping the conversion when it is already typed"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, errors='coerce')
+
+# Colunas da agenda de vacinação do rebanho
+VACCINATION_SCHEDULE_COLUMNS = [
+    'id_animal', 'identificacao', 'categoria', 'id_protocolo', 'nome_protocolo',
+    'id_vacina', 'vacina', 'dose', 'prioridade', 'ultima_aplicacao', 'data_prevista',
+    'dias_restantes', 'status', 'origem'
+]
+
+def build_vaccination_schedule(animals_df, protocols_df, records_df, today=None):
+    """
+    Monta a agenda de vacinação de todo o rebanho em uma única passada vetorizada.
+    
+    A agenda reúne duas fontes:
+    - Protocolos: cada animal é combinado com os protocolos da sua categoria e
+      com a última aplicação de cada protocolo. A data prevista é a idade de
+      aplicação a partir do nascimento ou, se já houve aplicação, o dia
+      seguinte ao fim do intervalo de reforço (a que for mais tarde).
+      Protocolos aplicados e sem intervalo de reforço não voltam à agenda.
+    - Registros: a 'proxima_dose' informada no registro mais recente de cada
+      vacina de cada animal.
+    
+    Args:
+        animals_df: DataFrame de animais
+        protocols_df: DataFrame de protocolos de vacinação
+        records_df: DataFrame de registros de vacinação
+        today: Data de referência (padrão: hoje)
+        
+    Returns:
+        DataFrame: Uma linha por vacina prevista, com 'data_prevista',
+        'dias_restantes' (negativo quando atrasada) e 'status'
+        ('Atrasada', 'Hoje' ou 'Agendada'), ordenada por data prevista
+    """
+    today = pd.Timestamp(today if today is not None else datetime.now().date()).normalize()
+    partes = []
+    
+    registros = records_df.copy() if not records_df.empty else pd.DataFrame(columns=['id_animal', 'data_aplicacao'])
+    registros['data_aplicacao'] = _as_datetime(registros['data_aplicacao'])
+    
+    # Vacinas previstas pelos protocolos
+    if not animals_df.empty and not protocols_df.empty:
+        animais = animals_df[['id_animal', 'identificacao', 'categoria', 'data_nascimento']].copy()
+        animais['data_nascimento'] = _as_datetime(animais['data_nascimento'])
+        animais = animais.dropna(subset=['data_nascimento'])
+        animais['categoria'] = animais['categoria'].astype(object)
+        
+        protocolos = protocols_df.copy()
+        protocolos['categoria_animal'] = protocolos['categoria_animal'].astype(object)
+        
+        agenda = animais.merge(protocolos, left_on='categoria', right_on='categoria_animal')
+        
+        if 'id_protocolo' in registros.columns:
+            ultimas = (
+                registros.dropna(subset=['id_protocolo', 'data_aplicacao'])
+                .groupby(['id_animal', 'id_protocolo'], observed=True)['data_aplicacao'].max()
+                .rename('ultima_aplicacao').reset_index()
+            )
+            ultimas['id_protocolo'] = ultimas['id_protocolo'].astype(object)
+            agenda['id_protocolo'] = agenda['id_protocolo'].astype(object)
+            agenda = agenda.merge(ultimas, on=['id_animal', 'id_protocolo'], how='left')
+        else:
+            agenda['ultima_aplicacao'] = pd.NaT
+        
+        por_idade = agenda['data_nascimento'] + pd.to_timedelta(
+            pd.to_numeric(agenda['idade_aplicacao'], errors='coerce'), unit='D')
+        # Uma aplicação feita há até intervalo_reforco dias (inclusive) ainda
+        # cobre o protocolo: o reforço vence no dia seguinte ao fim do intervalo
+        # (com intervalo 0, uma aplicação de hoje só vence amanhã)
+        por_reforco = agenda['ultima_aplicacao'].dt.normalize() + pd.to_timedelta(
+            pd.to_numeric(agenda['intervalo_reforco'], errors='coerce') + 1, unit='D')
+        
+        # Dose única já aplicada: sai da agenda
+        aplicada_sem_reforco = agenda['ultima_aplicacao'].notna() & por_reforco.isna()
+        agenda['data_prevista'] = por_reforco.where(por_reforco > por_idade, por_idade)
+        agenda = agenda[~aplicada_sem_reforco & agenda['data_prevista'].notna()]
+        
+        partes.append(pd.DataFrame({
+            'id_animal': agenda['id_animal'],
+            'identificacao': agenda['identificacao'],
+            'categoria': agenda['categoria'],
+            'id_protocolo': agenda['id_protocolo'],
+            'nome_protocolo': agenda['nome_protocolo'],
+            'id_vacina': agenda['id_vacina'],
+            'vacina': agenda['nome_protocolo'],
+            'dose': agenda['dose'],
+            'prioridade': agenda['prioridade'],
+            'ultima_aplicacao': agenda['ultima_aplicacao'],
+            'data_prevista': agenda['data_prevista'],
+            'origem': 'Protocolo'
+        }))
+    
+    # Próximas doses informadas nos registros de vacinação
+    if 'proxima_dose' in registros.columns:
+        chave_vacina = 'nome_vacina' if 'nome_vacina' in registros.columns else 'id_vacina'
+        ultimos = registros.dropna(subset=['data_aplicacao', chave_vacina])
+        ultimos = ultimos.sort_values('data_aplicacao').drop_duplicates(['id_animal', chave_vacina], keep='last')
+        ultimos = ultimos.assign(proxima_dose=_as_datetime(ultimos['proxima_dose']))
+        # Próxima dose igual à aplicação indica que não há próxima dose
+        ultimos = ultimos[ultimos['proxima_dose'] > ultimos['data_aplicacao']]
+        
+        if not ultimos.empty:
+            partes.append(pd.DataFrame({
+                'id_animal': ultimos['id_animal'],
+                'identificacao': animal_labels(ultimos['id_animal']),
+                'categoria': animal_labels(ultimos['id_animal'], 'categoria', "Desconhecida"),
+                'id_protocolo': ultimos['id_protocolo'] if 'id_protocolo' in ultimos else None,
+                'nome_protocolo': None,
+                'id_vacina': ultimos['id_vacina'] if 'id_vacina' in ultimos else None,
+                'vacina': ultimos[chave_vacina],
+                'dose': ultimos['dose'] if 'dose' in ultimos else None,
+                'prioridade': None,
+                'ultima_aplicacao': ultimos['data_aplicacao'],
+                'data_prevista': ultimos['proxima_dose'],
+                'origem': 'Registro'
+            }))
+    
+    if not partes:
+        return pd.DataFrame(columns=VACCINATION_SCHEDULE_COLUMNS)
+    
+    schedule = pd.concat(partes, ignore_index=True)
+    schedule['data_prevista'] = _as_datetime(schedule['data_prevista']).dt.normalize()
+    schedule['dias_restantes'] = (schedule['data_prevista'] - today).dt.days
+    schedule['status'] = np.select(
+        [schedule['dias_restantes'] < 0, schedule['dias_restantes'] == 0],
+        ['Atrasada', 'Hoje'],
+        default='Agendada'
+    )
+    return schedule[VACCINATION_SCHEDULE_COLUMNS].sort_values(
+        ['data_prevista', 'identificacao'], kind='stable'
+    ).reset_index(drop=True)
+
+# Agenda do rebanho em cache, refeita só quando animais, protocolos ou
+# registros mudam (ou o dia muda)
+_vaccination_schedule_cache = None
+_vaccination_schedule_lock = threading.Lock()
+
+def get_vaccination_schedule(today=None):
+    """
+    Retorna a agenda de vacinação do rebanho, reaproveitada enquanto os dados não mudarem.
+    
+    Args:
+        today: Data de referência (padrão: hoje)
+        
+    Returns:
+        DataFrame: Agenda no formato de build_vaccination_schedule
+    """
+    global _vaccination_schedule_cache
+    today = pd.Timestamp(today if today is not None else datetime.now().date()).normalize()
+    tables = (ANIMALS_FILE, VACCINATION_PROTOCOLS_FILE, VACCINATION_RECORDS_FILE)
+    key = (today,) + tuple(
+        _table_signature(file_path) if _table_exists(file_path) else None for file_path in tables
+    )
+    
+    with _vaccination_schedule_lock:
+        cached = _vaccination_schedule_cache
+    if cached is not None and cached[0] == key:
+        return cached[1].copy()
+    
+    animals_df, protocols_df, records_df = (
+        _cached_table(file_path) if _table_exists(file_path) else _empty_table(file_path)
+        for file_path in tables
+    )
+    schedule = build_vaccination_schedule(animals_df, protocols_df, records_df, today)
+    
+    with _vaccination_schedule_lock:
+        _vaccination_schedule_cache = (key, schedule)
+    return schedule.copy()
+
+def get_vaccinations_due(horizon_days=30, include_overdue=True, today=None):
+    """
+    Lista as vacinas previstas até um horizonte de dias (ex.: 7, 30 ou 90).
+    
+    Args:
+        horizon_days: Quantidade de dias à frente
+        include_overdue: Incluir as vacinas atrasadas
+        today: Data de referência (padrão: hoje)
+        
+    Returns:
+        DataFrame: Linhas da agenda com dias_restantes até horizon_days
+    """
+    schedule = get_vaccination_schedule(today)
+    mask = schedule['dias_restantes'] <= horizon_days
+    if not include_overdue:
+        mask &= schedule['dias_restantes'] >= 0
+    return schedule[mask].reset_index(drop=True)
 
 def calculate_next_vaccinations(animal_id, animals_df, protocols_df, records_df):
     """Calculate next vaccinations needed for an animal based on protocols and history"""
     if animal_id not in animals_df['id_animal'].values:
         return pd.DataFrame()  # Animal não encontrado
     
-    animal = animals_df[animals_df['id_animal'] == animal_id].iloc[0]
-    categoria = animal['categoria']
-
-    # Filtrar protocolos para a categoria do animal
-    protocolos_categoria = protocols_df[protocols_df['categoria_animal'] == categoria]
-
-    if protocolos_categoria.empty:
-        return pd.DataFrame()  # Sem protocolos para esta categoria
-
-    # Calcular idade do animal em dias
-    if pd.isna(animal['data_nascimento']):
-        return pd.DataFrame()  # Data de nascimento necessária
-
-    idade_dias = calculate_age(pd.to_datetime(animal['data_nascimento']).date())
-
-    # Verificar vacinas já aplicadas
-    vacinas_aplicadas = records_df[records_df['id_animal'] == animal_id]
-
-    proximas_vacinas = []
-    for _, protocolo in protocolos_categoria.iterrows():
-        # Verificar se a idade é adequada
-        if idade_dias >= protocolo['idade_aplicacao']:
-            # Verificar se já foi aplicada
-            if vacinas_aplicadas.empty or not any(
-                (vacinas_aplicadas['id_protocolo'] == protocolo['id_protocolo']) &
-                (pd.to_datetime(vacinas_aplicadas['data_aplicacao']).dt.date >= 
-                 (datetime.now().date() - timedelta(days=protocolo['intervalo_reforco'])))
-            ):
-                proximas_vacinas.append({
-                    'id_protocolo': protocolo['id_protocolo'],
-                    'nome_protocolo': protocolo['nome_protocolo'],
-                    'id_vacina': protocolo['id_vacina'],
-                    'idade_aplicacao': protocolo['idade_aplicacao'],
-                    'prioridade': protocolo['prioridade'],
-                    'status': 'Pendente',
-                    'data_prevista': (datetime.now() + timedelta(days=1)).date()
-                })
-
-    return pd.DataFrame(proximas_vacinas)
+    animal_df = animals_df[animals_df['id_animal'] == animal_id]
+    records_animal = records_df[records_df['id_animal'] == animal_id] if not records_df.empty else records_df
+    
+    # Apenas a parte dos protocolos: as próximas doses dos registros ficam de fora
+    schedule = build_vaccination_schedule(
+        animal_df, protocols_df, records_animal.drop(columns=['proxima_dose'], errors='ignore')
+    )
+    pendentes = schedule[schedule['dias_restantes'] <= 0]
+    if pendentes.empty:
+        return pd.DataFrame()
+    
+    return pd.DataFrame({
+        'id_protocolo': pendentes['id_protocolo'],
+        'nome_protocolo': pendentes['nome_protocolo'],
+        'id_vacina': pendentes['id_vacina'],
+        'idade_aplicacao': pendentes['id_protocolo'].map(
+            protocols_df.drop_duplicates('id_protocolo').set_index('id_protocolo')['idade_aplicacao']),
+        'prioridade': pendentes['prioridade'],
+        'status': 'Pendente',
+        'data_prevista': (datetime.now() + timedelta(days=1)).date()
+    }).reset_index(drop=True)
 
 def get_vaccination_history(animal_id, records_df, vaccines_df):
     """Get complete vaccination history for an animal"""
@@ -1118,75 +4476,180 @@ def generate_vaccination_report(start_date, end_date, records_df, animals_df, va
 
     return period_records.sort_values('data_aplicacao', ascending=False)
 
-def load_heat_detection():
+def load_heat_detection(columns=None, where=None):
     """Load heat detection data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(HEAT_DETECTION_FILE):
-        return pd.read_csv(HEAT_DETECTION_FILE)
+    if _table_exists(HEAT_DETECTION_FILE):
+        return _load_table(HEAT_DETECTION_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_rufia': [],
-            'id_animal': [],  # ID do rufião
-            'nome': [],
-            'status': [],  # Ativo/Inativo
-            'data_inicio': [],
-            'data_fim': [],  # Pode ser null se ainda estiver ativo
-            'observacao': []
-        })
+        return _empty_table(HEAT_DETECTION_FILE, columns)
 
 def save_heat_detection(df):
     """Save heat detection data to CSV"""
-    df.to_csv(HEAT_DETECTION_FILE, index=False)
+    _save_table(df, HEAT_DETECTION_FILE)
 
-def load_heat_records():
+def load_heat_records(columns=None, where=None):
     """Load heat records data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(HEAT_RECORDS_FILE):
-        return pd.read_csv(HEAT_RECORDS_FILE)
+    if _table_exists(HEAT_RECORDS_FILE):
+        return _load_table(HEAT_RECORDS_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_registro': [],
-            'id_rufia': [],
-            'id_matriz': [],
-            'data_deteccao': [],
-            'hora_deteccao': [],
-            'intensidade_cio': [],  # Forte, Médio, Fraco
-            'comportamento': [],    # Reflexo, Monta, Aceitação
-            'duracao_minutos': [],
-            'sinais_externos': [],  # Vermelhidão, Inchaço, etc
-            'confirmado': [],       # True/False
-            'responsavel': [],
-            'observacao': []
-        })
+        return _empty_table(HEAT_RECORDS_FILE, columns)
 
 def save_heat_records(df):
     """Save heat records data to CSV"""
-    df.to_csv(HEAT_RECORDS_FILE, index=False)
-
-def calculate_heat_interval(matriz_id, heat_records_df):
-    """Calculate interval between heat detections for a specific sow"""
-    if heat_records_df.empty or matriz_id not in heat_records_df['id_matriz'].values:
-        return None
+    _save_table(df, HEAT_RECORDS_FILE)
+
+# Colunas das estatísticas de cio por matriz
+HEAT_STATISTICS_COLUMNS = [
+    'n_cios', 'last_heat', 'last_interval', 'avg_interval', 'min_interval',
+    'max_interval', 'soma_intervalos', 'predicted_next', 'confidence'
+]
+
+def _finish_heat_statistics(stats):
+    """Derive the average interval, predicted next heat and confidence from the base columns"""
+    n_intervalos = stats['n_cios'] - 1
+    stats['avg_interval'] = (stats['soma_intervalos'] / n_intervalos).where(n_intervalos > 0)
+    stats['predicted_next'] = stats['last_heat'] + pd.to_timedelta(stats['avg_interval'].round(), unit='D')
+    stats['confidence'] = np.where(stats['avg_interval'].between(20, 22), 'Alta', 'Média')
+    stats.loc[stats['avg_interval'].isna(), 'confidence'] = None
+    stats.index = stats.index.astype(object)
+    return stats[HEAT_STATISTICS_COLUMNS]
+
+def compute_heat_statistics(heat_records_df):
+    """
+    Calcula, para todas as matrizes de uma vez, os intervalos entre cios e o próximo cio previsto.
+    
+    Os cios confirmados são ordenados uma única vez e os intervalos saem de um
+    groupby().diff() por matriz.
+    
+    Args:
+        heat_records_df: DataFrame de registros de cio
+        
+    Returns:
+        DataFrame: Indexado por id_matriz, com n_cios, last_heat,
+        last_interval, avg_interval, min_interval, max_interval,
+        predicted_next e confidence (intervalos e previsão vazios para
+        matrizes com menos de dois cios confirmados)
+    """
+    if heat_records_df.empty:
+        return pd.DataFrame(columns=HEAT_STATISTICS_COLUMNS, index=pd.Index([], name='id_matriz'))
+    
+    cios = heat_records_df.loc[heat_records_df['confirmado'] == True, ['id_matriz', 'data_deteccao']].copy()
+    cios['data_deteccao'] = _as_datetime(cios['data_deteccao'])
+    cios = cios.dropna().sort_values(['id_matriz', 'data_deteccao'])
+    cios['intervalo'] = cios.groupby('id_matriz', observed=True)['data_deteccao'].diff().dt.days
+    
+    stats = cios.groupby('id_matriz', observed=True).agg(
+        n_cios=('data_deteccao', 'size'),
+        last_heat=('data_deteccao', 'max'),
+        last_interval=('intervalo', 'last'),
+        min_interval=('intervalo', 'min'),
+        max_interval=('intervalo', 'max'),
+        soma_intervalos=('intervalo', 'sum')
+    )
+    return _finish_heat_statistics(stats)
 
-    # Get records for the specific sow
-    matriz_records = heat_records_df[
-        (heat_records_df['id_matriz'] == matriz_id) & 
-        (heat_records_df['confirmado'] == True)
-    ].copy()
+# Estatísticas de cio mantidas em memória: calculadas uma vez por versão da
+# tabela de registros e atualizadas diretamente a cada nova detecção
+# registrada com register_heat_record.
+_heat_statistics_cache = None
+_heat_statistics_lock = threading.Lock()
 
-    if len(matriz_records) < 2:
-        return None
+def get_heat_statistics():
+    """Return the heat statistics of every sow from the maintained aggregate"""
+    global _heat_statistics_cache
+    if not _table_exists(HEAT_RECORDS_FILE):
+        return compute_heat_statistics(_empty_table(HEAT_RECORDS_FILE))
+    
+    signature = _table_signature(HEAT_RECORDS_FILE)
+    with _heat_statistics_lock:
+        cached = _heat_statistics_cache
+    
+    if cached is None or cached[0] != signature:
+        cached = (signature, compute_heat_statistics(_cached_table(HEAT_RECORDS_FILE)))
+        with _heat_statistics_lock:
+            _heat_statistics_cache = cached
+    
+    return cached[1].copy()
 
-    # Sort by detection date
-    matriz_records['data_deteccao'] = pd.to_datetime(matriz_records['data_deteccao'])
-    matriz_records = matriz_records.sort_values('data_deteccao')
+def _update_heat_statistics(previous_signature, record):
+    """
+    Atualiza as estatísticas mantidas com uma nova detecção, sem recalcular o rebanho.
+    
+    Só as detecções confirmadas mudam as estatísticas. Uma detecção anterior
+    ao último cio da matriz muda os intervalos já calculados: nesse caso as
+    estatísticas são descartadas e recalculadas na próxima consulta, assim
+    como quando elas não correspondiam à tabela antes da escrita.
+    """
+    global _heat_statistics_cache
+    with _heat_statistics_lock:
+        cached = _heat_statistics_cache
+        _heat_statistics_cache = None
+        if cached is None or cached[0] != previous_signature:
+            return
+        
+        stats = cached[1]
+        matriz_id = record.get('id_matriz')
+        data = pd.to_datetime(record.get('data_deteccao'), errors='coerce')
+        
+        if record.get('confirmado') in (True, 'True') and not pd.isna(data):
+            if matriz_id not in stats.index:
+                stats = pd.concat([stats, pd.DataFrame(
+                    {'n_cios': [1], 'last_heat': [data], 'soma_intervalos': [0.0]},
+                    index=pd.Index([matriz_id], name='id_matriz')
+                )])
+            else:
+                atual = stats.loc[matriz_id]
+                if data < atual['last_heat']:
+                    return
+                
+                intervalo = (data - atual['last_heat']).days
+                stats = stats.copy()
+                stats.loc[matriz_id, 'n_cios'] = atual['n_cios'] + 1
+                stats.loc[matriz_id, 'last_heat'] = data
+                stats.loc[matriz_id, 'last_interval'] = intervalo
+                stats.loc[matriz_id, 'soma_intervalos'] = atual['soma_intervalos'] + intervalo
+                stats.loc[matriz_id, 'min_interval'] = np.fmin(atual['min_interval'], intervalo)
+                stats.loc[matriz_id, 'max_interval'] = np.fmax(atual['max_interval'], intervalo)
+            stats = _finish_heat_statistics(stats)
+        
+        _heat_statistics_cache = (_table_signature(HEAT_RECORDS_FILE), stats)
 
-    # Calculate intervals
-    intervals = matriz_records['data_deteccao'].diff().dt.days
+def register_heat_record(record):
+    """
+    Registra uma detecção de cio e atualiza as estatísticas de cio mantidas.
+    
+    Args:
+        record: Dicionário com o novo registro de cio
+    """
+    with table_lock(HEAT_RECORDS_FILE):
+        previous_signature = _table_signature(HEAT_RECORDS_FILE) if _table_exists(HEAT_RECORDS_FILE) else None
+        _write_records([record], HEAT_RECORDS_FILE)
+        _update_heat_statistics(previous_signature, record)
+
+def _sow_heat_statistics(matriz_id, heat_records_df):
+    """Return the heat statistics row of one sow, or None if it has no confirmed heat"""
+    if heat_records_df is None:
+        stats = get_heat_statistics()
+    else:
+        if heat_records_df.empty or matriz_id not in heat_records_df['id_matriz'].values:
+            return None
+        stats = compute_heat_statistics(heat_records_df[heat_records_df['id_matriz'] == matriz_id])
+    
+    if matriz_id not in stats.index:
+        return None
+    return stats.loc[matriz_id]
 
+def calculate_heat_interval(matriz_id, heat_records_df=None):
+    """Calculate interval between heat detections for a specific sow"""
+    stats = _sow_heat_statistics(matriz_id, heat_records_df)
+    if stats is None or stats['n_cios'] < 2:
+        return None
+    
     return {
-        'last_interval': intervals.iloc[-1],
-        'avg_interval': intervals.mean(),
-        'min_interval': intervals.min(),
-        'max_interval': intervals.max()
+        'last_interval': stats['last_interval'],
+        'avg_interval': stats['avg_interval'],
+        'min_interval': stats['min_interval'],
+        'max_interval': stats['max_interval']
     }
 
 def generate_heat_report(heat_records_df, animals_df, start_date=None, end_date=None):
@@ -1217,58 +4680,31 @@ def generate_heat_report(heat_records_df, animals_df, start_date=None, end_date=
 
     return report_df.sort_values('data_deteccao', ascending=False)
 
-def predict_next_heat(matriz_id, heat_records_df):
+def predict_next_heat(matriz_id, heat_records_df=None):
     """Predict next heat date based on historical data"""
-    intervals = calculate_heat_interval(matriz_id, heat_records_df)
-
-    if not intervals:
+    stats = _sow_heat_statistics(matriz_id, heat_records_df)
+    if stats is None or stats['n_cios'] < 2:
         return None
-
-    # Get last heat date
-    last_heat = heat_records_df[
-        (heat_records_df['id_matriz'] == matriz_id) & 
-        (heat_records_df['confirmado'] == True)
-    ]['data_deteccao'].max()
-
-    if pd.isna(last_heat):
-        return None
-
-    # Use average interval to predict next heat
-    last_heat = pd.to_datetime(last_heat)
-    next_heat = last_heat + timedelta(days=round(intervals['avg_interval']))
-
+    
     return {
-        'last_heat': last_heat.date(),
-        'predicted_next': next_heat.date(),
-        'confidence': 'Alta' if 20 <= intervals['avg_interval'] <= 22 else 'Média'
+        'last_heat': stats['last_heat'].date(),
+        'predicted_next': stats['predicted_next'].date(),
+        'confidence': stats['confidence']
     }
 
-# Add after the existing file paths
-EMPLOYEES_FILE = "data/employees.csv"
-
-def load_employees():
+def load_employees(columns=None, where=None):
     """Load employees data from CSV or create empty DataFrame if file doesn't exist"""
     # Define a estrutura vazia padrão
-    empty_df = pd.DataFrame({
-        'id_colaborador': [],
-        'nome': [],
-        'matricula': [],
-        'cargo': [],
-        'setor': [],
-        'data_admissao': [],
-        'status': [],  # Ativo/Inativo
-        'ultimo_acesso': [],
-        'observacao': []
-    })
+    empty_df = _empty_table(EMPLOYEES_FILE, columns)
     
-    if os.path.exists(EMPLOYEES_FILE):
+    if _table_exists(EMPLOYEES_FILE):
         try:
             # Tenta carregar o arquivo CSV
-            df = pd.read_csv(EMPLOYEES_FILE)
+            df = _load_table(EMPLOYEES_FILE, columns, where)
             
             # Verifica se o DataFrame não está vazio
             if not df.empty:
-                return df
+                return _with_last_access(df)
             else:
                 # Se estiver vazio, retorna a estrutura padrão
                 return empty_df
@@ -1281,45 +4717,98 @@ def load_employees():
 
 def save_employees(df):
     """Save employees data to CSV"""
-    df.to_csv(EMPLOYEES_FILE, index=False)
+    _save_table(df, EMPLOYEES_FILE)
+
+# Índice de login: matrícula → funcionário ativo, montado uma vez por versão
+# da tabela de funcionários. Os acessos não regravam a tabela de funcionários:
+# cada login acrescenta um evento em EMPLOYEE_ACCESS_FILE (com 'write_batching'
+# ativo, as inserções simultâneas de uma troca de turno são agrupadas em uma
+# única escrita), e o último acesso de cada funcionário é lido desse registro.
+_employee_index_cache = None
+_last_access_cache = None
+_employee_index_lock = threading.Lock()
+
+def _employee_index():
+    """Return the matricula → active employee index, rebuilding it if the table changed"""
+    global _employee_index_cache
+    if not _table_exists(EMPLOYEES_FILE):
+        return {}
+    
+    signature = _table_signature(EMPLOYEES_FILE)
+    with _employee_index_lock:
+        cached = _employee_index_cache
+    
+    if cached is None or cached[0] != signature:
+        df = _cached_table(EMPLOYEES_FILE)
+        ativos = _expand_categories(df[df['status'] == 'Ativo'].copy())
+        index = {}
+        for matricula, employee in zip(ativos['matricula'].astype(str), ativos.to_dict('records')):
+            # Matrícula repetida: vale o primeiro funcionário ativo, como no filtro da tabela
+            index.setdefault(matricula, employee)
+        cached = (signature, index)
+        with _employee_index_lock:
+            _employee_index_cache = cached
+    
+    return cached[1]
+
+def record_employee_access(employee, access_time=None):
+    """
+    Registra um acesso no registro de acessos, sem regravar a tabela de funcionários.
+    
+    Args:
+        employee: Dicionário do funcionário (como retornado por authenticate_employee)
+        access_time: Momento do acesso (padrão: agora)
+    """
+    access_time = access_time or datetime.now()
+    _append_table([{
+        'id_colaborador': employee.get('id_colaborador'),
+        'matricula': str(employee.get('matricula')),
+        'data_acesso': pd.Timestamp(access_time).strftime('%Y-%m-%d %H:%M:%S')
+    }], EMPLOYEE_ACCESS_FILE)
+
+def get_last_access():
+    """Return the last access time of each employee (indexed by id_colaborador) from the access log"""
+    global _last_access_cache
+    if not _table_exists(EMPLOYEE_ACCESS_FILE):
+        return pd.Series(dtype='datetime64[ns]')
+    
+    signature = _table_signature(EMPLOYEE_ACCESS_FILE)
+    with _employee_index_lock:
+        cached = _last_access_cache
+    
+    if cached is None or cached[0] != signature:
+        log = _cached_table(EMPLOYEE_ACCESS_FILE)
+        last_access = _as_datetime(log['data_acesso']).groupby(log['id_colaborador'].astype(object)).max()
+        cached = (signature, last_access)
+        with _employee_index_lock:
+            _last_access_cache = cached
+    
+    return cached[1]
+
+def _with_last_access(employees_df):
+    """Fill ultimo_acesso with the latest access of each employee from the access log"""
+    if 'ultimo_acesso' not in employees_df.columns or 'id_colaborador' not in employees_df.columns:
+        return employees_df
+    
+    last_access = get_last_access()
+    if last_access.empty:
+        return employees_df
+    
+    logged = employees_df['id_colaborador'].astype(object).map(last_access)
+    employees_df['ultimo_acesso'] = pd.concat(
+        [_as_datetime(employees_df['ultimo_acesso']), _as_datetime(logged)], axis=1
+    ).max(axis=1)
+    return employees_df
 
 def authenticate_employee(matricula):
     """Authenticate employee by registration number"""
-    employees_df = load_employees()
-
-    if employees_df.empty:
+    employee = _employee_index().get(str(matricula))
+    if employee is None:
         return None
-        
-    # Converte a matrícula para string para garantir a comparação correta
-    matricula_str = str(matricula)
-    # Garante que as matrículas no DataFrame também são strings
-    employees_df['matricula'] = employees_df['matricula'].astype(str)
-
-    employee = employees_df[
-        (employees_df['matricula'] == matricula_str) & 
-        (employees_df['status'] == 'Ativo')
-    ]
-
-    if not employee.empty:
-        # Update last access
-        # Primeiro, certifique-se de que a coluna ultimo_acesso tem o tipo de dados correto (string/object)
-        if 'ultimo_acesso' not in employees_df.columns:
-            employees_df['ultimo_acesso'] = None
-        
-        # Garante que a coluna seja do tipo object (string) antes de atribuir um valor string
-        if not pd.api.types.is_object_dtype(employees_df['ultimo_acesso']):
-            employees_df['ultimo_acesso'] = employees_df['ultimo_acesso'].astype(str)
-        
-        # Atualiza o último acesso
-        employees_df.loc[
-            employees_df['matricula'] == matricula_str, 
-            'ultimo_acesso'
-        ] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-        save_employees(employees_df)
-        return employee.iloc[0].to_dict()
-
-    return None
+    
+    # Registra o acesso no registro de acessos
+    record_employee_access(employee)
+    return dict(employee)
 
 def check_developer_access(user):
     """Verifica se o usuário tem acesso de desenvolvedor"""
@@ -1327,6 +4816,8 @@ def check_developer_access(user):
         return user['cargo'] == 'Desenvolvedor'
     return False
 
+PERMISSIONS_FILE = "data/permissions.json"
+
 def load_permissions_map():
     """
     Carrega o mapeamento de permissões por cargo de um arquivo JSON ou retorna o mapeamento padrão.
@@ -1335,7 +4826,7 @@ def load_permissions_map():
         dict: Mapeamento de permissões por cargo
     """
     # Caminho para o arquivo de configuração de permissões
-    permission_file = "data/permissions.json"
+    permission_file = PERMISSIONS_FILE
     
     # Mapeamento padrão de permissões por cargo
     default_permissions_map = {
@@ -1431,7 +4922,7 @@ def save_permissions_map(permissions_map):
         bool: True se salvo com sucesso, False caso contrário
     """
     # Caminho para o arquivo de configuração de permissões
-    permission_file = "data/permissions.json"
+    permission_file = PERMISSIONS_FILE
     
     try:
         # Garantir que o diretório data existe
@@ -1441,11 +4932,52 @@ def save_permissions_map(permissions_map):
         import json
         with open(permission_file, 'w') as f:
             json.dump(permissions_map, f, indent=4)
+        invalidate_permission_cache()
         return True
     except Exception as e:
         print(f"Erro ao salvar permissões: {str(e)}")
         return False
 
+# Permissões por cargo já interpretadas, reaproveitadas enquanto o arquivo de
+# permissões não mudar (ou até save_permissions_map gravar um novo mapeamento)
+_permission_cache = None
+_permission_cache_lock = threading.Lock()
+
+def _permissions_signature():
+    """Return the signature of the permissions file, or None if it does not exist"""
+    return _file_signature(PERMISSIONS_FILE) if os.path.exists(PERMISSIONS_FILE) else None
+
+def get_role_permissions():
+    """
+    Retorna o conjunto de permissões de cada cargo.
+    
+    O arquivo de permissões só é lido de novo quando muda.
+    
+    Returns:
+        dict: Cargo → frozenset de permissões
+    """
+    global _permission_cache
+    signature = _permissions_signature()
+    with _permission_cache_lock:
+        cached = _permission_cache
+    
+    if cached is None or cached[0] != signature:
+        role_permissions = {
+            cargo: frozenset(permissions)
+            for cargo, permissions in load_permissions_map().items()
+        }
+        cached = (signature, role_permissions)
+        with _permission_cache_lock:
+            _permission_cache = cached
+    
+    return cached[1]
+
+def invalidate_permission_cache():
+    """Discard the cached role permissions"""
+    global _permission_cache
+    with _permission_cache_lock:
+        _permission_cache = None
+
 def check_permission(user, permission_type):
     """
     Verifica se o usuário tem a permissão especificada com base em seu cargo
@@ -1459,12 +4991,9 @@ def check_permission(user, permission_type):
     """
     if not user or 'cargo' not in user:
         return False
-        
-    # Carregar o mapeamento de permissões
-    permissions_map = load_permissions_map()
     
-    # Obtém as permissões do cargo do usuário, ou uma lista vazia se o cargo não estiver mapeado
-    user_permissions = permissions_map.get(user['cargo'], [])
+    # Obtém as permissões do cargo do usuário, ou um conjunto vazio se o cargo não estiver mapeado
+    user_permissions = get_role_permissions().get(user['cargo'], frozenset())
     
     # Verifica se a permissão solicitada está na lista de permissões do usuário
     return permission_type in user_permissions
@@ -1497,191 +5026,105 @@ def register_employee(nome, matricula, cargo, setor, observacao=""):
         'observacao': observacao
     }
 
-    # Add to DataFrame
-    if employees_df.empty:
-        employees_df = pd.DataFrame([new_employee])
-    else:
-        employees_df = pd.concat([employees_df, pd.DataFrame([new_employee])], ignore_index=True)
-
-    # Save updated DataFrame
-    save_employees(employees_df)
+    # Acrescentar ao arquivo
+    _append_table(new_employee, EMPLOYEES_FILE)
     return True, "Colaborador cadastrado com sucesso"
 
 def update_employee_status(matricula, new_status):
     """Update employee status (Active/Inactive)"""
-    employees_df = load_employees()
+    with table_lock(EMPLOYEES_FILE):
+        employees_df = load_employees()
     
-    # Converte a matrícula para string
-    matricula_str = str(matricula)
+        # Converte a matrícula para string
+        matricula_str = str(matricula)
     
-    # Garante que as matrículas no DataFrame também são strings
-    if not employees_df.empty:
-        employees_df['matricula'] = employees_df['matricula'].astype(str)
+        # Garante que as matrículas no DataFrame também são strings
+        if not employees_df.empty:
+            employees_df['matricula'] = employees_df['matricula'].astype(str)
 
-    if employees_df.empty or matricula_str not in employees_df['matricula'].values:
-        return False, "Colaborador não encontrado"
+        if employees_df.empty or matricula_str not in employees_df['matricula'].values:
+            return False, "Colaborador não encontrado"
 
-    employees_df.loc[
-        employees_df['matricula'] == matricula_str, 
-        'status'
-    ] = new_status
+        employees_df.loc[
+            employees_df['matricula'] == matricula_str, 
+            'status'
+        ] = new_status
 
-    save_employees(employees_df)
-    return True, f"Status atualizado para {new_status}"
+        save_employees(employees_df)
+        return True, f"Status atualizado para {new_status}"
     
 # Funções para o sistema de recria
 
-def load_recria():
+def load_recria(columns=None, where=None):
     """Load recria data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(RECRIA_FILE):
-        return pd.read_csv(RECRIA_FILE)
+    if _table_exists(RECRIA_FILE):
+        return _load_table(RECRIA_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_recria': [],
-            'id_animal': [],           # ID do animal em recria
-            'identificacao': [],       # Identificação do animal (brinco, etc.)
-            'data_entrada': [],        # Data de entrada na recria
-            'peso_entrada': [],        # Peso na entrada (kg)
-            'origem': [],              # Origem do animal (Desmame, Compra, etc.)
-            'id_lote': [],             # ID do lote de recria
-            'data_saida': [],          # Data de saída da recria
-            'peso_saida': [],          # Peso na saída (kg)
-            'destino': [],             # Destino (Terminação, Reprodução, Venda, etc.)
-            'status': [],              # Status (Ativo, Finalizado, etc.)
-            'fase_recria': [],         # Fase da recria (Fase 1, Fase 2, etc.)
-            'observacao': []
-        })
+        return _empty_table(RECRIA_FILE, columns)
 
 def save_recria(df):
     """Save recria data to CSV"""
-    df.to_csv(RECRIA_FILE, index=False)
+    _save_table(df, RECRIA_FILE)
 
-def load_recria_lotes():
+def load_recria_lotes(columns=None, where=None):
     """Load recria batches data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(RECRIA_LOTES_FILE):
-        return pd.read_csv(RECRIA_LOTES_FILE)
+    if _table_exists(RECRIA_LOTES_FILE):
+        return _load_table(RECRIA_LOTES_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_lote': [],
-            'codigo': [],              # Código do lote
-            'data_formacao': [],       # Data de formação do lote
-            'quantidade_inicial': [],  # Quantidade inicial de animais
-            'idade_media': [],         # Idade média dos animais (dias)
-            'peso_medio_inicial': [],  # Peso médio inicial (kg)
-            'id_baia': [],             # Baia onde o lote está alojado
-            'data_encerramento': [],   # Data de encerramento do lote
-            'quantidade_final': [],    # Quantidade final de animais
-            'peso_medio_final': [],    # Peso médio final (kg)
-            'gpd': [],                 # Ganho de peso diário (kg)
-            'ca': [],                  # Conversão alimentar
-            'mortalidade': [],         # Taxa de mortalidade (%)
-            'status': [],              # Status (Ativo, Finalizado, etc.)
-            'responsavel': [],         # Responsável pelo lote
-            'observacao': []
-        })
+        return _empty_table(RECRIA_LOTES_FILE, columns)
 
 def save_recria_lotes(df):
     """Save recria batches data to CSV"""
-    df.to_csv(RECRIA_LOTES_FILE, index=False)
+    _save_table(df, RECRIA_LOTES_FILE)
 
-def load_recria_pesagens():
+def load_recria_pesagens(columns=None, where=None):
     """Load recria weighing data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(RECRIA_PESAGENS_FILE):
-        return pd.read_csv(RECRIA_PESAGENS_FILE)
+    if _table_exists(RECRIA_PESAGENS_FILE):
+        return _load_table(RECRIA_PESAGENS_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_pesagem': [],
-            'id_animal': [],           # ID do animal pesado
-            'id_lote': [],             # ID do lote (quando pesagem em grupo)
-            'data_pesagem': [],        # Data da pesagem
-            'peso': [],                # Peso (kg)
-            'tipo_pesagem': [],        # Individual ou Grupo
-            'fase_recria': [],         # Fase da recria
-            'idade_dias': [],          # Idade em dias
-            'ganho_desde_ultima': [],  # Ganho desde a última pesagem (kg)
-            'gpd_periodo': [],         # Ganho de peso diário no período (g/dia)
-            'responsavel': [],         # Responsável pela pesagem
-            'observacao': []
-        })
+        return _empty_table(RECRIA_PESAGENS_FILE, columns)
 
 def save_recria_pesagens(df):
     """Save recria weighing data to CSV"""
-    df.to_csv(RECRIA_PESAGENS_FILE, index=False)
+    _save_table(df, RECRIA_PESAGENS_FILE)
 
-def load_recria_transferencias():
+def query_recria_pesagens(id_animal=None, id_lote=None, start_date=None, end_date=None):
+    """Load recria weighings filtered by animal, batch and/or weighing date range"""
+    return query_table(RECRIA_PESAGENS_FILE, id_animal=id_animal, id_lote=id_lote,
+                       start_date=start_date, end_date=end_date)
+
+def load_recria_transferencias(columns=None, where=None):
     """Load recria transfers data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(RECRIA_TRANSFERENCIAS_FILE):
-        return pd.read_csv(RECRIA_TRANSFERENCIAS_FILE)
+    if _table_exists(RECRIA_TRANSFERENCIAS_FILE):
+        return _load_table(RECRIA_TRANSFERENCIAS_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_transferencia': [],
-            'id_animal': [],           # ID do animal transferido
-            'id_lote_origem': [],      # ID do lote de origem
-            'id_lote_destino': [],     # ID do lote de destino
-            'id_baia_origem': [],      # ID da baia de origem
-            'id_baia_destino': [],     # ID da baia de destino
-            'data_transferencia': [],  # Data da transferência
-            'motivo': [],              # Motivo da transferência
-            'peso_transferencia': [],  # Peso na transferência (kg)
-            'fase_origem': [],         # Fase de recria de origem
-            'fase_destino': [],        # Fase de recria de destino
-            'responsavel': [],         # Responsável pela transferência
-            'observacao': []
-        })
+        return _empty_table(RECRIA_TRANSFERENCIAS_FILE, columns)
 
 def save_recria_transferencias(df):
     """Save recria transfers data to CSV"""
-    df.to_csv(RECRIA_TRANSFERENCIAS_FILE, index=False)
+    _save_table(df, RECRIA_TRANSFERENCIAS_FILE)
 
-def load_recria_alimentacao():
+def load_recria_alimentacao(columns=None, where=None):
     """Load recria feeding data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(RECRIA_ALIMENTACAO_FILE):
-        return pd.read_csv(RECRIA_ALIMENTACAO_FILE)
+    if _table_exists(RECRIA_ALIMENTACAO_FILE):
+        return _load_table(RECRIA_ALIMENTACAO_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_alimentacao': [],
-            'id_lote': [],             # ID do lote alimentado
-            'data_inicio': [],         # Data de início do fornecimento
-            'data_fim': [],            # Data de fim do fornecimento
-            'tipo_racao': [],          # Tipo de ração
-            'quantidade_kg': [],       # Quantidade fornecida (kg)
-            'custo_kg': [],            # Custo por kg (R$)
-            'custo_total': [],         # Custo total (R$)
-            'consumo_animal_dia': [],  # Consumo médio por animal por dia (kg)
-            'fase_recria': [],         # Fase da recria
-            'responsavel': [],         # Responsável pelo registro
-            'observacao': []
-        })
+        return _empty_table(RECRIA_ALIMENTACAO_FILE, columns)
 
 def save_recria_alimentacao(df):
     """Save recria feeding data to CSV"""
-    df.to_csv(RECRIA_ALIMENTACAO_FILE, index=False)
+    _save_table(df, RECRIA_ALIMENTACAO_FILE)
 
-def load_recria_medicacao():
+def load_recria_medicacao(columns=None, where=None):
     """Load recria medication data from CSV or create empty DataFrame if file doesn't exist"""
-    if os.path.exists(RECRIA_MEDICACAO_FILE):
-        return pd.read_csv(RECRIA_MEDICACAO_FILE)
+    if _table_exists(RECRIA_MEDICACAO_FILE):
+        return _load_table(RECRIA_MEDICACAO_FILE, columns, where)
     else:
-        return pd.DataFrame({
-            'id_medicacao': [],
-            'id_animal': [],           # ID do animal medicado (quando individual)
-            'id_lote': [],             # ID do lote (quando medicação coletiva)
-            'data_aplicacao': [],      # Data da aplicação
-            'medicamento': [],         # Nome do medicamento
-            'via_aplicacao': [],       # Via de aplicação
-            'dose': [],                # Dose aplicada
-            'unidade_dose': [],        # Unidade da dose (ml, mg, etc.)
-            'motivo': [],              # Motivo da medicação
-            'tipo_aplicacao': [],      # Individual ou Coletiva
-            'periodo_carencia': [],    # Período de carência (dias)
-            'data_fim_carencia': [],   # Data do fim da carência
-            'responsavel': [],         # Responsável pela aplicação
-            'observacao': []
-        })
+        return _empty_table(RECRIA_MEDICACAO_FILE, columns)
 
 def save_recria_medicacao(df):
     """Save recria medication data to CSV"""
-    df.to_csv(RECRIA_MEDICACAO_FILE, index=False)
+    _save_table(df, RECRIA_MEDICACAO_FILE)
 
 def criar_lote_recria(codigo, data_formacao, quantidade_inicial, idade_media, 
                       peso_medio_inicial, id_baia, responsavel, observacao=""):
@@ -1712,14 +5155,8 @@ def criar_lote_recria(codigo, data_formacao, quantidade_inicial, idade_media,
         'observacao': observacao
     }
     
-    # Adicionar ao DataFrame
-    if lotes_df.empty:
-        lotes_df = pd.DataFrame([novo_lote])
-    else:
-        lotes_df = pd.concat([lotes_df, pd.DataFrame([novo_lote])], ignore_index=True)
-    
-    # Salvar DataFrame atualizado
-    save_recria_lotes(lotes_df)
+    # Acrescentar ao arquivo
+    _append_table(novo_lote, RECRIA_LOTES_FILE)
     return True, "Lote de recria criado com sucesso", novo_lote['id_lote']
 
 def adicionar_animal_recria(id_animal, identificacao, data_entrada, peso_entrada, 
@@ -1748,156 +5185,354 @@ def adicionar_animal_recria(id_animal, identificacao, data_entrada, peso_entrada
         'observacao': observacao
     }
     
-    # Adicionar ao DataFrame
-    if recria_df.empty:
-        recria_df = pd.DataFrame([nova_recria])
-    else:
-        recria_df = pd.concat([recria_df, pd.DataFrame([nova_recria])], ignore_index=True)
-    
     # Atualizar a quantidade de animais no lote
     lotes_df = load_recria_lotes()
     if not lotes_df.empty and id_lote in lotes_df['id_lote'].values:
         # Somar 1 à quantidade atual (se necessário)
         pass
     
-    # Salvar DataFrame atualizado
-    save_recria(recria_df)
+    # Acrescentar ao arquivo
+    _append_table(nova_recria, RECRIA_FILE)
     return True, "Animal adicionado à recria com sucesso"
 
 def registrar_pesagem_recria(id_animal, data_pesagem, peso, tipo_pesagem, 
-                           fase_recria, id_lote=None, responsavel=None, observacao=None):
+                           fase_recria, id_lote=None, responsavel=None, observacao=None,
+                           transacao=None):
     """Register a new weighing for a recria animal"""
-    pesagens_df = load_recria_pesagens()
-    recria_df = load_recria()
+    with _unit_of_work(transacao, RECRIA_FILE, RECRIA_PESAGENS_FILE) as tx:
+        recria_df = tx.load(RECRIA_FILE)
+    
+        # Verificar se o animal está em recria
+        if id_animal and not recria_df.empty and id_animal not in recria_df[recria_df['status'] == 'Ativo']['id_animal'].values:
+            return False, "Animal não encontrado na recria ou não está ativo"
+    
+        # Obter a idade do animal
+        idade_dias = None
+        if id_animal:
+            animal = query_table(ANIMALS_FILE, id_animal=id_animal)
+            if not animal.empty and not pd.isna(animal['data_nascimento'].iloc[0]):
+                data_nascimento = pd.to_datetime(animal['data_nascimento'].iloc[0])
+                idade_dias = (pd.to_datetime(data_pesagem) - data_nascimento).days
+    
+        # Calcular ganho desde a última pesagem
+        ganho_desde_ultima = None
+        gpd_periodo = None
+    
+        pesagens_df = tx.query(RECRIA_PESAGENS_FILE, id_animal=id_animal) if id_animal else pd.DataFrame()
+        if id_animal and not pesagens_df.empty:
+            ultimas_pesagens = pesagens_df[
+                (pesagens_df['id_animal'] == id_animal) & 
+                (pd.to_datetime(pesagens_df['data_pesagem']) < pd.to_datetime(data_pesagem))
+            ].sort_values('data_pesagem', ascending=False)
+        
+            if not ultimas_pesagens.empty:
+                ultima_pesagem = ultimas_pesagens.iloc[0]
+                peso_anterior = ultima_pesagem['peso']
+                data_anterior = pd.to_datetime(ultima_pesagem['data_pesagem'])
+                dias_desde_ultima = (pd.to_datetime(data_pesagem) - data_anterior).days
+            
+                if dias_desde_ultima > 0:
+                    ganho_desde_ultima = float(peso) - float(peso_anterior)
+                    gpd_periodo = ganho_desde_ultima * 1000 / dias_desde_ultima  # g/dia
+    
+        # Criar novo registro de pesagem
+        nova_pesagem = {
+            'id_pesagem': str(uuid.uuid4()),
+            'id_animal': id_animal,
+            'id_lote': id_lote,
+            'data_pesagem': data_pesagem,
+            'peso': peso,
+            'tipo_pesagem': tipo_pesagem,
+            'fase_recria': fase_recria,
+            'idade_dias': idade_dias,
+            'ganho_desde_ultima': ganho_desde_ultima,
+            'gpd_periodo': gpd_periodo,
+            'responsavel': responsavel,
+            'observacao': observacao
+        }
     
-    # Verificar se o animal está em recria
-    if id_animal and not recria_df.empty and id_animal not in recria_df[recria_df['status'] == 'Ativo']['id_animal'].values:
-        return False, "Animal não encontrado na recria ou não está ativo"
+        # Acrescentar ao arquivo
+        tx.append(RECRIA_PESAGENS_FILE, nova_pesagem)
+        return True, "Pesagem registrada com sucesso"
+
+def registrar_pesagens_recria(pesagens, tipo_pesagem='Individual', responsavel=None,
+                              observacao=None, transacao=None):
+    """
+    Registra de uma só vez as pesagens de vários animais da recria.
     
-    # Obter a idade do animal
-    idade_dias = None
-    if id_animal:
-        animals_df = load_animals()
-        animal = animals_df[animals_df['id_animal'] == id_animal]
-        if not animal.empty and not pd.isna(animal['data_nascimento'].iloc[0]):
-            data_nascimento = pd.to_datetime(animal['data_nascimento'].iloc[0])
-            idade_dias = (pd.to_datetime(data_pesagem) - data_nascimento).days
-    
-    # Calcular ganho desde a última pesagem
-    ganho_desde_ultima = None
-    gpd_periodo = None
-    
-    if id_animal and not pesagens_df.empty:
-        ultimas_pesagens = pesagens_df[
-            (pesagens_df['id_animal'] == id_animal) & 
-            (pd.to_datetime(pesagens_df['data_pesagem']) < pd.to_datetime(data_pesagem))
-        ].sort_values('data_pesagem', ascending=False)
-        
-        if not ultimas_pesagens.empty:
-            ultima_pesagem = ultimas_pesagens.iloc[0]
-            peso_anterior = ultima_pesagem['peso']
-            data_anterior = pd.to_datetime(ultima_pesagem['data_pesagem'])
-            dias_desde_ultima = (pd.to_datetime(data_pesagem) - data_anterior).days
-            
-            if dias_desde_ultima > 0:
-                ganho_desde_ultima = float(peso) - float(peso_anterior)
-                gpd_periodo = ganho_desde_ultima * 1000 / dias_desde_ultima  # g/dia
+    Idade, ganho desde a última pesagem e GPD são calculados para todas as
+    linhas juntas (um merge_asof contra as pesagens anteriores, incluindo as
+    do próprio lote de pesagens) e os registros são gravados em uma única
+    escrita. Se algum animal não estiver ativo na recria, nada é registrado.
     
-    # Criar novo registro de pesagem
-    nova_pesagem = {
-        'id_pesagem': str(uuid.uuid4()),
-        'id_animal': id_animal,
-        'id_lote': id_lote,
-        'data_pesagem': data_pesagem,
-        'peso': peso,
-        'tipo_pesagem': tipo_pesagem,
-        'fase_recria': fase_recria,
-        'idade_dias': idade_dias,
-        'ganho_desde_ultima': ganho_desde_ultima,
-        'gpd_periodo': gpd_periodo,
-        'responsavel': responsavel,
-        'observacao': observacao
-    }
+    Args:
+        pesagens: DataFrame com as colunas 'id_animal', 'peso' e 'data_pesagem'
+            (ou 'data'); 'id_lote', 'fase_recria', 'responsavel' e 'observacao'
+            são opcionais e, se ausentes, vêm do cadastro da recria e dos
+            parâmetros
+        tipo_pesagem: Tipo de pesagem gravado em todas as linhas
+        responsavel: Responsável pelas pesagens
+        observacao: Observação gravada nas linhas sem observação própria
+        transacao: Transação em andamento (opcional)
+        
+    Returns:
+        tuple: (sucesso, mensagem)
+    """
+    pesagens = pesagens.rename(columns={'data': 'data_pesagem'}).reset_index(drop=True)
+    if pesagens.empty:
+        return False, "Nenhuma pesagem informada"
     
-    # Adicionar ao DataFrame
-    if pesagens_df.empty:
-        pesagens_df = pd.DataFrame([nova_pesagem])
-    else:
-        pesagens_df = pd.concat([pesagens_df, pd.DataFrame([nova_pesagem])], ignore_index=True)
+    with _unit_of_work(transacao, RECRIA_FILE, RECRIA_PESAGENS_FILE) as tx:
+        recria_df = tx.load(RECRIA_FILE)
+        ativos = recria_df[recria_df['status'] == 'Ativo'].drop_duplicates('id_animal').set_index('id_animal')
+        
+        # Verificar se todos os animais estão ativos na recria
+        inativos = ~pesagens['id_animal'].isin(ativos.index)
+        if inativos.any():
+            return False, f"{int(inativos.sum())} animal(is) não encontrado(s) na recria ou inativo(s)"
+        
+        pesagens['data_pesagem'] = pd.to_datetime(pesagens['data_pesagem'])
+        pesagens['peso'] = pd.to_numeric(pesagens['peso'])
+        for column in ('id_lote', 'fase_recria'):
+            valores_recria = pesagens['id_animal'].map(ativos[column])
+            pesagens[column] = pesagens[column].fillna(valores_recria) if column in pesagens else valores_recria
+        
+        # Idade a partir da data de nascimento do cadastro de animais
+        animals_df = load_animals()
+        nascimentos = pd.to_datetime(
+            animals_df.drop_duplicates('id_animal').set_index('id_animal')['data_nascimento'],
+            errors='coerce'
+        )
+        # reindex em vez de map: map de uma coluna de texto por uma série de
+        # datas vazia (cadastro de animais vazio) falha ao converter os ausentes
+        nascimento = pd.Series(nascimentos.reindex(pesagens['id_animal']).to_numpy(), index=pesagens.index)
+        idade_dias = (pesagens['data_pesagem'] - nascimento).dt.days
+        
+        # Ganho desde a pesagem anterior (já gravada ou deste mesmo lote de pesagens)
+        historico = tx.query(RECRIA_PESAGENS_FILE)
+        if historico.empty:
+            historico = pd.DataFrame(columns=['id_animal', 'data_pesagem', 'peso'])
+        historico = historico[historico['id_animal'].isin(pesagens['id_animal'])][['id_animal', 'data_pesagem', 'peso']]
+        historico['data_pesagem'] = pd.to_datetime(historico['data_pesagem'], errors='coerce')
+        historico['peso'] = pd.to_numeric(historico['peso'], errors='coerce')
+        historico = pd.concat([historico, pesagens[['id_animal', 'data_pesagem', 'peso']]], ignore_index=True)
+        
+        anteriores = _previous_measurement(pesagens, historico, 'id_animal', 'data_pesagem', 'peso')
+        dias = (anteriores['data_pesagem'] - anteriores['data_anterior']).dt.days
+        ganho = (anteriores['peso'] - anteriores['valor_anterior']).where(dias > 0)
+        
+        novas_pesagens = pd.DataFrame({
+            'id_pesagem': [str(uuid.uuid4()) for _ in range(len(pesagens))],
+            'id_animal': pesagens['id_animal'],
+            'id_lote': pesagens['id_lote'],
+            'data_pesagem': pesagens['data_pesagem'].dt.strftime('%Y-%m-%d'),
+            'peso': pesagens['peso'],
+            'tipo_pesagem': tipo_pesagem,
+            'fase_recria': pesagens['fase_recria'],
+            'idade_dias': idade_dias,
+            'ganho_desde_ultima': ganho,
+            'gpd_periodo': ganho * 1000 / dias.where(dias > 0),  # g/dia
+            'responsavel': pesagens['responsavel'].fillna(responsavel) if 'responsavel' in pesagens else responsavel,
+            'observacao': pesagens['observacao'].fillna(observacao) if 'observacao' in pesagens else observacao
+        })
+        
+        tx.append(RECRIA_PESAGENS_FILE, novas_pesagens.astype(object).where(novas_pesagens.notna(), None).to_dict('records'))
+        return True, f"{len(novas_pesagens)} pesagens registradas com sucesso"
+
+def _previous_measurement(rows, history, by, on, value_column):
+    """
+    Encontra, para cada linha, a medição anterior mais recente do mesmo animal ou lote.
     
-    # Salvar DataFrame atualizado
-    save_recria_pesagens(pesagens_df)
-    return True, "Pesagem registrada com sucesso"
+    Usa um único merge_asof: cada linha de rows recebe o valor e a data da
+    última linha de history com a mesma chave e data estritamente anterior.
+    
+    Args:
+        rows: DataFrame com as colunas by e on (datetime)
+        history: DataFrame com as colunas by, on e value_column
+        by: Coluna que identifica o animal ou lote
+        on: Coluna de data
+        value_column: Coluna com o valor medido (ex.: peso)
+        
+    Returns:
+        DataFrame: rows (na mesma ordem) com as colunas 'valor_anterior' e 'data_anterior'
+    """
+    previous = history[[by, on, value_column]].dropna(subset=[by, on]).rename(
+        columns={value_column: 'valor_anterior'}
+    )
+    previous[by] = previous[by].astype(object)
+    previous['data_anterior'] = previous[on]
+    
+    ordered = rows.reset_index(drop=True).reset_index().rename(columns={'index': '_ordem'})
+    ordered[by] = ordered[by].astype(object)
+    merged = pd.merge_asof(
+        ordered.sort_values(on),
+        previous.sort_values(on),
+        on=on,
+        by=by,
+        direction='backward',
+        allow_exact_matches=False
+    )
+    return merged.sort_values('_ordem').drop(columns='_ordem').reset_index(drop=True)
 
 def transferir_animal_recria(id_animal, id_lote_destino, id_baia_destino, data_transferencia, 
-                           motivo, peso_transferencia, fase_destino, responsavel, observacao=None):
-    """Transfer an animal to another recria batch"""
-    recria_df = load_recria()
-    lotes_df = load_recria_lotes()
-    transferencias_df = load_recria_transferencias()
+                           motivo, peso_transferencia, fase_destino, responsavel, observacao=None,
+                           transacao=None):
+    """
+    Transfere um animal da recria para outro lote.
     
-    # Verificar se o animal está em recria
-    if not recria_df.empty and id_animal not in recria_df[recria_df['status'] == 'Ativo']['id_animal'].values:
-        return False, "Animal não encontrado na recria ou não está ativo"
+    O registro da transferência, a pesagem da transferência e a atualização
+    do animal são gravados juntos, em uma única transação. Para mover vários
+    animais de uma vez, passe a mesma transação (table_transaction) a cada
+    chamada: cada tabela é gravada uma só vez ao final.
     
-    # Obter informações do animal
-    animal_recria = recria_df[recria_df['id_animal'] == id_animal].iloc[0]
-    id_lote_origem = animal_recria['id_lote']
-    fase_origem = animal_recria['fase_recria']
+    Args:
+        transacao: Transação em andamento (opcional)
+        
+    Returns:
+        tuple: (sucesso, mensagem)
+    """
+    with _unit_of_work(transacao, RECRIA_FILE, RECRIA_PESAGENS_FILE,
+                       RECRIA_TRANSFERENCIAS_FILE) as tx:
+        recria_df = tx.load(RECRIA_FILE)
+        lotes_df = load_recria_lotes()
+    
+        # Verificar se o animal está em recria
+        if not recria_df.empty and id_animal not in recria_df[recria_df['status'] == 'Ativo']['id_animal'].values:
+            return False, "Animal não encontrado na recria ou não está ativo"
+    
+        # Obter informações do animal
+        animal_recria = recria_df[recria_df['id_animal'] == id_animal].iloc[0]
+        id_lote_origem = animal_recria['id_lote']
+        fase_origem = animal_recria['fase_recria']
+    
+        # Obter a baia de origem
+        id_baia_origem = None
+        if not lotes_df.empty and id_lote_origem in lotes_df['id_lote'].values:
+            id_baia_origem = lotes_df[lotes_df['id_lote'] == id_lote_origem]['id_baia'].iloc[0]
+    
+        # Criar novo registro de transferência
+        nova_transferencia = {
+            'id_transferencia': str(uuid.uuid4()),
+            'id_animal': id_animal,
+            'id_lote_origem': id_lote_origem,
+            'id_lote_destino': id_lote_destino,
+            'id_baia_origem': id_baia_origem,
+            'id_baia_destino': id_baia_destino,
+            'data_transferencia': data_transferencia,
+            'motivo': motivo,
+            'peso_transferencia': peso_transferencia,
+            'fase_origem': fase_origem,
+            'fase_destino': fase_destino,
+            'responsavel': responsavel,
+            'observacao': observacao
+        }
     
-    # Obter a baia de origem
-    id_baia_origem = None
-    if not lotes_df.empty and id_lote_origem in lotes_df['id_lote'].values:
-        id_baia_origem = lotes_df[lotes_df['id_lote'] == id_lote_origem]['id_baia'].iloc[0]
+        # Atualizar o registro de recria
+        recria_df.loc[recria_df['id_animal'] == id_animal, 'id_lote'] = id_lote_destino
+        recria_df.loc[recria_df['id_animal'] == id_animal, 'fase_recria'] = fase_destino
+    
+        # Registrar a pesagem da transferência
+        registrar_pesagem_recria(
+            id_animal=id_animal,
+            data_pesagem=data_transferencia,
+            peso=peso_transferencia,
+            tipo_pesagem='Individual',
+            fase_recria=fase_destino,
+            id_lote=id_lote_destino,
+            responsavel=responsavel,
+            observacao=f"Pesagem de transferência: {motivo}",
+            transacao=tx
+        )
     
-    # Criar novo registro de transferência
-    nova_transferencia = {
-        'id_transferencia': str(uuid.uuid4()),
-        'id_animal': id_animal,
-        'id_lote_origem': id_lote_origem,
-        'id_lote_destino': id_lote_destino,
-        'id_baia_origem': id_baia_origem,
-        'id_baia_destino': id_baia_destino,
-        'data_transferencia': data_transferencia,
-        'motivo': motivo,
-        'peso_transferencia': peso_transferencia,
-        'fase_origem': fase_origem,
-        'fase_destino': fase_destino,
-        'responsavel': responsavel,
-        'observacao': observacao
-    }
+        # Preparar as alterações para gravação conjunta
+        tx.append(RECRIA_TRANSFERENCIAS_FILE, nova_transferencia)
+        tx.save(RECRIA_FILE, recria_df)
+        return True, "Animal transferido com sucesso"
+
+def transferir_animais_recria(animais, id_lote_destino, id_baia_destino, data_transferencia,
+                              motivo, fase_destino, responsavel, observacao=None, transacao=None):
+    """
+    Transfere vários animais da recria para o mesmo lote de destino.
     
-    # Adicionar ao DataFrame de transferências
-    if transferencias_df.empty:
-        transferencias_df = pd.DataFrame([nova_transferencia])
-    else:
-        transferencias_df = pd.concat([transferencias_df, pd.DataFrame([nova_transferencia])], ignore_index=True)
-    
-    # Atualizar o registro de recria
-    recria_df.loc[recria_df['id_animal'] == id_animal, 'id_lote'] = id_lote_destino
-    recria_df.loc[recria_df['id_animal'] == id_animal, 'fase_recria'] = fase_destino
-    
-    # Registrar a pesagem da transferência
-    registrar_pesagem_recria(
-        id_animal=id_animal,
-        data_pesagem=data_transferencia,
-        peso=peso_transferencia,
-        tipo_pesagem='Individual',
-        fase_recria=fase_destino,
-        id_lote=id_lote_destino,
-        responsavel=responsavel,
-        observacao=f"Pesagem de transferência: {motivo}"
-    )
+    Os registros de transferência, as pesagens de transferência e a
+    atualização dos animais são montados para todos os animais juntos e
+    gravados com uma escrita por tabela.
     
-    # Salvar DataFrames atualizados
-    save_recria_transferencias(transferencias_df)
-    save_recria(recria_df)
-    return True, "Animal transferido com sucesso"
+    Args:
+        animais: DataFrame com as colunas 'id_animal' e 'peso' (peso na transferência)
+        id_lote_destino: ID do lote de destino
+        id_baia_destino: ID da baia de destino
+        data_transferencia: Data da transferência
+        motivo: Motivo da transferência
+        fase_destino: Fase de recria de destino
+        responsavel: Responsável pela transferência
+        observacao: Observação (opcional)
+        transacao: Transação em andamento (opcional)
+        
+    Returns:
+        tuple: (sucesso, mensagem)
+    """
+    animais = animais.reset_index(drop=True)
+    if animais.empty:
+        return False, "Nenhum animal informado"
+    
+    with _unit_of_work(transacao, RECRIA_FILE, RECRIA_PESAGENS_FILE,
+                       RECRIA_TRANSFERENCIAS_FILE) as tx:
+        recria_df = tx.load(RECRIA_FILE)
+        lotes_df = load_recria_lotes()
+        ativos = recria_df[recria_df['status'] == 'Ativo'].drop_duplicates('id_animal').set_index('id_animal')
+        
+        # Verificar se todos os animais estão ativos na recria
+        inativos = ~animais['id_animal'].isin(ativos.index)
+        if inativos.any():
+            return False, f"{int(inativos.sum())} animal(is) não encontrado(s) na recria ou inativo(s)"
+        
+        id_lote_origem = animais['id_animal'].map(ativos['id_lote'])
+        baias_lotes = lotes_df.drop_duplicates('id_lote').set_index('id_lote')['id_baia']
+        
+        novas_transferencias = pd.DataFrame({
+            'id_transferencia': [str(uuid.uuid4()) for _ in range(len(animais))],
+            'id_animal': animais['id_animal'],
+            'id_lote_origem': id_lote_origem,
+            'id_lote_destino': id_lote_destino,
+            'id_baia_origem': id_lote_origem.map(baias_lotes),
+            'id_baia_destino': id_baia_destino,
+            'data_transferencia': data_transferencia,
+            'motivo': motivo,
+            'peso_transferencia': animais['peso'],
+            'fase_origem': animais['id_animal'].map(ativos['fase_recria']),
+            'fase_destino': fase_destino,
+            'responsavel': responsavel,
+            'observacao': observacao
+        })
+        
+        # Atualizar o registro de recria
+        transferidos = recria_df['id_animal'].isin(animais['id_animal'])
+        recria_df.loc[transferidos, 'id_lote'] = id_lote_destino
+        recria_df.loc[transferidos, 'fase_recria'] = fase_destino
+        
+        # Registrar as pesagens da transferência
+        registrar_pesagens_recria(
+            pd.DataFrame({
+                'id_animal': animais['id_animal'],
+                'peso': animais['peso'],
+                'data_pesagem': data_transferencia,
+                'id_lote': id_lote_destino,
+                'fase_recria': fase_destino
+            }),
+            responsavel=responsavel,
+            observacao=f"Pesagem de transferência: {motivo}",
+            transacao=tx
+        )
+        
+        tx.append(RECRIA_TRANSFERENCIAS_FILE,
+                  novas_transferencias.astype(object).where(novas_transferencias.notna(), None).to_dict('records'))
+        tx.save(RECRIA_FILE, recria_df)
+        return True, f"{len(animais)} animais transferidos com sucesso"
 
 def registrar_alimentacao_recria(id_lote, data_inicio, data_fim, tipo_racao, quantidade_kg, 
                                custo_kg, fase_recria, responsavel, observacao=None):
     """Register feeding for a recria batch"""
-    alimentacao_df = load_recria_alimentacao()
     lotes_df = load_recria_lotes()
     
     # Verificar se o lote existe
@@ -1933,22 +5568,14 @@ def registrar_alimentacao_recria(id_lote, data_inicio, data_fim, tipo_racao, qua
         'observacao': observacao
     }
     
-    # Adicionar ao DataFrame
-    if alimentacao_df.empty:
-        alimentacao_df = pd.DataFrame([nova_alimentacao])
-    else:
-        alimentacao_df = pd.concat([alimentacao_df, pd.DataFrame([nova_alimentacao])], ignore_index=True)
-    
-    # Salvar DataFrame atualizado
-    save_recria_alimentacao(alimentacao_df)
+    # Acrescentar ao arquivo
+    _append_table(nova_alimentacao, RECRIA_ALIMENTACAO_FILE)
     return True, "Alimentação registrada com sucesso"
 
 def registrar_medicacao_recria(data_aplicacao, medicamento, via_aplicacao, dose, unidade_dose, 
                            motivo, tipo_aplicacao, periodo_carencia, responsavel, 
                            id_animal=None, id_lote=None, observacao=None):
     """Register medication for recria animal(s)"""
-    medicacao_df = load_recria_medicacao()
-    
     # Validar dados
     if tipo_aplicacao == 'Individual' and not id_animal:
         return False, "ID do animal é obrigatório para medicação individual"
@@ -1979,84 +5606,83 @@ def registrar_medicacao_recria(data_aplicacao, medicamento, via_aplicacao, dose,
         'observacao': observacao
     }
     
-    # Adicionar ao DataFrame
-    if medicacao_df.empty:
-        medicacao_df = pd.DataFrame([nova_medicacao])
-    else:
-        medicacao_df = pd.concat([medicacao_df, pd.DataFrame([nova_medicacao])], ignore_index=True)
-    
-    # Salvar DataFrame atualizado
-    save_recria_medicacao(medicacao_df)
+    # Acrescentar ao arquivo
+    _append_table(nova_medicacao, RECRIA_MEDICACAO_FILE)
     return True, "Medicação registrada com sucesso"
 
-def finalizar_recria(id_animal, data_saida, peso_saida, destino, observacao=None):
-    """Finish recria for an animal"""
-    recria_df = load_recria()
+def finalizar_recria(id_animal, data_saida, peso_saida, destino, observacao=None, transacao=None):
+    """Finish recria for an animal, saving the exit and its final weighing together"""
+    with _unit_of_work(transacao, RECRIA_FILE, RECRIA_PESAGENS_FILE) as tx:
+        recria_df = tx.load(RECRIA_FILE)
+    
+        # Verificar se o animal está em recria
+        if not recria_df.empty and id_animal not in recria_df[recria_df['status'] == 'Ativo']['id_animal'].values:
+            return False, "Animal não encontrado na recria ou não está ativo"
+    
+        # Registrar pesagem final
+        animal_recria = recria_df[recria_df['id_animal'] == id_animal].iloc[0]
+        registrar_pesagem_recria(
+            id_animal=id_animal,
+            data_pesagem=data_saida,
+            peso=peso_saida,
+            tipo_pesagem='Individual',
+            fase_recria=animal_recria['fase_recria'],
+            id_lote=animal_recria['id_lote'],
+            observacao=f"Pesagem de saída: {destino}",
+            transacao=tx
+        )
     
-    # Verificar se o animal está em recria
-    if not recria_df.empty and id_animal not in recria_df[recria_df['status'] == 'Ativo']['id_animal'].values:
-        return False, "Animal não encontrado na recria ou não está ativo"
-    
-    # Atualizar registro de recria
-    recria_df.loc[recria_df['id_animal'] == id_animal, 'data_saida'] = data_saida
-    recria_df.loc[recria_df['id_animal'] == id_animal, 'peso_saida'] = peso_saida
-    recria_df.loc[recria_df['id_animal'] == id_animal, 'destino'] = destino
-    recria_df.loc[recria_df['id_animal'] == id_animal, 'status'] = 'Finalizado'
-    recria_df.loc[recria_df['id_animal'] == id_animal, 'observacao'] = observacao
-    
-    # Registrar pesagem final
-    registrar_pesagem_recria(
-        id_animal=id_animal,
-        data_pesagem=data_saida,
-        peso=peso_saida,
-        tipo_pesagem='Individual',
-        fase_recria=recria_df[recria_df['id_animal'] == id_animal]['fase_recria'].iloc[0],
-        id_lote=recria_df[recria_df['id_animal'] == id_animal]['id_lote'].iloc[0],
-        observacao=f"Pesagem de saída: {destino}"
-    )
+        # Atualizar registro de recria
+        recria_df.loc[recria_df['id_animal'] == id_animal, 'data_saida'] = data_saida
+        recria_df.loc[recria_df['id_animal'] == id_animal, 'peso_saida'] = peso_saida
+        recria_df.loc[recria_df['id_animal'] == id_animal, 'destino'] = destino
+        recria_df.loc[recria_df['id_animal'] == id_animal, 'status'] = 'Finalizado'
+        recria_df.loc[recria_df['id_animal'] == id_animal, 'observacao'] = observacao
     
-    # Salvar DataFrame atualizado
-    save_recria(recria_df)
-    return True, "Recria finalizada com sucesso"
+        # Preparar o DataFrame atualizado para gravação
+        tx.save(RECRIA_FILE, recria_df)
+        return True, "Recria finalizada com sucesso"
 
-def finalizar_lote_recria(id_lote, data_encerramento, peso_medio_final, gpd, ca, observacao=None):
+def finalizar_lote_recria(id_lote, data_encerramento, peso_medio_final, gpd, ca, observacao=None,
+                          transacao=None):
     """Finish a recria batch"""
-    lotes_df = load_recria_lotes()
-    recria_df = load_recria()
-    
-    # Verificar se o lote existe
-    if not lotes_df.empty and id_lote not in lotes_df['id_lote'].values:
-        return False, "Lote não encontrado"
-    
-    # Verificar se o lote já está finalizado
-    if lotes_df[lotes_df['id_lote'] == id_lote]['status'].iloc[0] == 'Finalizado':
-        return False, "Lote já está finalizado"
-    
-    # Contar animais ativos no lote
-    quantidade_final = 0
-    if not recria_df.empty:
-        quantidade_final = len(recria_df[(recria_df['id_lote'] == id_lote) & (recria_df['status'] == 'Ativo')])
-    
-    # Calcular mortalidade
-    mortalidade = 0
-    if not lotes_df.empty:
-        quantidade_inicial = lotes_df[lotes_df['id_lote'] == id_lote]['quantidade_inicial'].iloc[0]
-        if quantidade_inicial > 0:
-            mortalidade = (quantidade_inicial - quantidade_final) / quantidade_inicial * 100
-    
-    # Atualizar registro do lote
-    lotes_df.loc[lotes_df['id_lote'] == id_lote, 'data_encerramento'] = data_encerramento
-    lotes_df.loc[lotes_df['id_lote'] == id_lote, 'quantidade_final'] = quantidade_final
-    lotes_df.loc[lotes_df['id_lote'] == id_lote, 'peso_medio_final'] = peso_medio_final
-    lotes_df.loc[lotes_df['id_lote'] == id_lote, 'gpd'] = gpd
-    lotes_df.loc[lotes_df['id_lote'] == id_lote, 'ca'] = ca
-    lotes_df.loc[lotes_df['id_lote'] == id_lote, 'mortalidade'] = mortalidade
-    lotes_df.loc[lotes_df['id_lote'] == id_lote, 'status'] = 'Finalizado'
-    lotes_df.loc[lotes_df['id_lote'] == id_lote, 'observacao'] = observacao
-    
-    # Salvar DataFrame atualizado
-    save_recria_lotes(lotes_df)
-    return True, "Lote de recria finalizado com sucesso"
+    with _unit_of_work(transacao, RECRIA_LOTES_FILE, RECRIA_FILE) as tx:
+        lotes_df = tx.load(RECRIA_LOTES_FILE)
+        recria_df = tx.load(RECRIA_FILE)
+    
+        # Verificar se o lote existe
+        if not lotes_df.empty and id_lote not in lotes_df['id_lote'].values:
+            return False, "Lote não encontrado"
+    
+        # Verificar se o lote já está finalizado
+        if lotes_df[lotes_df['id_lote'] == id_lote]['status'].iloc[0] == 'Finalizado':
+            return False, "Lote já está finalizado"
+    
+        # Contar animais ativos no lote
+        quantidade_final = 0
+        if not recria_df.empty:
+            quantidade_final = len(recria_df[(recria_df['id_lote'] == id_lote) & (recria_df['status'] == 'Ativo')])
+    
+        # Calcular mortalidade
+        mortalidade = 0
+        if not lotes_df.empty:
+            quantidade_inicial = lotes_df[lotes_df['id_lote'] == id_lote]['quantidade_inicial'].iloc[0]
+            if quantidade_inicial > 0:
+                mortalidade = (quantidade_inicial - quantidade_final) / quantidade_inicial * 100
+    
+        # Atualizar registro do lote
+        lotes_df.loc[lotes_df['id_lote'] == id_lote, 'data_encerramento'] = data_encerramento
+        lotes_df.loc[lotes_df['id_lote'] == id_lote, 'quantidade_final'] = quantidade_final
+        lotes_df.loc[lotes_df['id_lote'] == id_lote, 'peso_medio_final'] = peso_medio_final
+        lotes_df.loc[lotes_df['id_lote'] == id_lote, 'gpd'] = gpd
+        lotes_df.loc[lotes_df['id_lote'] == id_lote, 'ca'] = ca
+        lotes_df.loc[lotes_df['id_lote'] == id_lote, 'mortalidade'] = mortalidade
+        lotes_df.loc[lotes_df['id_lote'] == id_lote, 'status'] = 'Finalizado'
+        lotes_df.loc[lotes_df['id_lote'] == id_lote, 'observacao'] = observacao
+    
+        # Preparar o DataFrame atualizado para gravação
+        tx.save(RECRIA_LOTES_FILE, lotes_df)
+        return True, "Lote de recria finalizado com sucesso"
 
 def obter_lotes_recria_ativos():
     """Get active recria batches"""
@@ -2092,7 +5718,11 @@ def calcular_estatisticas_recria(id_lote=None, fase=None, periodo_inicio=None, p
     """Calculate recria statistics"""
     recria_df = load_recria()
     lotes_df = load_recria_lotes()
-    pesagens_df = load_recria_pesagens()
+    if periodo_inicio and periodo_fim:
+        # Lê só as pesagens do período (só as partições dele, se particionado)
+        pesagens_df = load_partitions(RECRIA_PESAGENS_FILE, periodo_inicio, periodo_fim)
+    else:
+        pesagens_df = load_recria_pesagens()
     alimentacao_df = load_recria_alimentacao()
     medicacao_df = load_recria_medicacao()
     
@@ -2113,10 +5743,6 @@ def calcular_estatisticas_recria(id_lote=None, fase=None, periodo_inicio=None, p
     
     # Filtrar por período se especificado
     if periodo_inicio and periodo_fim:
-        pesagens_df = pesagens_df[
-            (pd.to_datetime(pesagens_df['data_pesagem']) >= pd.to_datetime(periodo_inicio)) &
-            (pd.to_datetime(pesagens_df['data_pesagem']) <= pd.to_datetime(periodo_fim))
-        ]
         alimentacao_df = alimentacao_df[
             (pd.to_datetime(alimentacao_df['data_inicio']) >= pd.to_datetime(periodo_inicio)) &
             (pd.to_datetime(alimentacao_df['data_fim']) <= pd.to_datetime(periodo_fim))